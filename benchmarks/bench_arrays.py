@@ -0,0 +1,102 @@
+"""Compares element-by-element loops over arrays with whole-array statements.
+
+`a = b + c;` on `int[n]` arrays runs as one NumPy call writing into `a`;
+the loop version does the same work one element at a time through scalar
+indexing. A third program sums an array with `s = s + a[i]` to show the
+cost of indexing in a plain scalar loop. Every time includes the setup
+loop that fills `b` and `c`. The last program repeats `q = x / y + x;` often
+enough for its loop to be promoted, so the compiled array division runs;
+every engine must print the same value.
+
+Run from the repository root:
+
+    python benchmarks/bench_arrays.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mini_compiler.compiler import Compiler
+
+SIZE = 100_000
+REPEATS = 10
+HOT_REPEATS = 500  # Above the closures engine's hot_threshold
+
+SETUP = """
+int[%d] a;
+int[%d] b;
+int[%d] c;
+for (int i = 0; i < %d; i++) {
+    b[i] = i;
+    c[i] = 3;
+}
+""" % (SIZE, SIZE, SIZE, SIZE)
+
+PROGRAMS = {
+    "element loop": SETUP + """
+for (int r = 0; r < %d; r++) {
+    for (int i = 0; i < %d; i++) {
+        a[i] = b[i] + c[i];
+    }
+}
+cout << a[%d];
+""" % (REPEATS, SIZE, SIZE - 1),
+    "whole array": SETUP + """
+for (int r = 0; r < %d; r++) {
+    a = b + c;
+}
+cout << a[%d];
+""" % (REPEATS, SIZE - 1),
+    "scalar sum": SETUP + """
+int s = 0;
+for (int i = 0; i < %d; i++) {
+    s = s + b[i];
+}
+cout << s;
+""" % SIZE,
+    "hot divide": """
+float[%d] x;
+float[%d] y;
+float[%d] q;
+for (int i = 0; i < %d; i++) {
+    x[i] = i;
+    y[i] = 4;
+}
+for (int r = 0; r < %d; r++) {
+    q = x / y + x;
+}
+cout << q[%d];
+""" % (SIZE // 100, SIZE // 100, SIZE // 100, SIZE // 100, HOT_REPEATS, SIZE // 100 - 1),
+}
+
+ENGINES = {
+    "tree": dict(hot_threshold=None),
+    "closures": dict(hot_threshold=100, background_compile=False),
+}
+
+
+def run(source, options):
+    compiler = Compiler(**options)
+    ast = compiler.parse(compiler.tokenize(source))
+    start = time.perf_counter()
+    compiler.evaluate(ast)
+    seconds = time.perf_counter() - start
+    return seconds, "".join(compiler.output)
+
+
+def main():
+    print(f"{SIZE} elements, {REPEATS} repeats of a = b + c\n")
+    print(f"{'program':14} {'engine':10} {'seconds':>9}  output")
+    for program, source in PROGRAMS.items():
+        outputs = set()
+        for engine, options in ENGINES.items():
+            seconds, output = run(source, options)
+            print(f"{program:14} {engine:10} {seconds:9.3f}  {output.strip()}")
+            outputs.add(output)
+        assert len(outputs) == 1, f"{program}: engines printed different output"
+
+
+if __name__ == "__main__":
+    main()
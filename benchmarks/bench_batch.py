@@ -0,0 +1,68 @@
+"""Times running many small independent programs, one after another and with `Compiler.run_many`.
+
+The serial run makes a fresh Compiler per program in this process, which
+is what a grading script did before batch mode. The batch runs spread the
+same programs over a process pool in chunks, in submission and in
+completion order. Every run must produce the same output per program. On
+a single CPU the pool cannot be faster; it shows what the chunking costs.
+
+Run from the repository root:
+
+    python benchmarks/bench_batch.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mini_compiler.compiler import Compiler
+
+PROGRAMS = 400
+
+
+def program(number):
+    return f"""
+func score(int n) int {{
+    int total = 0;
+    for (int i = 0; i < n; i++) {{ total = total + (i * {number % 7 + 1}); }}
+    return total;
+}}
+cout << score({number % 50 + 50});
+"""
+
+
+def serial(sources):
+    outputs = []
+    for source in sources:
+        compiler = Compiler(background_compile=False)
+        compiler.evaluate(compiler.parse(compiler.tokenize(source)))
+        outputs.append("".join(compiler.output))
+    return outputs
+
+
+def batch(sources, ordered):
+    outputs = [None] * len(sources)
+    for result in Compiler().run_many(sources, workers=os.cpu_count(), ordered=ordered):
+        outputs[result.index] = result.output
+    return outputs
+
+
+def main():
+    sources = [program(number) for number in range(PROGRAMS)]
+    print(f"{PROGRAMS} programs, {os.cpu_count()} CPUs\n")
+    print(f"{'mode':22} {'seconds':>8} {'programs/s':>11}")
+    expected = None
+    for mode, run in (("serial", serial),
+                      ("run_many ordered", lambda sources: batch(sources, True)),
+                      ("run_many unordered", lambda sources: batch(sources, False))):
+        start = time.perf_counter()
+        outputs = run(sources)
+        seconds = time.perf_counter() - start
+        print(f"{mode:22} {seconds:8.3f} {PROGRAMS / seconds:11.0f}")
+        expected = expected or outputs
+        assert outputs == expected, f"{mode} printed different output"
+
+
+if __name__ == "__main__":
+    main()
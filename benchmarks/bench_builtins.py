@@ -0,0 +1,82 @@
+"""Compares helpers written in the mini language with the native builtins.
+
+`absolute` and `smaller` are the kind of helpers programs had to define
+before the builtin registry existed; every call makes a scope and runs
+their bodies. `abs` and `min` go straight to the Python functions.
+
+Run from the repository root:
+
+    python benchmarks/bench_builtins.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mini_compiler.compiler import Compiler
+
+LIMIT = 50_000
+
+HELPERS = """
+func absolute(int x) int {
+    int r = x;
+    if (x < 0) {
+        r = 0 - x;
+    }
+    return r;
+}
+func smaller(int a, int b) int {
+    int r = a;
+    if (b < a) {
+        r = b;
+    }
+    return r;
+}
+"""
+
+LOOP = """
+int total = 0;
+for (int i = 0; i < %d; i++) {
+    total = total + %s(i - 25000) + %s(i, 100);
+}
+cout << total;
+"""
+
+PROGRAMS = {
+    "mini helpers": HELPERS + LOOP % (LIMIT, "absolute", "smaller"),
+    "builtins": LOOP % (LIMIT, "abs", "min"),
+}
+
+ENGINES = {
+    "tree": dict(hot_threshold=None),
+    "closures": dict(hot_threshold=100, background_compile=False),
+    "bytecode": dict(backend='bytecode'),
+}
+
+
+def run(source, options):
+    compiler = Compiler(**options)
+    ast = compiler.parse(compiler.tokenize(source))
+    start = time.perf_counter()
+    compiler.evaluate(ast)
+    seconds = time.perf_counter() - start
+    return seconds, "".join(compiler.output)
+
+
+def main():
+    print(f"{LIMIT} iterations, two calls each\n")
+    print(f"{'engine':10} {'helpers s':>10} {'builtins s':>11} {'speedup':>8}")
+    outputs = set()
+    for engine, options in ENGINES.items():
+        helper_seconds, helper_output = run(PROGRAMS["mini helpers"], options)
+        builtin_seconds, builtin_output = run(PROGRAMS["builtins"], options)
+        outputs.update((helper_output, builtin_output))
+        print(f"{engine:10} {helper_seconds:10.3f} {builtin_seconds:11.3f} {helper_seconds / builtin_seconds:7.1f}x")
+    assert len(outputs) == 1, "the engines or programs disagree"
+    print()
+    print(outputs.pop(), end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Times a call-heavy loop with call sites linked to their callees and by name.
+
+The unlinked run clears every call's callee (and turns the bytecode's direct
+calls back into `CALL`), so each call looks its function up by name and
+checks the argument count again, as calls did before the link step. Both
+runs must print the same result.
+
+Run from the repository root:
+
+    python benchmarks/bench_calls.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mini_compiler.ast_nodes import FunctionCallNode, walk
+from mini_compiler.compiler import Compiler
+
+CALLS = 50_000
+
+SOURCE = f"""
+func inc(int x) int {{ return x + 1; }}
+func twice(int x) int {{ return inc(inc(x)) - x; }}
+int total = 0;
+for (int i = 0; i < {CALLS}; i++) {{
+    total = total + twice(i) + abs(0 - 1);
+}}
+cout << total;
+"""
+
+ENGINES = {
+    "tree": dict(hot_threshold=None, partial_evaluation=False),
+    "bytecode": dict(backend='bytecode', partial_evaluation=False),
+}
+
+
+def unlink(ast, codes):
+    for statement in ast:
+        for node in walk(statement):
+            if isinstance(node, FunctionCallNode):
+                node.callee = None
+    for code in codes:
+        for index, (op, arg) in enumerate(code.instructions):
+            if op == 'CALL_CODE':
+                code.instructions[index] = ('CALL', (arg[0].name, arg[1]))
+            elif op == 'CALL_NATIVE':
+                # arg[0] is the bound NativeFunction.call
+                code.instructions[index] = ('CALL', (arg[0].__self__.name, arg[1]))
+
+
+def run(options, linked):
+    compiler = Compiler(**options)
+    ast = compiler.parse(compiler.tokenize(SOURCE))
+    if options.get('backend') == 'bytecode':
+        main, functions = compiler.compile_bytecode(ast)
+        if not linked:
+            unlink(ast, [main] + list(functions.values()))
+        start = time.perf_counter()
+        compiler.run_bytecode(main, functions)
+    else:
+        if not linked:
+            unlink(ast, [])
+        start = time.perf_counter()
+        compiler.evaluate(ast)
+    seconds = time.perf_counter() - start
+    return seconds, "".join(compiler.output)
+
+
+def main():
+    print(f"{CALLS * 4} calls\n")
+    print(f"{'engine':10} {'by name s':>10} {'linked s':>9} {'speedup':>8}")
+    outputs = set()
+    for engine, options in ENGINES.items():
+        name_seconds, name_output = run(options, linked=False)
+        linked_seconds, linked_output = run(options, linked=True)
+        outputs.update((name_output, linked_output))
+        print(f"{engine:10} {name_seconds:10.3f} {linked_seconds:9.3f} {name_seconds / linked_seconds:7.2f}x")
+    assert len(outputs) == 1, "the engines or runs disagree"
+    print()
+    print(outputs.pop(), end="")
+
+
+if __name__ == "__main__":
+    main()
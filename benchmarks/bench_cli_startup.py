@@ -0,0 +1,52 @@
+"""Times how long `python -m mini_compiler run` takes to start.
+
+Runs a one-line program through the command-line runner many times and
+compares the best wall time with a bare `python -c pass`, so the figure is
+what the runner itself adds: imports, argument parsing, compiling and
+running. The runner must never load tkinter, which the editor needs and a
+batch server does not have; the check reads `-X importtime`.
+
+Run from the repository root:
+
+    python benchmarks/bench_cli_startup.py
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+RUNS = 10
+
+
+def best_wall_time(command):
+    best = float('inf')
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, check=True, stdout=subprocess.DEVNULL, stdin=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    with tempfile.NamedTemporaryFile('w', suffix='.mc', delete=False) as program:
+        program.write('cout << "hello";\n')
+    try:
+        runner = [sys.executable, "-m", "mini_compiler", "run", program.name]
+        imports = subprocess.run([sys.executable, "-X", "importtime"] + runner[1:], cwd=ROOT, check=True,
+                                 capture_output=True, text=True).stderr
+        bare = best_wall_time([sys.executable, "-c", "pass"])
+        run = best_wall_time(runner)
+    finally:
+        os.unlink(program.name)
+
+    print(f"{'python -c pass':28} {bare * 1000:8.1f} ms")
+    print(f"{'python -m mini_compiler run':28} {run * 1000:8.1f} ms")
+    print(f"{'runner overhead':28} {(run - bare) * 1000:8.1f} ms")
+    loaded = [line.rsplit("|", 1)[-1].strip() for line in imports.splitlines() if line.startswith("import time:")]
+    assert not any(name.split(".")[0] in ("tkinter", "customtkinter") for name in loaded), "the runner imported tkinter"
+
+
+if __name__ == "__main__":
+    main()
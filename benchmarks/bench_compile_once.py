@@ -0,0 +1,85 @@
+"""Times grading one program against many input sets, compiling per run and compiling once.
+
+The per-run way is what a grading script did before `Compiler.compile`: a
+fresh Compiler tokenizes, parses and links the source for every input set
+and reads `cin` through an input object. Compiling once runs the same
+CompiledProgram with `run(inputs=...)`, so only execution is repeated, and
+hot code compiled in one run stays compiled for the next. The parallel
+way hands the CompiledProgram to `run_many`, which ships it to each worker
+process once. All ways must print the same output for every input set.
+
+Run from the repository root:
+
+    python benchmarks/bench_compile_once.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mini_compiler.compiler import Compiler
+
+INPUT_SETS = 300
+
+SOURCE = """
+int n = 0;
+int step = 0;
+cin >> n;
+cin >> step;
+func triangle(int x) int {
+    int sum = 0;
+    for (int k = 0; k < x; k++) { sum = sum + k; }
+    return sum;
+}
+int total = 0;
+for (int i = 1; i < n; i++) { total = total + triangle(i * step); }
+cout << total;
+"""
+
+
+class ListInput:
+    def __init__(self, values):
+        self.values = list(values)
+
+    def get_user_input(self, variable_name):
+        return self.values.pop(0)
+
+
+def compile_per_run(input_sets, options):
+    outputs = []
+    for inputs in input_sets:
+        compiler = Compiler(ListInput(inputs), **options)
+        compiler.evaluate(compiler.parse(compiler.tokenize(SOURCE)))
+        outputs.append("".join(compiler.output))
+    return outputs
+
+
+def compile_once(input_sets, options):
+    program = Compiler(**options).compile(SOURCE)
+    return [program.run(inputs=inputs).text() for inputs in input_sets]
+
+
+def compile_once_parallel(input_sets, options):
+    program = Compiler(**options).compile(SOURCE)
+    return [context.text() for context in program.run_many(input_sets)]
+
+
+def main():
+    input_sets = [(number % 20 + 5, number % 7 + 1) for number in range(INPUT_SETS)]
+    print(f"{INPUT_SETS} input sets\n")
+    print(f"{'engine':10} {'mode':20} {'seconds':>8} {'runs/s':>8}")
+    for engine, options in (("tree", dict(background_compile=False)), ("bytecode", dict(backend='bytecode'))):
+        expected = None
+        for mode, run in (("compile per run", compile_per_run), ("compile once", compile_once),
+                          ("compile once, pool", compile_once_parallel)):
+            start = time.perf_counter()
+            outputs = run(input_sets, options)
+            seconds = time.perf_counter() - start
+            print(f"{engine:10} {mode:20} {seconds:8.3f} {INPUT_SETS / seconds:8.0f}")
+            expected = expected or outputs
+            assert outputs == expected, f"{engine} {mode} printed different output"
+
+
+if __name__ == "__main__":
+    main()
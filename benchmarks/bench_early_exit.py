@@ -0,0 +1,81 @@
+"""Times search loops that `return` as soon as they find their answer.
+
+`first_square_over(limit)` looks for the first `i` with `i * i > limit`.
+The early-exit version returns from inside the loop; the full-scan version
+is how the search had to be written while a nested `return` did not stop
+execution: remember the first hit in a variable and let the loop run to the
+end. Targets near the start of the range gain the most. Every engine must
+print the same answers for both versions.
+
+Run from the repository root:
+
+    python benchmarks/bench_early_exit.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mini_compiler.compiler import Compiler
+
+SIZE = 20_000
+POSITIONS = (0.1, 0.5, 0.9)
+
+EARLY_EXIT = f"""
+func first_square_over(int limit) int {{
+    for (int i = 0; i < {SIZE}; i++) {{
+        if ((i * i) > limit) {{ return i; }}
+    }}
+    return 0 - 1;
+}}
+"""
+
+FULL_SCAN = f"""
+func first_square_over(int limit) int {{
+    int found = 0 - 1;
+    for (int i = 0; i < {SIZE}; i++) {{
+        if (((i * i) > limit) && (found < 0)) {{ found = i; }}
+    }}
+    return found;
+}}
+"""
+
+# Partial evaluation would run the searches at compile time
+ENGINES = {
+    "tree": dict(hot_threshold=None, partial_evaluation=False),
+    "closures": dict(hot_threshold=100, background_compile=False, partial_evaluation=False),
+    "bytecode": dict(backend='bytecode', partial_evaluation=False),
+}
+
+
+def program(function, position):
+    limit = int(SIZE * position) ** 2
+    return function + f"cout << first_square_over({limit});\n"
+
+
+def run(source, options):
+    compiler = Compiler(**options)
+    ast = compiler.parse(compiler.tokenize(source))
+    start = time.perf_counter()
+    compiler.evaluate(ast)
+    seconds = time.perf_counter() - start
+    return seconds, "".join(compiler.output)
+
+
+def main():
+    print(f"search range {SIZE}\n")
+    print(f"{'engine':10} {'target':>7} {'scan s':>8} {'early s':>8} {'speedup':>8}")
+    outputs = {position: set() for position in POSITIONS}
+    for engine, options in ENGINES.items():
+        for position in POSITIONS:
+            scan_seconds, scan_output = run(program(FULL_SCAN, position), options)
+            early_seconds, early_output = run(program(EARLY_EXIT, position), options)
+            outputs[position].update((scan_output, early_output))
+            print(f"{engine:10} {position:7.0%} {scan_seconds:8.3f} {early_seconds:8.3f} "
+                  f"{scan_seconds / early_seconds:7.1f}x")
+    assert all(len(seen) == 1 for seen in outputs.values()), "the engines or versions disagree"
+
+
+if __name__ == "__main__":
+    main()
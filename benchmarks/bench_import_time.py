@@ -0,0 +1,61 @@
+"""Checks what `from mini_compiler.compiler import Compiler` costs to import.
+
+Runners are started thousands of times an hour, so the import is held to a
+budget. Each run is a fresh `python -X importtime` process; the figure is the
+best over several runs of the cumulative time of the package's top-level
+imports. The heaviest modules of the best run are listed, and the optional
+subsystems (NumPy, the process pool, the editor's tkinter) must not be loaded
+at all; they are imported when a program first needs them.
+
+Run from the repository root:
+
+    python benchmarks/bench_import_time.py
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+RUNS = 10
+BUDGET_MS = 25.0
+NOT_AT_STARTUP = ("numpy", "tkinter", "customtkinter", "concurrent", "multiprocessing")
+
+
+def import_times():
+    """(self microseconds, cumulative microseconds, nesting depth, module) for each import the package made in one run."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "from mini_compiler.compiler import Compiler"],
+                            cwd=ROOT, check=True, capture_output=True, text=True).stderr
+    times = []
+    nested = []  # A module's own imports are listed before it
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        nested.append((int(own), int(cumulative), depth, name.strip()))
+        if depth == 0:
+            if name.strip().split(".")[0] == "mini_compiler":
+                times.extend(nested)  # Not the interpreter's own startup imports
+            nested = []
+    return times
+
+
+def package_time(times):
+    return sum(cumulative for _, cumulative, depth, _ in times if depth == 0)
+
+
+def main():
+    best = min((import_times() for _ in range(RUNS)), key=package_time)
+    total_ms = package_time(best) / 1000
+    print(f"from mini_compiler.compiler import Compiler: {total_ms:.1f} ms (budget {BUDGET_MS:.0f} ms)\n")
+    print(f"{'module':36} {'self ms':>8} {'total ms':>9}")
+    for own, cumulative, _, name in sorted(best, key=lambda entry: entry[0], reverse=True)[:10]:
+        print(f"{name:36} {own / 1000:8.2f} {cumulative / 1000:9.2f}")
+
+    loaded = {name.split(".")[0] for _, _, _, name in best}
+    assert not loaded & set(NOT_AT_STARTUP), f"imported at startup: {sorted(loaded & set(NOT_AT_STARTUP))}"
+    assert total_ms <= BUDGET_MS, f"import takes {total_ms:.1f} ms, over the {BUDGET_MS:.0f} ms budget"
+
+
+if __name__ == "__main__":
+    main()
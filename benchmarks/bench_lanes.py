@@ -0,0 +1,68 @@
+"""Times one numeric program over many input sets: run by run, and in lock-step NumPy lanes.
+
+The scalar way compiles once and calls `run(inputs=...)` per input set on
+the tree interpreter and on the bytecode VM. `run_lanes` runs every input
+set at once, one lane each; the program's `if` and `while` split the lanes
+by masks, so lanes that loop longer keep running while the others wait.
+Every way must print the same lines for every input set.
+
+Run from the repository root:
+
+    python benchmarks/bench_lanes.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mini_compiler.compiler import Compiler
+
+INPUT_SETS = 10000
+
+SOURCE = """
+int start = 0;
+float rate = 0.0;
+cin >> start;
+cin >> rate;
+int steps = 0;
+float balance = start;
+while ((balance < 1000) && (steps < 40)) {
+    balance = balance * (1 + rate);
+    if (balance > 500) { balance = balance + 10; } else { balance = balance + 1; }
+    steps++;
+}
+cout << steps;
+cout << (balance > 999);
+"""
+
+
+def scalar(program, input_sets):
+    return [program.run(inputs).output for inputs in input_sets]
+
+
+def lanes(program, input_sets):
+    return [context.output for context in program.run_lanes(input_sets, fallback=False)]
+
+
+def main():
+    generator = random.Random(50)
+    input_sets = [[generator.randint(1, 900), generator.uniform(0.01, 0.3)] for _ in range(INPUT_SETS)]
+    print(f"{INPUT_SETS} input sets\n")
+    print(f"{'engine':22} {'seconds':>8} {'runs/s':>9}")
+    expected = None
+    for engine, options, run in (("scalar tree", dict(background_compile=False), scalar),
+                                 ("scalar bytecode", dict(backend='bytecode'), scalar),
+                                 ("lanes", dict(), lanes)):
+        program = Compiler(**options).compile(SOURCE)
+        start = time.perf_counter()
+        outputs = run(program, input_sets)
+        seconds = time.perf_counter() - start
+        print(f"{engine:22} {seconds:8.3f} {INPUT_SETS / seconds:9.0f}")
+        expected = expected or outputs
+        assert outputs == expected, f"{engine} printed different output"
+
+
+if __name__ == "__main__":
+    main()
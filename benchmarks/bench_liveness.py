@@ -0,0 +1,79 @@
+"""Measures peak memory of a string-heavy program with and without liveness-based slot reuse.
+
+Each phase builds a large string, compares it once and never reads it
+again. Without liveness every string stays in its own frame slot until the
+program ends; with it the last read clears the slot and later phases reuse
+it. Top-level variables are only released when they do not have to be kept
+for the symbol table (`keep_variables=False`).
+
+Run from the repository root:
+
+    python benchmarks/bench_liveness.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mini_compiler.bytecode import BytecodeCompiler
+from mini_compiler.lexer import Lexer
+from mini_compiler.passes import PassManager
+from mini_compiler.peephole import optimize, fuse_superinstructions
+from mini_compiler.syntax_parser import Parser
+from mini_compiler.vm import VirtualMachine
+
+PHASES = 6
+PIECES = 5000
+PHASE = """
+string text{n} = "";
+for (int i = 0; i < {pieces}; i++) {{
+    text{n} = text{n} + "abcdefghijklmnopqrst";
+}}
+if (text{n} == "") {{
+    cout << "empty";
+}}
+"""
+
+
+def program():
+    return "".join(PHASE.format(n=n, pieces=PIECES) for n in range(PHASES)) + 'cout << "done";\n'
+
+
+def run(statements, liveness, keep_variables):
+    compiler = BytecodeCompiler(PassManager(), liveness=liveness, keep_variables=keep_variables)
+    main, functions = compiler.compile_program(statements)
+    for code in [main] + list(functions.values()):
+        code.instructions = fuse_superinstructions(optimize(code.instructions))
+        code.assemble()
+    vm = VirtualMachine(functions, [])
+    tracemalloc.start()
+    start = time.perf_counter()
+    vm.run(main)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, seconds, len(main.local_names), vm.output
+
+
+def main():
+    statements = Parser(Lexer().tokenize(program())).parse()
+
+    print(f"{PHASES} phases, {PIECES * 20} characters per string\n")
+    print(f"{'variant':28} {'peak KiB':>10} {'slots':>6} {'seconds':>9}")
+    variants = [
+        ("no liveness", False, True),
+        ("liveness, keep variables", True, True),
+        ("liveness, release variables", True, False),
+    ]
+    outputs = set()
+    for name, liveness, keep_variables in variants:
+        peak, seconds, slots, output = run(statements, liveness, keep_variables)
+        outputs.add("".join(output))
+        print(f"{name:28} {peak / 1024:10.0f} {slots:6} {seconds:9.3f}")
+    assert len(outputs) == 1, "liveness changed the output"
+
+
+if __name__ == "__main__":
+    main()
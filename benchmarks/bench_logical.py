@@ -0,0 +1,84 @@
+"""Compares a compound `&&`/`||` condition with the nested `if`s it replaces.
+
+Both programs count the same values. With short-circuiting the compound
+condition does no more comparisons than the nested version, and every
+engine turns it into branches: the closure compiler fuses each comparison
+into the closure that tests it and the bytecode backend emits one
+compare-and-jump per comparison.
+
+Run from the repository root:
+
+    python benchmarks/bench_logical.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mini_compiler.compiler import Compiler
+
+LIMIT = 200_000
+
+PROGRAMS = {
+    "nested ifs": """
+int hits = 0;
+for (int i = 0; i < %d; i++) {
+    if (i > 1000) {
+        if (i < 150000) {
+            hits = hits + 1;
+        } else {
+            if (i == 199999) {
+                hits = hits + 1;
+            }
+        }
+    } else {
+        if (i == 199999) {
+            hits = hits + 1;
+        }
+    }
+}
+cout << hits;
+""" % LIMIT,
+    "&& and ||": """
+int hits = 0;
+for (int i = 0; i < %d; i++) {
+    if ((i > 1000) && (i < 150000) || (i == 199999)) {
+        hits = hits + 1;
+    }
+}
+cout << hits;
+""" % LIMIT,
+}
+
+ENGINES = {
+    "tree": dict(hot_threshold=None),
+    "closures": dict(hot_threshold=100, background_compile=False),
+    "trace": dict(hot_threshold=100, loop_jit='trace'),
+    "bytecode": dict(backend='bytecode'),
+}
+
+
+def run(source, options):
+    compiler = Compiler(**options)
+    ast = compiler.parse(compiler.tokenize(source))
+    start = time.perf_counter()
+    compiler.evaluate(ast)
+    seconds = time.perf_counter() - start
+    return seconds, "".join(compiler.output)
+
+
+def main():
+    print(f"{LIMIT} iterations\n")
+    print(f"{'program':12} {'engine':10} {'seconds':>9}  output")
+    outputs = set()
+    for program, source in PROGRAMS.items():
+        for engine, options in ENGINES.items():
+            seconds, output = run(source, options)
+            outputs.add(output)
+            print(f"{program:12} {engine:10} {seconds:9.3f}  {output.strip()}")
+    assert len(outputs) == 1, "the programs or engines disagree"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Runs a CPU-bound `parallel for` with one worker and with a process pool.
+
+Each outer iteration runs a 200-step inner loop, so iterations are
+independent and expensive. The results are combined with a `sum` and a
+`max` reduction; a few iterations print, and the output must match the
+single-worker run line for line. Speedup depends on the number of CPUs.
+
+Run from the repository root:
+
+    python benchmarks/bench_parallel.py [workers]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mini_compiler.compiler import Compiler
+
+LIMIT = 10000
+
+PROGRAM = """
+int total = 0;
+int largest = 0;
+parallel for (int i = 0; i < %d; i++) sum(total) max(largest) {
+    int acc = 0;
+    for (int j = 0; j < 200; j++) {
+        acc = acc + (j * i);
+        if (acc > 1000000) {
+            acc = acc - 999983;
+        }
+    }
+    total = total + acc;
+    if (acc > largest) {
+        largest = acc;
+    }
+    if (i > %d) {
+        cout << i;
+        cout << acc;
+    }
+}
+cout << total;
+cout << largest;
+""" % (LIMIT, LIMIT - 4)
+
+
+def run(workers):
+    compiler = Compiler(hot_threshold=100, background_compile=False, parallel_workers=workers)
+    ast = compiler.parse(compiler.tokenize(PROGRAM))
+    start = time.perf_counter()
+    compiler.evaluate(ast)
+    seconds = time.perf_counter() - start
+    return seconds, "".join(compiler.output)
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    print(f"{LIMIT} iterations, {os.cpu_count()} CPUs\n")
+    base_seconds, base_output = run(1)
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8}")
+    print(f"{1:8} {base_seconds:9.3f} {1:7.1f}x")
+    if workers > 1:
+        seconds, output = run(workers)
+        assert output == base_output, "parallel run changed the output"
+        print(f"{workers:8} {seconds:9.3f} {base_seconds / seconds:7.1f}x")
+    print()
+    print(base_output, end="")
+
+
+if __name__ == "__main__":
+    main()
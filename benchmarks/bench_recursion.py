@@ -0,0 +1,111 @@
+"""Measures the cost of a call with a recursive `fib` and an identity-function loop.
+
+`fib(N)` makes about 2.6 * 1.6^N calls and does little else, so its time
+per call is dominated by calling. The call overhead is the difference per
+iteration between a loop that calls `id(i)` and the same loop adding `i`.
+
+On the bytecode backend a linked call switches to a pooled Frame inside the
+VM's dispatch loop; the "by name" rows turn the calls back into name-based
+`CALL`s, which look the function up and recurse into `VirtualMachine.execute`
+with a freshly built frame list. Every run must print the same result.
+
+Run from the repository root:
+
+    python benchmarks/bench_recursion.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mini_compiler.compiler import Compiler
+
+FIB = 20
+LOOP = 100_000
+REPEATS = 3
+
+FIB_SOURCE = f"""
+func fib(int n) int {{
+    int r = n;
+    if (n > 1) {{ r = fib(n - 1) + fib(n - 2); }}
+    return r;
+}}
+cout << fib({FIB});
+"""
+
+CALL_LOOP = f"""
+func id(int x) int {{ return x; }}
+int s = 0;
+for (int i = 0; i < {LOOP}; i++) {{ s = s + id(i); }}
+cout << s;
+"""
+
+INLINE_LOOP = f"""
+int s = 0;
+for (int i = 0; i < {LOOP}; i++) {{ s = s + i; }}
+cout << s;
+"""
+
+# Partial evaluation would fold the calls away at compile time
+ENGINES = {
+    "tree": dict(hot_threshold=None, partial_evaluation=False),
+    "closures": dict(hot_threshold=100, background_compile=False, partial_evaluation=False),
+    "bytecode": dict(backend='bytecode', partial_evaluation=False),
+    "bytecode by name": dict(backend='bytecode', partial_evaluation=False),
+}
+
+
+def fib_calls(n):
+    calls = [1, 1]
+    for _ in range(2, n + 1):
+        calls.append(calls[-1] + calls[-2] + 1)
+    return calls[n]
+
+
+def call_by_name(codes):
+    for code in codes:
+        for index, (op, arg) in enumerate(code.instructions):
+            if op == 'CALL_CODE':
+                code.instructions[index] = ('CALL', (arg[0].name, arg[1]))
+
+
+def run(engine, source):
+    """Best time of a few runs, and the program's output."""
+    options = ENGINES[engine]
+    best = None
+    for _ in range(REPEATS):
+        compiler = Compiler(**options)
+        ast = compiler.parse(compiler.tokenize(source))
+        if compiler.backend == 'bytecode':
+            main, functions = compiler.compile_bytecode(ast)
+            if engine.endswith("by name"):
+                call_by_name([main] + list(functions.values()))
+            start = time.perf_counter()
+            compiler.run_bytecode(main, functions)
+        else:
+            start = time.perf_counter()
+            compiler.evaluate(ast)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, "".join(compiler.output)
+
+
+def main():
+    calls = fib_calls(FIB)
+    print(f"fib({FIB}): {calls} calls; call loop: {LOOP} calls\n")
+    print(f"{'engine':17} {'fib ms':>8} {'ns/fib call':>12} {'call overhead ns':>17}")
+    outputs = {"fib": set(), "loop": set()}
+    for engine in ENGINES:
+        fib_seconds, fib_output = run(engine, FIB_SOURCE)
+        call_seconds, call_output = run(engine, CALL_LOOP)
+        inline_seconds, inline_output = run(engine, INLINE_LOOP)
+        outputs["fib"].add(fib_output)
+        outputs["loop"].update((call_output, inline_output))
+        overhead = (call_seconds - inline_seconds) / LOOP * 1e9
+        print(f"{engine:17} {fib_seconds * 1e3:8.1f} {fib_seconds / calls * 1e9:12.0f} {overhead:17.0f}")
+    assert all(len(seen) == 1 for seen in outputs.values()), "the engines disagree"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Builds 1M-character strings by repeated concatenation, with and without ropes.
+
+Every engine runs each program twice: once with plain `str` concatenation
+(the rope threshold set out of reach) and once with ropes, which are only
+flattened when the result is printed.
+
+Run from the repository root:
+
+    python benchmarks/bench_ropes.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mini_compiler import rope
+from mini_compiler.compiler import Compiler
+
+TARGET = 1_000_000
+
+PROGRAMS = {
+    "pieces": """
+string s = "";
+for (int i = 0; i < %d; i++) {
+    s = s + "0123456789";
+}
+cout << s;
+""" % (TARGET // 10),
+    "pairs": """
+string s = "";
+int i = 0;
+while (i < %d) {
+    s = s + "01234" + "56789";
+    i++;
+}
+cout << s;
+""" % (TARGET // 10),
+}
+
+ENGINES = {
+    "tree": dict(hot_threshold=None),
+    "closures": dict(hot_threshold=100, background_compile=False),
+    "trace": dict(hot_threshold=100, background_compile=False, loop_jit='trace'),
+    "bytecode": dict(backend='bytecode'),
+}
+
+
+def run(source, options):
+    compiler = Compiler(**options)
+    ast = compiler.parse(compiler.tokenize(source))
+    start = time.perf_counter()
+    compiler.evaluate(ast)
+    seconds = time.perf_counter() - start
+    return seconds, "".join(compiler.output)
+
+
+def main():
+    print(f"{'program':10} {'engine':10} {'str seconds':>12} {'rope seconds':>13} {'speedup':>8}")
+    for program, source in PROGRAMS.items():
+        for engine, options in ENGINES.items():
+            threshold = rope.ROPE_THRESHOLD
+            rope.ROPE_THRESHOLD = float("inf")
+            try:
+                plain_seconds, plain_output = run(source, options)
+            finally:
+                rope.ROPE_THRESHOLD = threshold
+            rope_seconds, rope_output = run(source, options)
+            assert rope_output == plain_output, f"{program}/{engine}: ropes changed the output"
+            assert len(rope_output) == TARGET + 1, f"{program}/{engine}: wrong output length"
+            print(f"{program:10} {engine:10} {plain_seconds:12.3f} {rope_seconds:13.3f} "
+                  f"{plain_seconds / rope_seconds:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Measures opcode-pair frequencies on the corpus and the effect of superinstructions.
+
+Run from the repository root:
+
+    python benchmarks/bench_superinstructions.py
+"""
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mini_compiler.bytecode import BytecodeCompiler
+from mini_compiler.lexer import Lexer
+from mini_compiler.peephole import (
+    optimize, fuse_superinstructions, measure_pair_frequencies, select_superinstructions
+)
+from mini_compiler.syntax_parser import Parser
+from mini_compiler.vm import VirtualMachine
+
+CORPUS = os.path.join(os.path.dirname(__file__), "corpus")
+
+
+def parse(path):
+    with open(path) as source:
+        return Parser(Lexer().tokenize(source.read())).parse()
+
+
+def run(statements, superinstructions, peephole=True):
+    main, functions = BytecodeCompiler().compile_program(statements)
+    for code in [main] + list(functions.values()):
+        if peephole:
+            code.instructions = optimize(code.instructions)
+        code.instructions = fuse_superinstructions(code.instructions, superinstructions)
+        code.assemble()
+    vm = VirtualMachine(functions, [])
+    start = time.perf_counter()
+    vm.run(main)
+    return vm.dispatch_count, time.perf_counter() - start, vm.output
+
+
+def main():
+    paths = sorted(glob.glob(os.path.join(CORPUS, "*.mc")))
+    programs = {os.path.basename(path): parse(path) for path in paths}
+    pair_counts = measure_pair_frequencies(programs.values())
+
+    total = sum(pair_counts.values())
+    print("Most frequent opcode pairs:")
+    for (first, second), count in pair_counts.most_common(10):
+        print(f"  {str(first):20} {second:20} {count / total:6.1%}")
+
+    selected = select_superinstructions(pair_counts)
+    print(f"\nSelected superinstructions: {selected}\n")
+
+    print(f"{'program':18} {'variant':12} {'dispatches':>12} {'seconds':>9}")
+    for name, statements in programs.items():
+        variants = [("baseline", [], False), ("peephole", [], True), ("fused", selected, True)]
+        outputs = set()
+        for variant, superinstructions, peephole in variants:
+            dispatches, seconds, output = run(statements, superinstructions, peephole)
+            outputs.add("".join(output))
+            print(f"{name:18} {variant:12} {dispatches:12} {seconds:9.3f}")
+        assert len(outputs) == 1, f"{name}: optimised bytecode changed the output"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Runs a 100-state machine written as a `switch` and as an `if`/`else` chain.
+
+Every state adds its number to an accumulator and moves to another state.
+The chain compares the state with each case in turn, so a step costs up to
+100 comparisons; the switch dispatches through one jump table lookup. Both
+programs must print the same result.
+
+Run from the repository root:
+
+    python benchmarks/bench_switch.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mini_compiler.compiler import Compiler
+
+STATES = 100
+STEPS = 20_000
+
+
+def successor(state):
+    return (state * 37 + 11) % STATES
+
+
+def transition(state):
+    return f"acc = acc + {state}; state = {successor(state)};"
+
+
+def switch_program():
+    cases = "\n".join(f"        case {state}: {transition(state)}" for state in range(STATES))
+    return f"""
+int state = 0;
+int acc = 0;
+for (int step = 0; step < {STEPS}; step++) {{
+    switch (state) {{
+{cases}
+    }}
+}}
+cout << acc;
+"""
+
+
+def chain_program():
+    chain = "state = 0;"
+    for state in reversed(range(STATES)):
+        chain = f"if (state == {state}) {{ {transition(state)} }} else {{ {chain} }}"
+    return f"""
+int state = 0;
+int acc = 0;
+for (int step = 0; step < {STEPS}; step++) {{
+    {chain}
+}}
+cout << acc;
+"""
+
+
+PROGRAMS = {
+    "if/else chain": chain_program(),
+    "switch": switch_program(),
+}
+
+ENGINES = {
+    "tree": dict(hot_threshold=None),
+    "closures": dict(hot_threshold=100, background_compile=False),
+    "bytecode": dict(backend='bytecode'),
+}
+
+
+def run(source, options):
+    compiler = Compiler(**options)
+    ast = compiler.parse(compiler.tokenize(source))
+    start = time.perf_counter()
+    compiler.evaluate(ast)
+    seconds = time.perf_counter() - start
+    return seconds, "".join(compiler.output)
+
+
+def main():
+    print(f"{STATES} states, {STEPS} steps\n")
+    print(f"{'engine':10} {'chain s':>9} {'switch s':>9} {'speedup':>8}")
+    outputs = set()
+    for engine, options in ENGINES.items():
+        chain_seconds, chain_output = run(PROGRAMS["if/else chain"], options)
+        switch_seconds, switch_output = run(PROGRAMS["switch"], options)
+        outputs.update((chain_output, switch_output))
+        print(f"{engine:10} {chain_seconds:9.3f} {switch_seconds:9.3f} {chain_seconds / switch_seconds:7.1f}x")
+    assert len(outputs) == 1, "the engines or programs disagree"
+    print()
+    print(outputs.pop(), end="")
+
+
+if __name__ == "__main__":
+    main()
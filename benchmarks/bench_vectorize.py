@@ -0,0 +1,89 @@
+"""Runs element-wise array loops with and without automatic vectorisation.
+
+The vectoriser turns `for (int i = 0; i < n; i++) { a[i] = b[i] * k + c[i]; }`
+into whole-array NumPy operations; an `if` in the body becomes a mask. The
+last program has a loop-carried dependence and must stay scalar. The
+vectoriser's report is printed at the end.
+
+Run from the repository root:
+
+    python benchmarks/bench_vectorize.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mini_compiler.compiler import Compiler
+
+SIZE = 200_000
+
+SETUP = """
+int n = %d;
+int k = 3;
+int[%d] a;
+int[%d] b;
+int[%d] c;
+for (int i = 0; i < n; i++) {
+    b[i] = i;
+    c[i] = 7;
+}
+""" % (SIZE, SIZE, SIZE, SIZE)
+
+PROGRAMS = {
+    "multiply-add": SETUP + """
+for (int i = 0; i < n; i++) {
+    a[i] = b[i] * k + c[i];
+}
+cout << a[n - 1];
+""",
+    "masked": SETUP + """
+for (int i = 0; i < n; i++) {
+    if (b[i] > 1000) {
+        a[i] = b[i] - c[i];
+    } else {
+        a[i] = 0;
+    }
+}
+cout << a[n - 1];
+""",
+    "prefix (scalar)": SETUP + """
+for (int i = 1; i < n; i++) {
+    a[i] = a[i - 1] + b[i];
+}
+cout << a[n - 1];
+""",
+}
+
+ENGINES = {
+    "tree": dict(hot_threshold=None),
+    "closures": dict(hot_threshold=100, background_compile=False),
+}
+
+
+def run(source, options):
+    compiler = Compiler(**options)
+    ast = compiler.parse(compiler.tokenize(source))
+    start = time.perf_counter()
+    compiler.evaluate(ast)
+    seconds = time.perf_counter() - start
+    return seconds, "".join(compiler.output), compiler.vectorization_report()
+
+
+def main():
+    print(f"{SIZE} elements; times include the setup loop\n")
+    print(f"{'program':16} {'engine':10} {'scalar s':>9} {'vector s':>9} {'speedup':>8}")
+    for program, source in PROGRAMS.items():
+        for engine, options in ENGINES.items():
+            scalar_seconds, scalar_output, _ = run(source, dict(options, vectorize=False))
+            vector_seconds, vector_output, report = run(source, options)
+            assert vector_output == scalar_output, f"{program}/{engine}: vectorising changed the output"
+            print(f"{program:16} {engine:10} {scalar_seconds:9.3f} {vector_seconds:9.3f} "
+                  f"{scalar_seconds / vector_seconds:7.1f}x")
+        for line in report:
+            print(f"    {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,40 @@
-from .compiler import Compiler
-from .lexer import Lexer
-from .syntax_parser import Parser
-from .evaluator import Evaluator
-from .ast_nodes import (
-    ASTNode, BlockNode, NumberNode, StringNode, IdentifierNode,
-    BinaryOperationNode, AssignmentNode, IfNode, ForNode, WhileNode,
-    IncrementNode, DecrementNode, CinNode, PrintNode, FunctionDefinitionNode,
-    FunctionCallNode, ReturnNode, NoOpNode
-)
\ No newline at end of file
+import importlib
+
+# Public names and the modules that define them. They are imported on first
+# access, so `import mini_compiler` (and `python -m mini_compiler`) stays cheap
+# and a program only pays for the parts it uses.
+_EXPORTS = {
+    'Compiler': '.compiler',
+    'Lexer': '.lexer',
+    'Parser': '.syntax_parser',
+    'Evaluator': '.evaluator',
+    'BuiltinRegistry': '.builtins',
+    'NativeFunction': '.builtins',
+    'default_builtins': '.builtins',
+    'CompiledProgram': '.program',
+    'ExecutionContext': '.program',
+    'ExecutionError': '.errors',
+    'LineIndex': '.source',
+}
+_EXPORTS.update(dict.fromkeys((
+    'ASTNode', 'BlockNode', 'NumberNode', 'StringNode', 'IdentifierNode',
+    'BinaryOperationNode', 'AssignmentNode', 'IfNode', 'ForNode', 'WhileNode',
+    'IncrementNode', 'DecrementNode', 'CinNode', 'PrintNode', 'FunctionDefinitionNode',
+    'FunctionCallNode', 'ReturnNode', 'NoOpNode', 'ArrayDeclarationNode', 'IndexNode', 'IndexAssignmentNode',
+    'VectorizedLoopNode', 'ParallelForNode', 'LogicalOperationNode', 'NotNode', 'SwitchNode',
+), '.ast_nodes'))
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value  # Later lookups skip this function
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,131 @@
+# NumPy is imported by `load_numpy` when the first array is made; programs without
+# arrays never load it (nor need it installed)
+numpy = None
+
+
+class ndarray:
+    """Stand-in until NumPy is loaded: no value has it, so `type(x) is ndarray` checks stay cheap and false."""
+
+
+_numpy_hooks = []
+
+
+def on_numpy_loaded(hook):
+    """Calls `hook(numpy)` once NumPy has been loaded, or at once if it already is.
+
+    Modules that test `type(x) is ndarray` on hot paths keep `ndarray` as a
+    global of their own and rebind it to the real class from a hook.
+    """
+    if numpy is not None:
+        hook(numpy)
+    else:
+        _numpy_hooks.append(hook)
+
+
+def load_numpy():
+    """Imports NumPy on first use and returns it."""
+    global numpy, ndarray
+    if numpy is None:
+        try:
+            import numpy as module
+        except ImportError:
+            raise ImportError("Arrays need NumPy, which is not installed") from None
+        numpy, ndarray = module, module.ndarray
+        for hook in _numpy_hooks:
+            hook(module)
+    return numpy
+
+# Element type keyword -> NumPy dtype of the buffer
+ARRAY_DTYPES = {
+    'int': 'int64',
+    'float': 'float64',
+}
+
+
+# Operators that assignment to an array runs as one ufunc writing into the array
+ARRAY_UFUNCS = {
+    '+': 'add',
+    '-': 'subtract',
+    '*': 'multiply',
+    '/': 'true_divide',
+}
+
+
+def new_array(element_type, size):
+    """Allocates a zero-filled `int[n]` or `float[n]` buffer."""
+    load_numpy()
+    if element_type not in ARRAY_DTYPES:
+        raise ValueError(f"Arrays of type '{element_type}' are not supported")
+    if type(size) is not int or size < 0:
+        raise ValueError(f"Array size must be a non-negative integer, got {size}")
+    return numpy.zeros(size, dtype=ARRAY_DTYPES[element_type])
+
+
+def is_array(value):
+    return numpy is not None and type(value) is ndarray
+
+
+def store_array(target, value):
+    """Assigns to a whole array: copies another array element-wise or fills it with a scalar.
+
+    Arrays have a fixed size and element type, so the existing buffer is
+    written in place. Floats stored into an `int` array are truncated, as in C.
+    """
+    if type(value) is ndarray:
+        if value.shape != target.shape:
+            raise ValueError(f"Cannot assign an array of size {value.size} to one of size {target.size}")
+    elif type(value) not in (int, float, bool):
+        raise TypeError(f"Cannot assign {type(value).__name__} to an array")
+    numpy.copyto(target, value, casting='unsafe')
+
+
+def load_element(array, index):
+    """`a[i]` as a plain Python int or float, so scalar code never sees NumPy scalars."""
+    if type(array) is not ndarray:
+        raise TypeError(f"Cannot index a value of type {type(array).__name__}")
+    if type(index) is not int:
+        raise TypeError(f"Array index must be an int, got {type(index).__name__}")
+    if not 0 <= index < array.shape[0]:
+        raise IndexError(f"Array index {index} out of range for size {array.shape[0]}")
+    return array.item(index)
+
+
+def store_element(array, index, value):
+    if type(array) is not ndarray:
+        raise TypeError(f"Cannot index a value of type {type(array).__name__}")
+    if type(index) is not int:
+        raise TypeError(f"Array index must be an int, got {type(index).__name__}")
+    if not 0 <= index < array.shape[0]:
+        raise IndexError(f"Array index {index} out of range for size {array.shape[0]}")
+    array[index] = value
+
+
+def divide(left, right):
+    """`/` for arrays: one vectorised division, refusing any zero divisor like the scalar path."""
+    if type(right) is ndarray:
+        if not right.all():
+            raise ZeroDivisionError("Division by zero")
+    elif right == 0:
+        raise ZeroDivisionError("Division by zero")
+    return numpy.true_divide(left, right)
+
+
+def store_result(target, operator, left, right):
+    """Runs `target = left <operator> right` as a single ufunc call with `out=target`.
+
+    The result goes straight into the target's buffer, so `a = b + c;`
+    allocates no temporary array. Inputs may alias the target.
+    """
+    for operand in (left, right):
+        if type(operand) is ndarray:
+            if operand.shape != target.shape:
+                raise ValueError(f"Cannot assign an array of size {operand.size} to one of size {target.size}")
+        elif type(operand) not in (int, float, bool):
+            raise TypeError(f"Unsupported operand for array {operator}: {type(operand).__name__}")
+    if operator == '/':
+        if type(right) is ndarray:
+            if not right.all():
+                raise ZeroDivisionError("Division by zero")
+        elif right == 0:
+            raise ZeroDivisionError("Division by zero")
+    getattr(numpy, ARRAY_UFUNCS[operator])(left, right, out=target, casting='unsafe')
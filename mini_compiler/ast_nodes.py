@@ -1,6 +1,11 @@
 class ASTNode:
-    """Base class for all AST nodes."""
-    pass
+    """Base class for all AST nodes.
+
+    `span` is the (start, end) offsets of the source the parser built the
+    node from; a LineIndex turns them into lines and columns. Nodes made by
+    the optimisers have no source and keep the None default.
+    """
+    span = None
 
 
 class BlockNode(ASTNode):
@@ -41,11 +46,35 @@ class BinaryOperationNode(ASTNode):
         self.left = left
         self.operator = operator
         self.right = right
+        # Inline cache, filled in by the evaluator after the first evaluation
+        self.handler = None
+        self.left_type = None
+        self.right_type = None
+        self.deopt_count = 0
 
     def __repr__(self):
         return f"BinaryOperationNode({self.left} {self.operator} {self.right})"
 
 
+class LogicalOperationNode(ASTNode):
+    """`left && right` or `left || right`; the right side is only evaluated when it decides the result."""
+    def __init__(self, left, operator, right):
+        self.left = left
+        self.operator = operator
+        self.right = right
+
+    def __repr__(self):
+        return f"LogicalOperationNode({self.left} {self.operator} {self.right})"
+
+
+class NotNode(ASTNode):
+    def __init__(self, operand):
+        self.operand = operand
+
+    def __repr__(self):
+        return f"NotNode({self.operand})"
+
+
 class AssignmentNode(ASTNode):
     def __init__(self, identifier, value):
         self.identifier = identifier
@@ -55,6 +84,38 @@ class AssignmentNode(ASTNode):
         return f"AssignmentNode(identifier={self.identifier}, value={self.value})"
 
 
+class ArrayDeclarationNode(ASTNode):
+    """`int[size] name;` or `float[size] name = value;`"""
+    def __init__(self, identifier, element_type, size, value=None):
+        self.identifier = identifier
+        self.element_type = element_type
+        self.size = size  # Expression, evaluated once when the declaration runs
+        self.value = value
+
+    def __repr__(self):
+        return (f"ArrayDeclarationNode(identifier={self.identifier}, element_type={self.element_type}, "
+                f"size={self.size}, value={self.value})")
+
+
+class IndexNode(ASTNode):
+    def __init__(self, identifier, index):
+        self.identifier = identifier
+        self.index = index
+
+    def __repr__(self):
+        return f"IndexNode(identifier={self.identifier}, index={self.index})"
+
+
+class IndexAssignmentNode(ASTNode):
+    def __init__(self, identifier, index, value):
+        self.identifier = identifier
+        self.index = index
+        self.value = value
+
+    def __repr__(self):
+        return f"IndexAssignmentNode(identifier={self.identifier}, index={self.index}, value={self.value})"
+
+
 class IfNode(ASTNode):
     def __init__(self, condition, then_branch, else_branch=None):
         self.condition = condition
@@ -65,6 +126,24 @@ class IfNode(ASTNode):
         return f"IfNode(condition={self.condition}, then={self.then_branch}, else={self.else_branch})"
 
 
+class SwitchNode(ASTNode):
+    """`switch (expression) { case N: ... default: ... }` on an int value.
+
+    `cases` is a list of (values, BlockNode) pairs in source order; labels
+    stacked directly on top of each other share one body. A case ends where
+    the next label starts, so control never falls through into another body.
+    `targets` maps each case value to its index in `cases`.
+    """
+    def __init__(self, expression, cases, default=None):
+        self.expression = expression
+        self.cases = cases
+        self.default = default  # BlockNode, or None when no case matching means doing nothing
+        self.targets = {value: index for index, (values, _) in enumerate(cases) for value in values}
+
+    def __repr__(self):
+        return f"SwitchNode(expression={self.expression}, cases={self.cases}, default={self.default})"
+
+
 class ForNode(ASTNode):
     def __init__(self, initialization, condition, increment, body):
         self.initialization = initialization
@@ -76,6 +155,35 @@ class ForNode(ASTNode):
         return f"ForNode(init={self.initialization}, condition={self.condition}, increment={self.increment}, body={self.body})"
 
 
+class VectorizedLoopNode(ASTNode):
+    """A `for` loop over arrays that runs as whole-array operations; see vectorizer.py.
+
+    `loop` is the original ForNode, which still runs whenever a run-time
+    guard (array sizes, operand types) does not hold.
+    """
+    def __init__(self, loop, variable, bound, inclusive, accesses, scalars):
+        self.loop = loop
+        self.variable = variable    # Loop counter name
+        self.bound = bound          # Loop-invariant expression the counter is compared with
+        self.inclusive = inclusive  # True for `i <= bound`
+        self.accesses = accesses    # (array name, index offset) for every array the body touches
+        self.scalars = scalars      # Loop-invariant variables the body reads
+        self.span = loop.span
+
+    def __repr__(self):
+        return f"VectorizedLoopNode(loop={self.loop})"
+
+
+class ParallelForNode(ASTNode):
+    """`parallel for (...) sum(total) { ... }`: a counted ForNode whose iterations run on worker processes."""
+    def __init__(self, loop, reductions):
+        self.loop = loop
+        self.reductions = reductions  # (operation, variable name) pairs; operation is 'sum', 'min' or 'max'
+
+    def __repr__(self):
+        return f"ParallelForNode(loop={self.loop}, reductions={self.reductions})"
+
+
 class WhileNode(ASTNode):
     def __init__(self, condition, body):
         self.condition = condition
@@ -123,6 +231,7 @@ class FunctionDefinitionNode(ASTNode):
     def __init__(self, name, parameters, body, return_type):
         self.name = name
         self.parameters = parameters
+        self.parameter_names = tuple(param['name'] for param in parameters)
         self.body = body
         self.return_type = return_type
 
@@ -134,6 +243,7 @@ class FunctionCallNode(ASTNode):
     def __init__(self, name, arguments):
         self.name = name
         self.arguments = arguments
+        self.callee = None  # FunctionDefinitionNode or NativeFunction, filled in by the linker
 
     def __repr__(self):
         return f"FunctionCallNode(name={self.name}, arguments={self.arguments})"
@@ -151,3 +261,29 @@ class NoOpNode(ASTNode):
     """Represents an empty operation (No-Op)."""
     def __repr__(self):
         return "NoOpNode()"
+
+
+def walk(node):
+    """Yields an AST node and every node below it.
+
+    A linked call's `callee` points into another part of the program rather
+    than below the call, so it is not followed.
+    """
+    yield node
+    for child in child_nodes(node):
+        yield from walk(child)
+
+
+def child_nodes(node):
+    """Yields the nodes directly below an AST node (not a linked call's `callee`)."""
+    for name, value in vars(node).items():
+        if name != 'callee':
+            yield from _nodes_in(value)
+
+
+def _nodes_in(value):
+    if isinstance(value, ASTNode):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _nodes_in(item)
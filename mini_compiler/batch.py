@@ -0,0 +1,216 @@
+import itertools
+import os
+import time
+
+from .errors import ExecutionError
+
+# Chunks waiting for or running on each worker; enough to keep it busy, few enough to
+# read a long stream of sources lazily
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+
+class ProgramResult:
+    """What one program of a batch did.
+
+    `index` is the program's position among the submitted sources. `status`
+    is 'ok', 'compile_error' (it did not tokenize, parse or link),
+    'runtime_error', 'timeout' or 'memory_limit'. `output` is what the
+    program printed, without error reports; `errors` has an ExecutionError
+    for each error, with its node dropped, since a node would carry its
+    whole program back across the process boundary. `timings` maps
+    'tokenize', 'parse' and 'run' to seconds; phases the program did not
+    finish are missing.
+    """
+
+    def __init__(self, index, status, output, errors, timings):
+        self.index = index
+        self.status = status
+        self.output = output
+        self.errors = errors
+        self.timings = timings
+
+    def __repr__(self):
+        return f"ProgramResult(index={self.index}, status={self.status}, errors={self.errors}, timings={self.timings})"
+
+
+class ProgramTimeout(BaseException):
+    """Raised in a worker when a program's time is up.
+
+    Not an Exception, so the Compiler does not report it as an error of the
+    program and it reaches `run_program`.
+    """
+
+
+def run_many(sources, options, workers=None, chunksize=16, timeout=None, memory_limit=None, ordered=True):
+    """Yields a ProgramResult for each source, run by a `Compiler(**options)` in a worker process.
+
+    Sources are taken from the iterable as the pool needs them and are sent
+    `chunksize` at a time, so a generator over any number of files can be
+    passed. `timeout` is the seconds one program may take, compiling
+    included; it is enforced with SIGALRM, so on POSIX systems only.
+    `memory_limit` is the bytes of data memory a worker process may use
+    (RLIMIT_DATA, which Linux enforces), the interpreter's own included. A
+    program that goes over either gets a 'timeout' or 'memory_limit' result
+    and its worker goes on with the next program.
+
+    Results come in submission order, or with `ordered=False` as soon as
+    their chunk is done.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    workers = workers or os.cpu_count() or 1
+    chunks = numbered_chunks(sources, chunksize)
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_start_worker,
+                                   initargs=(options, timeout, memory_limit))
+    try:
+        pending = {}   # Future -> chunk number
+        finished = {}  # Chunk number -> results that wait for an earlier chunk
+        submitted = 0
+        next_chunk = 0
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                else:
+                    pending[executor.submit(_run_chunk, chunk)] = submitted
+                    submitted += 1
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                number = pending.pop(future)
+                if ordered:
+                    finished[number] = future.result()
+                else:
+                    yield from future.result()
+            while next_chunk in finished:
+                yield from finished.pop(next_chunk)
+                next_chunk += 1
+    finally:
+        # Also reached when the caller stops iterating early
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def run_input_sets(program, input_sets, workers=None, chunksize=16):
+    """Runs a CompiledProgram once per input set; returns (output, symbol_table, errors) for each, in order.
+
+    The program is pickled into each worker once, by the pool's initializer;
+    tasks only carry input sets.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_start_program_worker,
+                             initargs=(program,)) as executor:
+        chunks = executor.map(_run_input_chunk, numbered_chunks(input_sets, chunksize))
+        return [result for chunk in chunks for result in chunk]
+
+
+def numbered_chunks(sources, size):
+    """Lists of up to `size` (index, source) pairs, read from `sources` one list at a time."""
+    numbered = enumerate(sources)
+    while True:
+        chunk = list(itertools.islice(numbered, max(size, 1)))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_program(index, source, options, timeout=None):
+    """Compiles and runs one program with a fresh Compiler; returns its ProgramResult."""
+    from .compiler import Compiler
+
+    compiler = Compiler(**options)
+    compiler.error_output = []  # Reports are in `errors`, not mixed into the output
+    timings = {}
+    try:
+        if timeout is not None:
+            _set_timer(timeout)
+        try:
+            status, errors = _compile_and_run(compiler, source, timings)
+        finally:
+            if timeout is not None:
+                _set_timer(0)  # Time running out before this line still ends up below
+    except ProgramTimeout:
+        status, errors = 'timeout', [ExecutionError(f"Time limit of {timeout} s exceeded")]
+    return ProgramResult(index, status, "".join(compiler.output), errors, timings)
+
+
+def _run_error_message(error):
+    # MemoryError carries no text of its own
+    if isinstance(error.cause, MemoryError):
+        return "Memory limit exceeded"
+    return error.message
+
+
+def _compile_and_run(compiler, source, timings):
+    try:
+        start = time.perf_counter()
+        tokens = compiler.tokenize(source)
+        timings['tokenize'] = time.perf_counter() - start
+        start = time.perf_counter()
+        ast = compiler.parse(tokens)
+        timings['parse'] = time.perf_counter() - start
+    except ValueError as error:
+        return 'compile_error', [ExecutionError(str(error).rstrip())]
+    except MemoryError:
+        return 'memory_limit', [ExecutionError("Memory limit exceeded")]
+
+    start = time.perf_counter()
+    compiler.evaluate(ast)
+    timings['run'] = time.perf_counter() - start
+    errors = [ExecutionError(_run_error_message(error), None, error.call_stack, None, error.position)
+              for error in compiler.errors]
+    if any(isinstance(error.cause, MemoryError) for error in compiler.errors):
+        return 'memory_limit', errors
+    return ('runtime_error' if errors else 'ok'), errors
+
+
+def _set_timer(seconds):
+    """Raises ProgramTimeout in this thread after `seconds` of wall time; 0 cancels. Main thread only."""
+    import signal
+    if seconds:
+        signal.signal(signal.SIGALRM, _time_up)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+
+
+def _time_up(signum, frame):
+    raise ProgramTimeout()
+
+
+# Settings of a worker process: (Compiler options, timeout)
+_worker = None
+
+
+def _start_worker(options, timeout, memory_limit):
+    global _worker
+    if memory_limit is not None:
+        import resource
+        resource.setrlimit(resource.RLIMIT_DATA, (memory_limit, resource.getrlimit(resource.RLIMIT_DATA)[1]))
+    _worker = (options, timeout)
+
+
+def _run_chunk(chunk):
+    options, timeout = _worker
+    return [run_program(index, source, options, timeout) for index, source in chunk]
+
+
+# The CompiledProgram a worker of run_input_sets runs
+_program = None
+
+
+def _start_program_worker(program):
+    global _program
+    _program = program
+
+
+def _run_input_chunk(chunk):
+    results = []
+    for _, inputs in chunk:
+        context = _program.run(inputs)
+        errors = [ExecutionError(error.message, None, error.call_stack, None, error.position)
+                  for error in context.errors]
+        results.append(("".join(context.output), context.symbol_table, errors))
+    return results
@@ -0,0 +1,138 @@
+import math
+
+from .arrays import is_array, on_numpy_loaded
+from .lexer import Lexer
+from .rope import Rope
+
+NUMBER = (int, float)
+TEXT = (str, Rope)
+
+# How argument types are named in error messages
+TYPE_NAMES = {int: 'int', float: 'float', bool: 'bool', str: 'string', Rope: 'string'}
+on_numpy_loaded(lambda numpy: TYPE_NAMES.update({numpy.ndarray: 'array'}))
+
+
+class NativeFunction:
+    """A Python callable that mini programs call like a function of their own.
+
+    `parameter_types` has one entry per parameter: a tuple of the Python
+    types it accepts, or None for any value. Ropes are flattened to `str`
+    before the call, so the callable only ever sees plain strings. A call
+    passes the checked arguments straight to `function`; no scope is made.
+    `pure` functions have no side effects and may be run at compile time on
+    literal arguments.
+    """
+
+    def __init__(self, name, function, parameter_types, pure=False):
+        self.name = name
+        self.function = function
+        self.parameter_types = tuple(parameter_types)
+        self.arity = len(self.parameter_types)
+        self.pure = pure
+
+    def call(self, arguments):
+        if len(arguments) != self.arity:
+            raise ValueError(
+                f"Incorrect number of arguments for function {self.name}. Expected {self.arity}, got {len(arguments)}"
+            )
+        checked = []
+        for position, (value, accepted) in enumerate(zip(arguments, self.parameter_types), 1):
+            if type(value) is Rope:
+                value = str(value)
+            if accepted is not None and type(value) not in accepted:
+                expected = " or ".join(dict.fromkeys(type_name(t) for t in accepted))
+                raise TypeError(f"{self.name}() argument {position} must be {expected}, not {type_name(type(value))}")
+            checked.append(value)
+        return self.function(*checked)
+
+    def __repr__(self):
+        return f"NativeFunction(name={self.name}, arity={self.arity}, pure={self.pure})"
+
+
+def type_name(value_type):
+    return TYPE_NAMES.get(value_type, value_type.__name__)
+
+
+class BuiltinRegistry:
+    """Native functions by name. Calls check it before looking for a function defined in the program."""
+
+    def __init__(self):
+        self.functions = {}
+
+    def register(self, name, function, parameter_types, pure=False):
+        """Makes `function` callable as `name(...)`; returns the NativeFunction.
+
+        `parameter_types` lists, per parameter, a type or tuple of types the
+        argument must have, or None to accept anything. Registering a name
+        again replaces the earlier function.
+        """
+        if not name.isidentifier() or name in Lexer.TOKENS:
+            raise ValueError(f"Invalid builtin function name: '{name}'")
+        if not callable(function):
+            raise TypeError(f"Builtin '{name}' must be callable")
+        parameter_types = [(accepted,) if isinstance(accepted, type) else accepted for accepted in parameter_types]
+        native = NativeFunction(name, function, parameter_types, pure)
+        self.functions[name] = native
+        return native
+
+    def unregister(self, name):
+        del self.functions[name]
+
+    def get(self, name):
+        return self.functions.get(name)
+
+    def names(self):
+        return sorted(self.functions)
+
+    def copy(self):
+        registry = BuiltinRegistry()
+        registry.functions = dict(self.functions)
+        return registry
+
+    def __contains__(self, name):
+        return name in self.functions
+
+    def __repr__(self):
+        return f"BuiltinRegistry({self.names()})"
+
+
+def _power(base, exponent):
+    if type(base) is int and type(exponent) is int and exponent >= 0:
+        return base ** exponent  # Exact for ints
+    return math.pow(base, exponent)
+
+
+def _length(value):
+    """`len` of a string or an array; checked here because NumPy may not be loaded when the registry is made."""
+    if type(value) is not str and not is_array(value):
+        raise TypeError(f"len() argument 1 must be string or array, not {type_name(type(value))}")
+    return len(value)
+
+
+def _substring(text, start, length):
+    """`length` characters of `text` from index `start`, like C++ `substr`; fewer at the end of the text."""
+    if start < 0 or start > len(text):
+        raise ValueError(f"substr start {start} out of range for length {len(text)}")
+    if length < 0:
+        raise ValueError(f"substr length must not be negative, got {length}")
+    return text[start:start + length]
+
+
+# name, callable, parameter types
+DEFAULT_BUILTINS = [
+    ('abs', abs, [NUMBER]),
+    ('min', min, [NUMBER, NUMBER]),
+    ('max', max, [NUMBER, NUMBER]),
+    ('pow', _power, [NUMBER, NUMBER]),
+    ('sqrt', math.sqrt, [NUMBER]),
+    ('len', _length, [None]),
+    ('substr', _substring, [TEXT, int, int]),
+]
+
+
+def default_builtins():
+    """A registry holding the standard library; every function in it is pure."""
+    registry = BuiltinRegistry()
+    for name, function, parameter_types in DEFAULT_BUILTINS:
+        registry.register(name, function, parameter_types, pure=True)
+    return registry
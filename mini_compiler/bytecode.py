@@ -0,0 +1,437 @@
+import operator
+
+from .evaluator import _generic_add
+from .ir import Const, DefUseChains, InterferenceGraph, Liveness, is_temp, is_variable
+from .lowering import lower_program
+from .switch import jump_table
+
+
+def _add(left, right):
+    if type(left) is type(right) and type(left) in (int, float):
+        return left + right
+    return _generic_add(left, right)
+
+
+def _divide(left, right):
+    if right == 0:
+        raise ZeroDivisionError("Division by zero")
+    return left / right
+
+
+BINARY_FUNCTIONS = {
+    '+': _add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': _divide,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+}
+
+COMPARISON_OPERATORS = ('==', '!=', '>', '<', '>=', '<=')
+
+# Instructions whose argument is (or ends with) a jump target
+JUMP_OPCODES = ('JUMP', 'POP_JUMP_IF_FALSE', 'COMPARE_JUMP', 'COMPARE_CONST_JUMP')
+
+# Switch dispatch: SWITCH_TABLE is (low, targets indexed by value - low, default), SWITCH_MAP is (targets by value, default)
+SWITCH_OPCODES = ('SWITCH_TABLE', 'SWITCH_MAP')
+
+
+def jump_target(instruction):
+    """Returns the label or address an instruction jumps to, or None."""
+    op, arg = instruction
+    if op in ('JUMP', 'POP_JUMP_IF_FALSE'):
+        return arg
+    if op in ('COMPARE_JUMP', 'COMPARE_CONST_JUMP'):
+        return arg[-1]
+    return None
+
+
+def retarget(instruction, target):
+    """Returns a copy of a jump instruction pointing at a new target."""
+    op, arg = instruction
+    if op in ('JUMP', 'POP_JUMP_IF_FALSE'):
+        return located((op, target), span_of(instruction))
+    return located((op, arg[:-1] + (target,)), span_of(instruction))
+
+
+def jump_targets(instruction):
+    """Every label or address an instruction may jump to, switch tables included."""
+    op, arg = instruction
+    if op == 'SWITCH_TABLE':
+        return list(arg[1]) + [arg[2]]
+    if op == 'SWITCH_MAP':
+        return list(arg[0].values()) + [arg[1]]
+    target = jump_target(instruction)
+    return [] if target is None else [target]
+
+
+def map_targets(instruction, new_target):
+    """Returns a copy of an instruction with every jump target passed through `new_target`."""
+    op, arg = instruction
+    if op == 'SWITCH_TABLE':
+        low, targets, default = arg
+        return located((op, (low, tuple(new_target(target) for target in targets), new_target(default))),
+                       span_of(instruction))
+    if op == 'SWITCH_MAP':
+        targets, default = arg
+        return located((op, ({value: new_target(target) for value, target in targets.items()}, new_target(default))),
+                       span_of(instruction))
+    target = jump_target(instruction)
+    return instruction if target is None else retarget(instruction, new_target(target))
+
+
+class Located(tuple):
+    """An `(opcode, argument)` pair that remembers the source span it was generated for.
+
+    Only instructions that may fail at run time carry one, and only until
+    assembly: the peephole passes treat them as ordinary pairs, and
+    `CodeObject.assemble` moves the spans into a table beside plain tuples.
+    """
+
+
+def located(instruction, span):
+    """`instruction` carrying `span`; the instruction itself when the span is None."""
+    if span is None:
+        return instruction
+    instruction = Located(instruction)
+    instruction.span = span
+    return instruction
+
+
+def span_of(instruction):
+    return getattr(instruction, 'span', None)
+
+
+class CodeObject:
+    """Bytecode for one function (or the top-level program).
+
+    `instructions` is a list of `(opcode, argument)` pairs. Before assembly
+    jumps refer to `('LABEL', n)` pseudo-instructions; `assemble()` drops the
+    labels and turns jump arguments into instruction indexes. It also
+    fills `spans`: per instruction, the source span of the node it was
+    generated for, or None, so a runtime error can be given a position.
+    """
+
+    def __init__(self, name, instructions, local_names, parameter_count=0, exports=None):
+        self.name = name
+        self.instructions = instructions
+        self.local_names = local_names  # Slot index -> variable name (slots may be shared, see allocate_slots)
+        self.parameter_count = parameter_count
+        # Variable -> slot of the variables an exported function (the top level) hands back
+        self.exports = {} if exports is None else exports
+        self.spans = []
+
+    def assemble(self):
+        addresses = {}
+        instructions = []
+        spans = []
+        for instruction in self.instructions:
+            op, arg = instruction
+            if op == 'LABEL':
+                addresses[arg] = len(instructions)
+            else:
+                instructions.append((op, arg))
+                spans.append(span_of(instruction))
+
+        for index, instruction in enumerate(instructions):
+            instructions[index] = map_targets(instruction, addresses.__getitem__)
+
+        self.instructions = instructions
+        self.spans = spans
+        return self
+
+    def span(self, pc):
+        """The source span of the instruction before `pc`, the one the VM is executing."""
+        return self.spans[pc - 1] if 0 < pc <= len(self.spans) else None
+
+    def disassemble(self):
+        lines = [f"{self.name}:"]
+        for index, (op, arg) in enumerate(self.instructions):
+            lines.append(f"{index:4} {op:22} {'' if arg is None else repr(arg)}")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"CodeObject(name={self.name}, instructions={len(self.instructions)}, locals={self.local_names})"
+
+
+class BytecodeCompiler:
+    """Generates stack-machine bytecode from the IR.
+
+    With `liveness` enabled variables whose lifetimes do not overlap share a
+    frame slot, and the last read of a variable clears its slot so the value
+    can be freed straight away. `keep_variables=False` stops the top-level
+    variables from being kept alive until the end for the symbol table.
+    """
+
+    def __init__(self, passes=None, liveness=True, keep_variables=True):
+        self.passes = passes  # Optional PassManager run over the IR before code generation
+        self.liveness = liveness
+        self.keep_variables = keep_variables
+        self.label_count = 0
+
+    def compile_program(self, statements):
+        """Returns (main_code, functions) for a parsed program."""
+        module = lower_program(statements)
+        module.main.exported = self.keep_variables
+        if self.passes is not None:
+            self.passes.run(module)
+        return self.compile_module(module)
+
+    def compile_module(self, module):
+        functions = {name: self.compile_function(function) for name, function in module.functions.items()}
+        return self.compile_function(module.main), functions
+
+    def compile_function(self, function):
+        return CodeGenerator(self, function).code()
+
+    def new_label(self):
+        self.label_count += 1
+        return self.label_count
+
+
+def allocate_slots(function, interference, exclude=()):
+    """Colours the interference graph greedily, in order of first appearance.
+
+    Parameters keep the first slots, in order. Any other variable takes the
+    lowest slot not held by a variable it interferes with.
+    """
+    slots = {name: index for index, name in enumerate(function.parameters)}
+    for block in function.blocks:
+        for instruction in block.instructions:
+            names = instruction.uses() + ([instruction.dest] if instruction.dest is not None else [])
+            for name in names:
+                if name in slots or name in exclude:
+                    continue
+                taken = {slots[other] for other in interference.edges.get(name, ()) if other in slots}
+                slot = 0
+                while slot in taken:
+                    slot += 1
+                slots[name] = slot
+    return slots
+
+
+def tree_reads(tree):
+    """Variables an expression tree loads."""
+    if tree[0] == 'load':
+        return {tree[1]}
+    if tree[0] == 'binary':
+        return tree_reads(tree[2]) | tree_reads(tree[3])
+    if tree[0] == 'call':
+        return set().union(*(tree_reads(argument) for argument in tree[2]))
+    return set()
+
+
+def tree_calls(tree):
+    if tree[0] == 'call':
+        return True
+    if tree[0] == 'binary':
+        return tree_calls(tree[2]) or tree_calls(tree[3])
+    return False
+
+
+class CodeGenerator:
+    """Emits the instructions of a single CodeObject from an IRFunction.
+
+    A temporary used exactly once, later in the block that defines it, gets
+    no slot: its definition is kept as an expression tree and emitted where
+    the value is consumed, so the value travels on the stack instead of
+    through a STORE_LOCAL/LOAD_LOCAL pair. Trees keep the span of their IR
+    instruction, so the code emitted for them gets the right one however
+    late that is.
+    """
+
+    def __init__(self, compiler, function):
+        self.compiler = compiler
+        self.function = function
+        self.instructions = []
+        self.labels = {}
+        self.chains = DefUseChains(function)
+        self.inline = {block: self.inlinable(block) for block in function.blocks}
+        self.slots = {}
+        self.slot_count = 0
+        self.liveness = None
+        if compiler.liveness:
+            self.liveness = Liveness(function)
+            interference = InterferenceGraph(function, self.liveness)
+            self.slots = allocate_slots(function, interference, set().union(*self.inline.values()))
+            self.slot_count = max(self.slots.values(), default=-1) + 1
+        for parameter in function.parameters:
+            self.slot(parameter)
+
+    def code(self):
+        for block in self.function.blocks:
+            self.emit('LABEL', self.label(block))
+            self.block(block)
+        local_names = [None] * self.slot_count
+        for name, slot in self.slots.items():
+            # A shared slot is named after the user variable in it, if there is one
+            if local_names[slot] is None or (is_temp(local_names[slot]) and not is_temp(name)):
+                local_names[slot] = name
+        # Variables the program only reads were never set, and the interpreter would not list them
+        assigned = {instruction.dest for block in self.function.blocks for instruction in block.instructions}
+        exports = {name: self.slot(name) for name in self.function.exported_variables() if name in assigned}
+        return CodeObject(self.function.name, self.instructions, local_names, len(self.function.parameters),
+                          exports)
+
+    def slot(self, name):
+        if name not in self.slots:
+            # Not allocated up front: a slot of its own is always safe
+            self.slots[name] = self.slot_count
+            self.slot_count += 1
+        return self.slots[name]
+
+    def label(self, block):
+        if block not in self.labels:
+            self.labels[block] = self.compiler.new_label()
+        return self.labels[block]
+
+    def emit(self, op, arg=None, span=None):
+        self.instructions.append(located((op, arg), span))
+
+    def inlinable(self, block):
+        """Temporaries of this block that can stay on the stack."""
+        positions = {}
+        for index, instruction in enumerate(block.instructions):
+            for name in instruction.uses():
+                positions.setdefault(name, index)
+        result = set()
+        for index, instruction in enumerate(block.instructions):
+            name = instruction.dest
+            if (instruction.op in ('copy', 'binary', 'call') and is_temp(name)
+                    and self.chains.use_count(name) == 1 and self.chains.single_definition(name)
+                    and self.chains.uses[name][0][0] is block and positions.get(name, -1) > index):
+                result.add(name)
+        return result
+
+    def block(self, block):
+        inline = self.inline[block]
+        dying = self.liveness.dying(block) if self.liveness else [set()] * len(block.instructions)
+        pending = {}  # Temporary -> expression tree not emitted yet, in definition order
+        for instruction, last_reads in zip(block.instructions, dying):
+            if instruction.op == 'phi':
+                raise NotImplementedError("Phi instructions must be removed before code generation")
+            operands = self.operands(instruction, last_reads, pending, inline)
+
+            if instruction.op == 'binary':
+                if instruction.attr not in BINARY_FUNCTIONS:
+                    raise NotImplementedError(f"Unknown operator: {instruction.attr}")
+                value = ('binary', instruction.attr, operands[0], operands[1], instruction.span)
+            elif instruction.op == 'call':
+                value = ('call', instruction.attr, operands, instruction.span)
+            elif instruction.op == 'copy':
+                value = operands[0]
+            else:
+                value = operands[0] if operands else None
+
+            if instruction.dest in inline:
+                pending[instruction.dest] = value
+                continue
+
+            # Trees still pending must see the values they were defined with,
+            # and calls inside them must not move past other side effects
+            if pending and (any(self.overwrites(instruction, tree) for tree in pending.values())
+                            or (instruction.op in ('print', 'input', 'call')
+                                and any(tree_calls(tree) for tree in pending.values()))):
+                for name, tree in pending.items():
+                    self.tree(tree)
+                    self.emit('STORE_LOCAL', self.slot(name))
+                pending.clear()
+
+            self.instruction(instruction, value)
+
+    def operands(self, instruction, last_reads, pending, inline):
+        """Expression trees for the arguments of an instruction.
+
+        The final read of a variable that dies here clears its slot, unless
+        the instruction stores its result back into that same slot anyway or
+        a tree that is still pending, or one inlined into this instruction,
+        loads the variable too (an inlined tree may run after the direct load).
+        """
+        consumed = {arg: pending.pop(arg) for arg in instruction.args if is_variable(arg) and arg in pending}
+        clear = {name for name in last_reads if name not in consumed and name not in inline}
+        if instruction.dest is not None and instruction.dest not in inline:
+            clear = {name for name in clear if self.slot(name) != self.slot(instruction.dest)}
+        for tree in list(pending.values()) + list(consumed.values()):
+            clear -= tree_reads(tree)
+        if instruction.op == 'return':
+            clear -= set(self.function.exported_variables())  # The caller still reads them from the frame
+
+        result = []
+        for arg in reversed(instruction.args):
+            if isinstance(arg, Const):
+                result.append(('const', arg.value))
+            elif arg in consumed:
+                result.append(consumed[arg])
+            else:
+                result.append(('load', arg, arg in clear))
+                clear.discard(arg)
+        result.reverse()
+        return result
+
+    def overwrites(self, instruction, tree):
+        """Whether an instruction stores into a slot an unemitted tree still has to load."""
+        if instruction.dest is None:
+            return False
+        slot = self.slot(instruction.dest)
+        return any(self.slot(name) == slot for name in tree_reads(tree))
+
+    def tree(self, tree):
+        kind = tree[0]
+        if kind == 'const':
+            self.emit('LOAD_CONST', tree[1])
+        elif kind == 'load':
+            self.emit('LOAD_LOCAL_CLEAR' if tree[2] else 'LOAD_LOCAL', self.slot(tree[1]))
+        elif kind == 'binary':
+            self.tree(tree[2])
+            self.tree(tree[3])
+            self.emit('BINARY_OP', tree[1], tree[4])
+        elif kind == 'call':
+            for argument in tree[2]:
+                self.tree(argument)
+            self.emit('CALL', (tree[1], len(tree[2])), tree[3])
+
+    def instruction(self, instruction, value):
+        op = instruction.op
+        if op in ('copy', 'binary', 'call'):
+            self.tree(value)
+            if op == 'call' and self.chains.use_count(instruction.dest) == 0:
+                self.emit('POP')
+            else:
+                self.emit('STORE_LOCAL', self.slot(instruction.dest))
+
+        elif op == 'print':
+            self.tree(value)
+            self.emit('PRINT', span=instruction.span)
+
+        elif op == 'input':
+            self.emit('INPUT', (self.slot(instruction.dest), instruction.attr), instruction.span)
+
+        elif op == 'jump':
+            self.emit('JUMP', self.label(instruction.targets[0]))
+
+        elif op == 'branch':
+            self.tree(value)
+            self.emit('POP_JUMP_IF_FALSE', self.label(instruction.targets[1]), instruction.span)
+            self.emit('JUMP', self.label(instruction.targets[0]))
+
+        elif op == 'switch':
+            self.tree(value)
+            default = self.label(instruction.targets[0])
+            targets = {case_value: self.label(target)
+                       for case_value, target in zip(instruction.attr, instruction.targets[1:])}
+            low, table = jump_table(targets, default)
+            if low is None:
+                self.emit('SWITCH_MAP', (table, default), instruction.span)
+            else:
+                self.emit('SWITCH_TABLE', (low, table, default), instruction.span)
+
+        elif op == 'return':
+            self.tree(value)
+            self.emit('RETURN')
+
+        else:
+            raise NotImplementedError(f"Cannot generate bytecode for IR instruction: {instruction}")
@@ -0,0 +1,245 @@
+"""Runs mini programs from the command line, without the editor.
+
+    python -m mini_compiler run prog.mc        run a program
+    python -m mini_compiler tokens prog.mc     list its tokens with their positions
+    python -m mini_compiler ast prog.mc        print the AST that `run` executes
+    python -m mini_compiler bench prog.mc      time tokenizing, parsing and running
+    python -m mini_compiler batch a.mc b.mc    run many programs on a process pool
+
+Only `Compiler` is used, so nothing here needs a display. `cin` reads one
+line of stdin per variable, and the program's `cout` output is written to
+stdout in one write once it finishes; runtime errors go to stderr.
+
+`batch` writes one JSON object per program (file, status, output, errors,
+timings) per line, and exits with 1 when any program did not succeed. Given
+`-` as a file, it reads further paths from stdin, one per line.
+"""
+import argparse
+import os
+import sys
+import time
+
+from .compiler import Compiler
+
+EXIT_OK = 0
+EXIT_RUNTIME_ERROR = 1  # The program ran and stopped with an error; for `batch`, any program failed
+EXIT_USAGE = 2          # Bad arguments or an unreadable file, as argparse reports them
+EXIT_COMPILE_ERROR = 3  # The source did not tokenize, parse or link
+
+
+class StreamInput:
+    """Answers `cin` with the next line of a text stream, where the editor asks in a dialog.
+
+    Lines are read only when a `cin` needs them and are kept in `lines`,
+    so `replay()` gives another run of the program the same input.
+    """
+
+    def __init__(self, stream, lines=None):
+        self.stream = stream
+        self.lines = lines if lines is not None else []
+        self.position = 0
+
+    def get_user_input(self, variable_name):
+        if self.position == len(self.lines):
+            line = self.stream.readline()
+            if not line:
+                raise ValueError(f"No input left for '{variable_name}'")
+            self.lines.append(line.rstrip('\r\n'))
+        self.position += 1
+        return self.lines[self.position - 1]
+
+    def replay(self):
+        return StreamInput(self.stream, self.lines)
+
+
+def main(argv=None):
+    """Runs a subcommand and returns its exit code."""
+    arguments = argument_parser().parse_args(argv)
+    if arguments.command is batch_command:
+        return batch_command(arguments)
+    source = read_source(arguments.file)
+    if source is None:
+        return EXIT_USAGE
+    return arguments.command(arguments, source)
+
+
+def read_source(path):
+    """The text of a program file, or None after reporting why it cannot be read."""
+    try:
+        with open(path, encoding='utf-8') as file:
+            return file.read()
+    except OSError as error:
+        print(f"mini_compiler: cannot read {path}: {error.strerror}", file=sys.stderr)
+        return None
+
+
+def argument_parser():
+    parser = argparse.ArgumentParser(prog='python -m mini_compiler', description="Run mini programs.")
+    commands = parser.add_subparsers(required=True, metavar='command')
+
+    run = commands.add_parser('run', help="run a program")
+    run.set_defaults(command=run_command)
+    run.add_argument('--continue-on-error', action='store_true',
+                     help="report a failing top-level statement and go on with the next one")
+
+    tokens = commands.add_parser('tokens', help="list the tokens of a program")
+    tokens.set_defaults(command=tokens_command)
+
+    ast = commands.add_parser('ast', help="print the AST of a program")
+    ast.set_defaults(command=ast_command)
+
+    bench = commands.add_parser('bench', help="time tokenizing, parsing and running a program")
+    bench.set_defaults(command=bench_command)
+    bench.add_argument('--repeat', type=int, default=5, help="runs to time (default 5)")
+
+    batch = commands.add_parser('batch', help="run many programs on a process pool")
+    batch.set_defaults(command=batch_command)
+    batch.add_argument('files', nargs='+', help="program sources; - reads more paths from stdin")
+    batch.add_argument('--workers', type=int, help="worker processes (default: one per CPU)")
+    batch.add_argument('--chunksize', type=int, default=16, help="programs sent to a worker at a time (default 16)")
+    batch.add_argument('--timeout', type=float, help="seconds each program may take")
+    batch.add_argument('--memory-limit', type=int, metavar='MB', help="data memory of each worker process")
+    batch.add_argument('--unordered', action='store_true', help="write results as they finish")
+
+    for command in (run, tokens, ast, bench):
+        command.add_argument('file', help="program source")
+    for command in (run, ast, bench, batch):
+        command.add_argument('--backend', choices=('tree', 'bytecode'), default='tree')
+        command.add_argument('--no-optimize', action='store_true',
+                             help="skip compile-time evaluation and loop vectorisation")
+    return parser
+
+
+def new_compiler(arguments, program_input=None):
+    return Compiler(ui=program_input, backend=arguments.backend,
+                    partial_evaluation=not arguments.no_optimize, vectorize=not arguments.no_optimize,
+                    continue_on_error=getattr(arguments, 'continue_on_error', False))
+
+
+def compile_source(compiler, source):
+    """The AST of a source, or None after reporting a compile error."""
+    try:
+        return compiler.parse(compiler.tokenize(source))
+    except ValueError as error:
+        report_compile_error(error)
+        return None
+
+
+def report_compile_error(error):
+    # Lexer messages end with a newline of their own, and parser messages already say "Error: "
+    message = str(error).rstrip()
+    if message.startswith("Error: "):
+        message = message[len("Error: "):]
+    print(f"Error: {message}", file=sys.stderr)
+
+
+def execute(compiler, ast):
+    """Runs a program; the output is left in `compiler.output` and errors in `compiler.errors`."""
+    compiler.error_output = []
+    compiler.evaluate(ast)
+
+
+def report_errors(compiler):
+    for error in compiler.errors:
+        sys.stderr.write(error.report())
+    return EXIT_RUNTIME_ERROR if compiler.errors else EXIT_OK
+
+
+def run_command(arguments, source):
+    compiler = new_compiler(arguments, StreamInput(sys.stdin))
+    ast = compile_source(compiler, source)
+    if ast is None:
+        return EXIT_COMPILE_ERROR
+    execute(compiler, ast)
+    sys.stdout.write("".join(compiler.output))
+    sys.stdout.flush()
+    return report_errors(compiler)
+
+
+def tokens_command(arguments, source):
+    compiler = Compiler()
+    try:
+        tokens = compiler.tokenize(source)
+    except ValueError as error:
+        report_compile_error(error)
+        return EXIT_COMPILE_ERROR
+    lines = []
+    for token_type, value, start, end in tokens:
+        line, column = compiler.lines.position(start)
+        lines.append(f"{line}:{column}\t{token_type}\t{value!r}\n")
+    sys.stdout.write("".join(lines))
+    return EXIT_OK
+
+
+def ast_command(arguments, source):
+    ast = compile_source(new_compiler(arguments), source)
+    if ast is None:
+        return EXIT_COMPILE_ERROR
+    sys.stdout.write("".join(f"{statement!r}\n" for statement in ast))
+    return EXIT_OK
+
+
+def bench_command(arguments, source):
+    program_input = StreamInput(sys.stdin)  # Every run reads the same lines
+    timings = {'tokenize': [], 'parse': [], 'run': []}
+    for _ in range(max(arguments.repeat, 1)):
+        compiler = new_compiler(arguments, program_input.replay())
+        try:
+            start = time.perf_counter()
+            tokens = compiler.tokenize(source)
+            tokenized = time.perf_counter()
+            ast = compiler.parse(tokens)
+            parsed = time.perf_counter()
+        except ValueError as error:
+            report_compile_error(error)
+            return EXIT_COMPILE_ERROR
+        execute(compiler, ast)
+        timings['tokenize'].append(tokenized - start)
+        timings['parse'].append(parsed - tokenized)
+        timings['run'].append(time.perf_counter() - parsed)
+        if compiler.errors:
+            return report_errors(compiler)
+
+    print(f"{os.path.basename(arguments.file)}: {len(timings['run'])} runs, backend {arguments.backend}")
+    print(f"{'phase':10} {'best ms':>10} {'median ms':>10}")
+    for phase, seconds in timings.items():
+        seconds = sorted(seconds)
+        print(f"{phase:10} {seconds[0] * 1000:10.3f} {seconds[len(seconds) // 2] * 1000:10.3f}")
+    return EXIT_OK
+
+
+def batch_command(arguments):
+    import json
+
+    paths = []  # Path of each program submitted, by its index
+    unreadable = []
+
+    def sources():
+        for path in batch_paths(arguments.files):
+            source = read_source(path)
+            if source is None:
+                unreadable.append(path)
+            else:
+                paths.append(path)
+                yield source
+
+    memory_limit = arguments.memory_limit * 2 ** 20 if arguments.memory_limit is not None else None
+    results = new_compiler(arguments).run_many(sources(), arguments.workers, arguments.chunksize, arguments.timeout,
+                                               memory_limit, ordered=not arguments.unordered)
+    failed = False
+    for result in results:
+        failed |= result.status != 'ok'
+        record = {'file': paths[result.index], 'status': result.status, 'output': result.output,
+                  'errors': [error.report() for error in result.errors], 'timings': result.timings}
+        sys.stdout.write(json.dumps(record) + "\n")
+    if unreadable:
+        return EXIT_USAGE
+    return EXIT_RUNTIME_ERROR if failed else EXIT_OK
+
+
+def batch_paths(files):
+    for path in files:
+        if path == '-':
+            yield from (line.strip() for line in sys.stdin if line.strip())
+        else:
+            yield path
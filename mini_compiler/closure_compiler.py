@@ -0,0 +1,452 @@
+import operator
+
+from .ast_nodes import (
+    BlockNode, NumberNode, StringNode, IdentifierNode, BinaryOperationNode,
+    AssignmentNode, IfNode, ForNode, WhileNode, IncrementNode, DecrementNode,
+    CinNode, PrintNode, FunctionCallNode, ReturnNode, NoOpNode,
+    ArrayDeclarationNode, IndexNode, IndexAssignmentNode, VectorizedLoopNode, ParallelForNode,
+    LogicalOperationNode, NotNode, SwitchNode
+)
+from .arrays import (
+    ARRAY_UFUNCS, ndarray, new_array, store_array, store_result, load_element, store_element, divide,
+    on_numpy_loaded
+)
+from .builtins import NativeFunction
+from .control import RETURN
+from .evaluator import _generic_add
+from .switch import jump_table, switch_value
+
+
+# Operators whose closure is a plain call to a C-level function
+OPERATORS = {
+    '-': operator.sub,
+    '*': operator.mul,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+}
+
+# Comparisons inlined into the closure that tests them when they decide a branch
+FUSED_COMPARISONS = {
+    '==': lambda left, right, node: lambda ev, node=node: left(ev) == right(ev),
+    '!=': lambda left, right, node: lambda ev, node=node: left(ev) != right(ev),
+    '>': lambda left, right, node: lambda ev, node=node: left(ev) > right(ev),
+    '<': lambda left, right, node: lambda ev, node=node: left(ev) < right(ev),
+    '>=': lambda left, right, node: lambda ev, node=node: left(ev) >= right(ev),
+    '<=': lambda left, right, node: lambda ev, node=node: left(ev) <= right(ev),
+}
+
+
+def _bind_numpy(numpy):
+    global ndarray
+    ndarray = numpy.ndarray
+
+
+on_numpy_loaded(_bind_numpy)
+
+
+class ClosureCompiler:
+    """Compiles AST nodes into nested Python closures.
+
+    Every compiled closure takes the running `Evaluator` as its only argument,
+    so compiled code shares the symbol table, output and function-call
+    machinery with the interpreter and the two can be mixed freely. Nodes the
+    compiler cannot handle raise `NotImplementedError`, which keeps the
+    surrounding function or loop on the interpreter.
+
+    Closures that can raise take their node as the default of a `node`
+    parameter. Like the interpreter's `evaluate` frames, their frames then
+    tell `errors.execution_error` which node failed.
+    """
+
+    def compile_function(self, definition):
+        """Compiles a function body into a callable returning the function's result."""
+        if not isinstance(definition.body, BlockNode):
+            raise NotImplementedError("Function body must be a BlockNode")
+
+        # A top-level return is compiled as the call's result; returns nested deeper signal RETURN
+        statements = []
+        result = None
+        for statement in definition.body.statements:
+            if isinstance(statement, ReturnNode):
+                result = self.compile_expression(statement.expression)
+                break
+            statements.append(self.compile_statement(statement))
+
+        def function_body(ev):
+            for statement in statements:
+                if statement(ev) is RETURN:
+                    return ev.return_value
+            if result is not None:
+                return result(ev)
+            return None
+
+        return function_body
+
+    def compile_loop(self, node):
+        """Compiles the remaining iterations of a `for` or `while` loop.
+
+        The compiled code starts with a condition check, so the interpreter can
+        hand over between two iterations without re-running the initialization.
+        """
+        if not isinstance(node.body, BlockNode):
+            raise NotImplementedError("Loop body must be a BlockNode")
+
+        condition = self.compile_condition(node.condition)
+        body = self.compile_block(node.body)
+
+        if isinstance(node, ForNode):
+            increment = self.compile_statement(node.increment)
+
+            def for_loop(ev):
+                while condition(ev):
+                    if body(ev) is RETURN:
+                        return RETURN
+                    increment(ev)
+
+            return for_loop
+
+        def while_loop(ev):
+            while condition(ev):
+                if body(ev) is RETURN:
+                    return RETURN
+
+        return while_loop
+
+    def compile_block(self, node):
+        statements = [self.compile_statement(statement) for statement in node.statements]
+
+        def block(ev):
+            for statement in statements:
+                if statement(ev) is RETURN:
+                    return RETURN
+
+        return block
+
+    def compile_statement(self, node):
+        """Compiles a statement; its closure returns RETURN when a `return` ran, and other results are ignored."""
+        if isinstance(node, AssignmentNode):
+            return self.compile_assignment(node)
+
+        elif isinstance(node, IndexAssignmentNode):
+            name = node.identifier.name
+            index = self.compile_expression(node.index)
+            value = self.compile_expression(node.value)
+
+            def assign_element(ev, node=node):
+                position = index(ev)
+                result = value(ev)
+                array = ev.symbol_table.get(name)
+                if type(array) is ndarray and type(position) is int and 0 <= position < array.shape[0]:
+                    array[position] = result
+                else:
+                    store_element(array, position, result)  # Raises the matching error
+
+            return assign_element
+
+        elif isinstance(node, ArrayDeclarationNode):
+            name = node.identifier.name
+            element_type = node.element_type
+            size = self.compile_expression(node.size)
+            value = self.compile_expression(node.value) if node.value is not None else None
+
+            def declare(ev, node=node):
+                array = new_array(element_type, size(ev))
+                if value is not None:
+                    store_array(array, value(ev))
+                ev.symbol_table[name] = array
+
+            return declare
+
+        elif isinstance(node, PrintNode):
+            value = self.compile_expression(node.value)
+
+            def print_value(ev):
+                result = value(ev)
+                if result is not None:
+                    ev.output.append(str(result) + "\n")
+
+            return print_value
+
+        elif isinstance(node, IfNode):
+            condition = self.compile_condition(node.condition)
+            then_branch = self.compile_block(node.then_branch)
+            if node.else_branch:
+                else_branch = self.compile_block(node.else_branch)
+
+                def if_else(ev):
+                    if condition(ev):
+                        return then_branch(ev)
+                    return else_branch(ev)
+
+                return if_else
+
+            def if_then(ev):
+                if condition(ev):
+                    return then_branch(ev)
+
+            return if_then
+
+        elif isinstance(node, SwitchNode):
+            return self.compile_switch(node)
+
+        elif isinstance(node, ForNode):
+            initialization = self.compile_statement(node.initialization)
+            loop = self.compile_loop(node)
+
+            def for_statement(ev):
+                initialization(ev)
+                return loop(ev)
+
+            return for_statement
+
+        elif isinstance(node, ParallelForNode):
+            from .parallel import run_parallel  # Imported on first use; most programs never need it
+
+            def parallel_loop(ev):
+                run_parallel(node, ev, ev.parallel_workers)
+
+            return parallel_loop
+
+        elif isinstance(node, VectorizedLoopNode):
+            initialization = self.compile_statement(node.loop.initialization)
+            loop = self.compile_loop(node.loop)
+            from .vectorizer import run_vectorized  # Imported on first use, like run_parallel
+
+            def vectorized_loop(ev):
+                initialization(ev)
+                if not run_vectorized(node, ev.symbol_table):
+                    return loop(ev)
+
+            return vectorized_loop
+
+        elif isinstance(node, WhileNode):
+            return self.compile_loop(node)
+
+        elif isinstance(node, BlockNode):
+            return self.compile_block(node)
+
+        elif isinstance(node, CinNode):
+            # Input goes through the UI, which is never the hot part of a loop
+            def read_input(ev):
+                ev.evaluate(node)
+
+            return read_input
+
+        elif isinstance(node, ReturnNode):
+            value = self.compile_expression(node.expression)
+
+            def return_statement(ev):
+                ev.return_value = value(ev)
+                return RETURN
+
+            return return_statement
+
+        elif isinstance(node, NoOpNode):
+            return lambda ev: None
+
+        return self.compile_expression(node)
+
+    def compile_switch(self, node):
+        """Compiles a switch into one table lookup: a tuple for dense case values, a dict otherwise."""
+        expression = self.compile_expression(node.expression)
+        bodies = [self.compile_block(body) for _, body in node.cases]
+        default = self.compile_block(node.default) if node.default else (lambda ev: None)
+        low, table = jump_table({value: bodies[index] for value, index in node.targets.items()}, default)
+
+        if low is None:
+            def switch_map(ev, node=node):
+                value = expression(ev)
+                if type(value) is not int:
+                    switch_value(value)  # Raises the TypeError
+                return table.get(value, default)(ev)
+
+            return switch_map
+
+        size = len(table)
+
+        def switch_table(ev, node=node):
+            value = expression(ev)
+            if type(value) is not int:
+                switch_value(value)
+            index = value - low
+            return (table[index] if 0 <= index < size else default)(ev)
+
+        return switch_table
+
+    def compile_assignment(self, node):
+        name = node.identifier.name
+        if node.value is None:
+            def declare(ev):
+                ev.symbol_table[name] = None
+
+            return declare
+
+        value = self.compile_expression(node.value)
+
+        if isinstance(node.value, BinaryOperationNode) and node.value.operator in ARRAY_UFUNCS:
+            # Kept apart so an array target can take the operands and run one ufunc into its buffer
+            operator_name = node.value.operator
+            left = self.compile_expression(node.value.left)
+            right = self.compile_expression(node.value.right)
+
+            def assign_operation(ev, node=node):
+                target = ev.symbol_table.get(name)
+                if type(target) is ndarray:
+                    store_result(target, operator_name, left(ev), right(ev))
+                else:
+                    ev.symbol_table[name] = value(ev)
+
+            return assign_operation
+
+        def assign(ev, node=node):
+            target = ev.symbol_table.get(name)
+            if type(target) is ndarray:
+                store_array(target, value(ev))
+            else:
+                ev.symbol_table[name] = value(ev)
+
+        return assign
+
+    def compile_condition(self, node):
+        """Compiles a condition whose value is only tested for truth.
+
+        Comparisons are fused into one closure and `&&`, `||` and `!`
+        short-circuit on truthiness directly, so deciding a branch builds no
+        intermediate boolean results.
+        """
+        if isinstance(node, LogicalOperationNode):
+            left = self.compile_condition(node.left)
+            right = self.compile_condition(node.right)
+            if node.operator == '&&':
+                return lambda ev: left(ev) and right(ev)
+            return lambda ev: left(ev) or right(ev)
+
+        if isinstance(node, NotNode):
+            operand = self.compile_condition(node.operand)
+            return lambda ev: not operand(ev)
+
+        if isinstance(node, BinaryOperationNode) and node.operator in FUSED_COMPARISONS:
+            left = self.compile_expression(node.left)
+            right = self.compile_expression(node.right)
+            return FUSED_COMPARISONS[node.operator](left, right, node)
+
+        return self.compile_expression(node)
+
+    def compile_expression(self, node):
+        """Compiles an expression into a closure returning its value."""
+        if isinstance(node, (NumberNode, StringNode)):
+            value = node.value
+            return lambda ev: value
+
+        elif isinstance(node, IdentifierNode):
+            name = node.name
+
+            def load(ev):
+                return ev.symbol_table.get(name, None)
+
+            return load
+
+        elif isinstance(node, BinaryOperationNode):
+            return self.compile_binary_operation(node)
+
+        elif isinstance(node, (LogicalOperationNode, NotNode)):
+            condition = self.compile_condition(node)
+            return lambda ev: True if condition(ev) else False
+
+        elif isinstance(node, IndexNode):
+            name = node.identifier.name
+            index = self.compile_expression(node.index)
+
+            def load_item(ev, node=node):
+                array = ev.symbol_table.get(name)
+                position = index(ev)
+                if type(array) is ndarray and type(position) is int and 0 <= position < array.shape[0]:
+                    return array.item(position)
+                return load_element(array, position)  # Raises the matching error
+
+            return load_item
+
+        elif isinstance(node, (IncrementNode, DecrementNode)):
+            name = node.identifier.name
+            step = 1 if isinstance(node, IncrementNode) else -1
+
+            def update(ev, node=node):
+                symbol_table = ev.symbol_table
+                if name not in symbol_table:
+                    raise ValueError(f"Undefined variable: '{name}'")
+                value = symbol_table[name] + step
+                symbol_table[name] = value
+                return value
+
+            return update
+
+        elif isinstance(node, FunctionCallNode):
+            name = node.name
+            arguments = [self.compile_expression(argument) for argument in node.arguments]
+
+            callee = node.callee
+            if callee is None:
+                def call(ev, node=node):
+                    return ev.call_function(name, [argument(ev) for argument in arguments])
+            elif type(callee) is NativeFunction:
+                native = callee.call
+
+                def call(ev, node=node):
+                    return native([argument(ev) for argument in arguments])
+            else:
+                def call(ev, node=node):
+                    return ev.invoke(callee, [argument(ev) for argument in arguments])
+
+            return call
+
+        raise NotImplementedError(f"Cannot compile AST node: {node}")
+
+    def compile_binary_operation(self, node):
+        left = self.compile_expression(node.left)
+        right = self.compile_expression(node.right)
+
+        if node.operator == '+':
+            # Reuse the type profile the interpreter's inline cache collected
+            handler = node.handler
+            if handler is not None:
+                left_type = node.left_type
+                right_type = node.right_type
+
+                def specialised_add(ev, node=node):
+                    left_value = left(ev)
+                    right_value = right(ev)
+                    if type(left_value) is left_type and type(right_value) is right_type:
+                        return handler(left_value, right_value)
+                    return _generic_add(left_value, right_value)
+
+                return specialised_add
+
+            def add(ev, node=node):
+                return _generic_add(left(ev), right(ev))
+
+            return add
+
+        if node.operator == '/':
+            def compiled_divide(ev, node=node):
+                left_value = left(ev)
+                right_value = right(ev)
+                if type(left_value) is ndarray or type(right_value) is ndarray:
+                    return divide(left_value, right_value)
+                if right_value == 0:
+                    raise ZeroDivisionError("Division by zero")
+                return left_value / right_value
+
+            return compiled_divide
+
+        function = OPERATORS.get(node.operator)
+        if function is None:
+            raise NotImplementedError(f"Cannot compile operator: {node.operator}")
+
+        def binary_operation(ev, node=node):
+            return function(left(ev), right(ev))
+
+        return binary_operation
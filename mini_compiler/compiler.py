@@ -2,25 +2,190 @@
 from .lexer import Lexer
 from .syntax_parser import Parser
 from .evaluator import Evaluator
-from .ast_nodes import FunctionDefinitionNode, FunctionCallNode
+from .tiering import TieredExecution
+from .builtins import default_builtins
+from .linker import link_program
+from .program import CompiledProgram, ExecutionContext
+
+# The bytecode backend, the IR passes and the optimisers are imported by the
+# methods that use them, so starting a Compiler only loads the interpreter
 
 class Compiler:
-    def __init__(self, ui=None):
+    def __init__(self, ui=None, hot_threshold=1000, background_compile=True, loop_jit='closures',
+                 backend='tree', superinstructions=None, partial_evaluation=True, step_budget=10000,
+                 ir_passes=None, verify_ir=True, keep_variables=True, vectorize=True,
+                 parallel_workers=None, continue_on_error=False, builtins=None):
+        if backend not in ('tree', 'bytecode'):
+            raise ValueError(f"Unknown backend: {backend}")
+        # The settings above, so run_many can make the same Compiler in its worker processes
+        self.options = dict(hot_threshold=hot_threshold, background_compile=background_compile, loop_jit=loop_jit,
+                            backend=backend, superinstructions=superinstructions,
+                            partial_evaluation=partial_evaluation, step_budget=step_budget, ir_passes=ir_passes,
+                            verify_ir=verify_ir, keep_variables=keep_variables, vectorize=vectorize,
+                            parallel_workers=parallel_workers, continue_on_error=continue_on_error)
+        self.backend = backend
+        self.superinstructions = superinstructions  # None selects peephole.DEFAULT_SUPERINSTRUCTIONS
+        self.partial_evaluation = partial_evaluation
+        self.step_budget = step_budget  # Steps one compile-time function call may take
+        # IR passes run before bytecode generation; None selects passes.DEFAULT_PASSES
+        self.ir_passes = ir_passes
+        self.verify_ir = verify_ir
+        self._pass_manager = None
+        # With keep_variables=False the bytecode backend frees top-level values after their
+        # last use instead of keeping them for the symbol table
+        self.keep_variables = keep_variables
+        self.vectorize_loops = vectorize
+        self.vectorization = []  # Report lines from the last parse
         self.symbol_table = {}
+        self.functions = {}  # Function table of the last parsed program
         self.output = []
+        self.errors = []  # ExecutionErrors reported by the last run
+        # Where error reports are written; the editor shows them among the program's output
+        self.error_output = self.output
+        # Report a failing top-level statement and go on with the next one (runs on the interpreter)
+        self.continue_on_error = continue_on_error
         self.ui = ui
         self.lexer = Lexer()
-        self.evaluator = Evaluator(self.symbol_table, self.ui)
+        self.lines = None  # LineIndex of the last tokenized source
+        # Native functions; hosts add their own with register_builtin
+        self.builtins = default_builtins() if builtins is None else builtins
+        # Hot functions and loops are recompiled to closures; hot_threshold=None interprets everything
+        self.tiers = TieredExecution(hot_threshold, background_compile, loop_jit) if hot_threshold else None
+        self.evaluator = Evaluator(self.symbol_table, self.ui, self.tiers, self.builtins)
         self.evaluator.output = self.output
+        self.evaluator.parallel_workers = parallel_workers  # None uses every CPU
 
     def tokenize(self, input_text):
-        return self.lexer.tokenize(input_text)
+        tokens = self.lexer.tokenize(input_text)
+        self.lines = self.lexer.lines
+        return tokens
 
     def parse(self, tokens):
         parser = Parser(tokens)
-        return parser.parse()
+        try:
+            ast = parser.parse()
+        except ValueError as error:
+            offset = parser.offset()
+            if offset is None or self.lines is None:
+                raise
+            raise ValueError(f"{error} (at {self.lines.describe(offset)})") from error
+        if self.partial_evaluation:
+            ast = self.optimize(ast)
+        if self.vectorize_loops:
+            ast = self.vectorize(ast)
+        self.link(ast)
+        return ast
+
+    def link(self, ast):
+        """Resolves every call site to its callee and checks argument counts before anything runs."""
+        self.functions = link_program(ast, self.builtins)
+        self.evaluator.functions = self.functions
+
+    def optimize(self, ast):
+        """Folds calls to pure functions with literal arguments and specialises partially constant calls."""
+        from .partial_evaluator import PartialEvaluator
+        return PartialEvaluator(self.step_budget, builtins=self.builtins).optimize(ast)
+
+    def vectorize(self, ast):
+        """Rewrites element-wise `for` loops over arrays into whole-array operations."""
+        from .vectorizer import LoopVectorizer
+        vectorizer = LoopVectorizer()
+        ast = vectorizer.rewrite(ast)
+        self.vectorization = vectorizer.report
+        return ast
+
+    def vectorization_report(self):
+        """One line per `for` loop of the last parsed program: vectorised, or why not."""
+        return list(self.vectorization)
+
+    def register_builtin(self, name, function, parameter_types, pure=False):
+        """Makes a Python callable available to programs as `name(...)`.
+
+        `parameter_types` gives, per parameter, a type or tuple of types the
+        argument must have (None accepts anything); `pure=True` lets calls
+        with literal arguments be folded at compile time. Builtins are found
+        before functions the program defines.
+        """
+        return self.builtins.register(name, function, parameter_types, pure)
+
+    def trace_stats(self):
+        """Returns the tracing JIT's counters, or None when loops are not traced."""
+        if self.tiers is None or self.tiers.loop_jit != 'trace':
+            return None
+        if self.tiers.tracer is None:
+            from .tracing_jit import TraceStats  # Nothing got hot, so nothing was traced
+            return TraceStats()
+        return self.tiers.tracer.stats
+
+    def compile_bytecode(self, ast):
+        """Compiles a parsed program to optimised bytecode; returns (main_code, functions)."""
+        from .bytecode import BytecodeCompiler
+        from .linker import link_code
+        from .peephole import optimize, fuse_superinstructions
+        compiler = BytecodeCompiler(self.pass_manager, keep_variables=self.keep_variables)
+        main, functions = compiler.compile_program(ast)
+        for code in [main] + list(functions.values()):
+            code.instructions = optimize(code.instructions)
+            code.instructions = fuse_superinstructions(code.instructions, self.superinstructions)
+            code.assemble()
+        link_code([main] + list(functions.values()), functions, self.builtins)
+        return main, functions
+
+    @property
+    def pass_manager(self):
+        """The PassManager of the bytecode backend, made when it is first needed."""
+        if self._pass_manager is None:
+            from .passes import PassManager
+            self._pass_manager = PassManager(self.ir_passes, self.verify_ir)
+        return self._pass_manager
+
+    def pass_timings(self):
+        """Seconds spent in each IR pass, summed over every bytecode compilation so far."""
+        return self.pass_manager.report()
+
+    def compile(self, source):
+        """Tokenizes, parses and links `source` once; the CompiledProgram can then be run many times.
+
+        Raises ValueError when the source does not compile. Runs share this
+        compiler's builtins and tiers, so code that gets hot in one run stays
+        compiled for the next.
+        """
+        return self.program(self.parse(self.tokenize(source)))
+
+    def program(self, ast):
+        """A CompiledProgram of a parsed program, with its bytecode on the bytecode backend."""
+        bytecode = None
+        if self.backend == 'bytecode' and not self.continue_on_error:
+            try:
+                bytecode = self.compile_bytecode(ast)
+            except NotImplementedError:
+                pass  # Constructs the bytecode compiler does not know stay on the interpreter
+        return CompiledProgram(ast, self.functions, self.builtins, self.lines, bytecode, self.tiers,
+                               self.evaluator.parallel_workers, self.continue_on_error, self.keep_variables)
 
     def evaluate(self, ast):
-        return self.evaluator.evaluate(ast)
+        """Runs a parsed program. A runtime error stops it and is reported in the output and `errors`."""
+        self.output.clear()
+        self.errors.clear()
+        return self.program(ast).execute(self.context(), self.evaluator)
+
+    def run_many(self, sources, workers=None, chunksize=16, timeout=None, memory_limit=None, ordered=True):
+        """Compiles and runs many independent programs on a process pool; see batch.run_many.
+
+        Every program gets a fresh Compiler with this one's settings and
+        builtins. Yields a ProgramResult per source, in submission order or,
+        with `ordered=False`, as they finish.
+        """
+        from .batch import run_many
+        options = dict(self.options, background_compile=False, parallel_workers=1, builtins=self.builtins)
+        return run_many(sources, options, workers, chunksize, timeout, memory_limit, ordered)
 
+    def run_bytecode(self, main, functions):
+        """Runs already compiled bytecode with this compiler's input, output and variables."""
+        program = CompiledProgram(None, self.functions, self.builtins, self.lines, (main, functions),
+                                  keep_variables=self.keep_variables)
+        return program.execute(self.context())
 
+    def context(self):
+        """An ExecutionContext over this compiler's input, output and variables."""
+        return ExecutionContext(self.ui, self.output, self.symbol_table, self.errors, self.error_output)
@@ -0,0 +1,23 @@
+class ControlSignal:
+    """What a statement hands back to stop the statements around it early.
+
+    Statements normally return None (or the value of an expression
+    statement). A `return` statement stores its value on the evaluator and
+    returns `RETURN` instead; every block, `if`, `switch` and loop that gets
+    the signal from a statement stops and returns it too, until the function
+    call (or the top-level program) that is returning receives it. Nothing
+    is raised, and code that does not return pays one identity check per
+    statement. `break` and `continue` would be further signals, stopped by
+    the innermost loop instead of the call.
+    """
+
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"ControlSignal({self.name})"
+
+
+RETURN = ControlSignal('return')
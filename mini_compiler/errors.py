@@ -0,0 +1,134 @@
+import sys
+
+REPEATED_CALLS_SHOWN = 3  # Lines kept of a run of calls to the same function
+CALLS_SHOWN = 40  # Lines kept at each end of a longer call stack
+
+
+class ExecutionError(Exception):
+    """A runtime error in a mini program: what went wrong, where, and in which calls.
+
+    Engines do not catch errors while they run; an exception travels to the
+    `Compiler`, which turns it into an ExecutionError once with
+    `execution_error`. `node` is the innermost AST node the interpreter was
+    evaluating (None when the code ran compiled and the node is not known),
+    and `call_stack` names the mini-language functions that were active,
+    outermost first. `position` is the (line, column) the node starts at,
+    when the node came from the source, or of the failing instruction on
+    the bytecode backend. `cause` is the original Python exception.
+    """
+
+    def __init__(self, message, node=None, call_stack=None, cause=None, position=None):
+        super().__init__(message)
+        self.message = message
+        self.node = node
+        self.call_stack = call_stack if call_stack is not None else []
+        self.cause = cause
+        self.position = position
+
+    def __reduce__(self):
+        # Errors from parallel workers cross a process boundary
+        return ExecutionError, (self.message, self.node, self.call_stack, None, self.position)
+
+    def report(self):
+        """The lines shown to the user, ending with a newline."""
+        lines = [f"Error: {self.message}"]
+        if self.position is not None:
+            lines[0] += " (at line {}, column {})".format(*self.position)
+        lines.extend(call_stack_lines(self.call_stack))
+        return "\n".join(lines) + "\n"
+
+    def __repr__(self):
+        return (f"ExecutionError(message={self.message!r}, node={self.node}, call_stack={self.call_stack}, "
+                f"position={self.position})")
+
+
+def execution_error(error, lines=None):
+    """The ExecutionError for an exception that escaped a running program.
+
+    The failing node and the call stack are read from the frames the
+    exception passed through: `Evaluator.evaluate` frames hold the node
+    being evaluated and `Evaluator.invoke` frames the function being
+    called; compiled closures that can fail hold their node the same way
+    (see ClosureCompiler). A `VirtualMachine.execute` frame's current
+    Frame links to its callers and its `pc` gives the failing instruction,
+    whose span the code object recorded. An ExecutionError raised
+    elsewhere (by a parallel worker) keeps what it knows and gains the
+    calls around it. `lines` is the
+    LineIndex of the program's source, used to find the node's position.
+    """
+    # Imported here because the engines import this module
+    from .evaluator import Evaluator
+    from .vm import VirtualMachine
+    closures = sys.modules.get(f"{__package__}.closure_compiler")  # Only loaded once something was promoted
+    closure_file = closures.__file__ if closures is not None else None
+
+    node = None
+    span = None  # Of the failing bytecode instruction
+    call_stack = []
+    traceback = error.__traceback__
+    while traceback is not None:
+        frame = traceback.tb_frame
+        code = frame.f_code
+        if code is Evaluator.evaluate.__code__:
+            node = frame.f_locals['node']
+        elif code is Evaluator.invoke.__code__:
+            call_stack.append(frame.f_locals['function_definition'].name)
+        elif code.co_filename == closure_file and 'node' in code.co_varnames[:code.co_argcount]:
+            node = frame.f_locals['node']
+        elif code is VirtualMachine.execute.__code__:
+            current = frame.f_locals['current']
+            call_stack.extend(vm_call_stack(current))
+            span = current.code.span(frame.f_locals['pc'])
+        traceback = traceback.tb_next
+
+    if isinstance(error, ExecutionError):
+        error.call_stack = call_stack + error.call_stack
+        if error.node is None:
+            error.node = node
+    else:
+        error = ExecutionError(str(error), node, call_stack, error)
+    if error.node is not None:
+        span = error.node.span
+    if error.position is None and lines is not None and span is not None:
+        error.position = lines.position(span[0])
+    return error
+
+
+def call_stack_lines(call_stack):
+    """The report's "in f()" lines, innermost call first, with deep recursion cut short.
+
+    Only the first few calls of a run of calls to the same function are
+    listed, then how many more there were; of what remains the first and
+    last CALLS_SHOWN lines are kept.
+    """
+    lines = []
+    previous = None
+    repeats = 0
+    for name in reversed(call_stack):
+        if name == previous:
+            repeats += 1
+            if repeats >= REPEATED_CALLS_SHOWN:
+                continue
+        else:
+            if repeats >= REPEATED_CALLS_SHOWN:
+                lines.append(f"  [{previous}() repeated {repeats - REPEATED_CALLS_SHOWN + 1} more times]")
+            previous = name
+            repeats = 0
+        lines.append(f"  in {name}()")
+    if repeats >= REPEATED_CALLS_SHOWN:
+        lines.append(f"  [{previous}() repeated {repeats - REPEATED_CALLS_SHOWN + 1} more times]")
+    if len(lines) > 2 * CALLS_SHOWN:
+        hidden = len(lines) - 2 * CALLS_SHOWN
+        lines[CALLS_SHOWN:-CALLS_SHOWN] = [f"  [{hidden} more lines]"]
+    return lines
+
+
+def vm_call_stack(frame):
+    """Names of the functions from a VM Frame back to the frame its `execute` started with, outermost first."""
+    names = []
+    while frame.caller is not None:
+        names.append(frame.code.name)
+        frame = frame.caller
+    if frame.code.name != '<main>':
+        names.append(frame.code.name)
+    return names[::-1]
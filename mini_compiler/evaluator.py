@@ -1,209 +1,384 @@
+import operator
+
 from .ast_nodes import (
     BlockNode, NumberNode, StringNode, IdentifierNode, BinaryOperationNode,
     AssignmentNode, IfNode, ForNode, WhileNode, IncrementNode, DecrementNode,
-    CinNode, PrintNode, FunctionDefinitionNode, FunctionCallNode, ReturnNode, NoOpNode
+    CinNode, PrintNode, FunctionDefinitionNode, FunctionCallNode, ReturnNode, NoOpNode,
+    ArrayDeclarationNode, IndexNode, IndexAssignmentNode, VectorizedLoopNode, ParallelForNode,
+    LogicalOperationNode, NotNode, SwitchNode
+)
+from .arrays import (
+    ARRAY_UFUNCS, ndarray, new_array, store_array, store_result, load_element, store_element, divide,
+    on_numpy_loaded
 )
+from .builtins import NativeFunction, default_builtins
+from .control import RETURN
+from .rope import Rope, concat
+from .switch import switch_value
+
+TEXT_TYPES = (str, Rope)
+
+
+def _generic_add(left, right):
+    """Unspecialised `+`: checks the operand types on every call."""
+    if isinstance(left, (int, float)) and isinstance(right, (int, float)):
+        return left + right
+    if isinstance(left, TEXT_TYPES) and isinstance(right, TEXT_TYPES):
+        return concat(left, right)
+    # NumPy arrays add element-wise; anything else raises Python's own TypeError, as before quickening
+    return left + right
+
+
+# Specialised `+` handlers, keyed by the exact operand types they were quickened for
+ADD_HANDLERS = {
+    (int, int): operator.add,      # int-add
+    (float, float): operator.add,  # float-add
+    (int, float): operator.add,
+    (float, int): operator.add,
+    (str, str): concat,            # str-concat, switching to a rope for long results
+    (Rope, str): concat,
+    (str, Rope): concat,
+    (Rope, Rope): concat,
+}
+
+
+def _bind_numpy(numpy):
+    global ndarray
+    ndarray = numpy.ndarray
+    ADD_HANDLERS.update({
+        (ndarray, ndarray): operator.add,  # array-add, element-wise in NumPy
+        (ndarray, int): operator.add,
+        (ndarray, float): operator.add,
+        (int, ndarray): operator.add,
+        (float, ndarray): operator.add,
+    })
+
+
+on_numpy_loaded(_bind_numpy)
+
+# After this many de-specialisations a node stays on the generic path for good
+MAX_DEOPTS = 4
 
 
 class Evaluator:
-    def __init__(self, symbol_table, ui=None):
+    def __init__(self, symbol_table, ui=None, tiers=None, builtins=None):
         self.symbol_table = symbol_table  # Stores variable values
         self.output = []  # Stores console output
         self.ui = ui  # UI reference for `cin` inputs
+        self.tiers = tiers  # Optional TieredExecution for hot functions and loops
+        self.parallel_workers = None  # Processes for `parallel for`; None uses every CPU
+        self.builtins = default_builtins() if builtins is None else builtins  # Native functions, found before user functions
+        self.functions = {}  # Function name -> FunctionDefinitionNode; the linker fills it before a run
+        self.return_value = None  # Value of the last `return`, read by the call that receives RETURN
 
     def evaluate(self, node):
         """Evaluates an AST node and executes operations accordingly."""
-        
-        self.output.clear()
-        
-        try:
-            if isinstance(node, list):
-                results = [self.evaluate(stmt) for stmt in node]
-                return results
-
-            elif isinstance(node, NumberNode):
-                return node.value
-
-            elif isinstance(node, StringNode):
-                return node.value
-
-            elif isinstance(node, IdentifierNode):
-                return self.symbol_table.get(node.name, None)
-
-            elif isinstance(node, BinaryOperationNode):
-                left = self.evaluate(node.left)
-                right = self.evaluate(node.right)
-
-                if node.operator == '+':
-                    return left + right
-                elif node.operator == '-':
-                    return left - right
-                elif node.operator == '*':
-                    return left * right
-                elif node.operator == '/':
-                    if right == 0:
-                        raise ZeroDivisionError("Division by zero")
-                    return left / right
-                elif node.operator == '==':
-                    return left == right
-                elif node.operator == '!=':
-                    return left != right
-                elif node.operator == '>':
-                    return left > right
-                elif node.operator == '<':
-                    return left < right
-                elif node.operator == '>=':
-                    return left >= right
-                elif node.operator == '<=':
-                    return left <= right
-                else:
-                    raise ValueError(f"Unknown operator: {node.operator}")
-
-            elif isinstance(node, AssignmentNode):
-                value = self.evaluate(node.value)
-                self.symbol_table[node.identifier.name] = value
+        if isinstance(node, list):
+            results = []
+            for stmt in node:
+                result = self.evaluate(stmt)
+                if result is RETURN:
+                    break  # A top-level return ends the program
+                results.append(result)
+            return results
+
+        elif isinstance(node, NumberNode):
+            return node.value
+
+        elif isinstance(node, StringNode):
+            return node.value
+
+        elif isinstance(node, IdentifierNode):
+            return self.symbol_table.get(node.name, None)
+
+        elif isinstance(node, BinaryOperationNode):
+            left = self.evaluate(node.left)
+            right = self.evaluate(node.right)
+
+            # Fast path: the node has been quickened for these operand types
+            handler = node.handler
+            if handler is not None:
+                if type(left) is node.left_type and type(right) is node.right_type:
+                    return handler(left, right)
+                self.deoptimize(node)
+
+            if node.operator == '+':
+                return self.quicken_add(node, left, right)
+            elif node.operator == '-':
+                return left - right
+            elif node.operator == '*':
+                return left * right
+            elif node.operator == '/':
+                if type(left) is ndarray or type(right) is ndarray:
+                    return divide(left, right)
+                if right == 0:
+                    raise ZeroDivisionError("Division by zero")
+                return left / right
+            elif node.operator == '==':
+                return left == right
+            elif node.operator == '!=':
+                return left != right
+            elif node.operator == '>':
+                return left > right
+            elif node.operator == '<':
+                return left < right
+            elif node.operator == '>=':
+                return left >= right
+            elif node.operator == '<=':
+                return left <= right
+            else:
+                raise ValueError(f"Unknown operator: {node.operator}")
+
+        elif isinstance(node, LogicalOperationNode):
+            # Short-circuit: the right side only runs when the left does not decide the result
+            if node.operator == '&&':
+                return bool(self.evaluate(node.left)) and bool(self.evaluate(node.right))
+            return bool(self.evaluate(node.left)) or bool(self.evaluate(node.right))
+
+        elif isinstance(node, NotNode):
+            return not self.evaluate(node.operand)
+
+        elif isinstance(node, AssignmentNode):
+            if node.value is None:
+                # `int x;` declares x without a value; cin or a later assignment sets it
+                self.symbol_table[node.identifier.name] = None
+                return None
+            target = self.symbol_table.get(node.identifier.name)
+            if type(target) is ndarray:
+                self.assign_array(target, node.value)
                 return None
+            self.symbol_table[node.identifier.name] = self.evaluate(node.value)
+            return None
 
-            elif isinstance(node, CinNode):
-                if node.identifier.name not in self.symbol_table:
-                    self.output.append(f"Error: Undefined variable '{node.identifier.name}' before input.\n")
-                    return None
+        elif isinstance(node, IndexNode):
+            return load_element(self.symbol_table.get(node.identifier.name), self.evaluate(node.index))
 
-                if self.ui:
-                    value = self.ui.get_user_input(node.identifier.name)
-                else:
-                    self.output.append(f"Error: UI reference is missing. Cannot prompt for input.\n")
-                    return None
+        elif isinstance(node, IndexAssignmentNode):
+            index = self.evaluate(node.index)
+            value = self.evaluate(node.value)
+            store_element(self.symbol_table.get(node.identifier.name), index, value)
+            return None
 
-                self.symbol_table[node.identifier.name] = value
-                return value
+        elif isinstance(node, ArrayDeclarationNode):
+            array = new_array(node.element_type, self.evaluate(node.size))
+            if node.value is not None:
+                store_array(array, self.evaluate(node.value))
+            self.symbol_table[node.identifier.name] = array
+            return None
 
-            elif isinstance(node, PrintNode):
-                value = self.evaluate(node.value)
+        elif isinstance(node, CinNode):
+            if node.identifier.name not in self.symbol_table:
+                raise ValueError(f"Undefined variable '{node.identifier.name}' before input.")
 
-                if value is not None:
-                    debug_output = str(value) + "\n"
-                    print("DEBUG: Adding to evaluator output ->", repr(debug_output))
-                    self.output.append(debug_output)
-                else:
+            if not self.ui:
+                raise ValueError("UI reference is missing. Cannot prompt for input.")
+            value = self.ui.get_user_input(node.identifier.name)
 
-                    return value
+            self.symbol_table[node.identifier.name] = value
+            return value
 
+        elif isinstance(node, PrintNode):
+            value = self.evaluate(node.value)
 
-            elif isinstance(node, IfNode):
-                if self.evaluate(node.condition):
-                    return self.evaluate(node.then_branch)
-                elif node.else_branch:
-                    return self.evaluate(node.else_branch)
+            if value is not None:
+                self.output.append(str(value) + "\n")
+            else:
 
-            elif isinstance(node, ForNode):
-                self.evaluate(node.initialization)
+                return value
 
-                while self.evaluate(node.condition):
 
-                    if isinstance(node.body, BlockNode):
-                        self.evaluate(node.body)
-                    else:
-                        raise ValueError("Error: For loop body should be a BlockNode.")
+        elif isinstance(node, IfNode):
+            if self.evaluate(node.condition):
+                return self.evaluate(node.then_branch)
+            elif node.else_branch:
+                return self.evaluate(node.else_branch)
 
-                    self.evaluate(node.increment)
+        elif isinstance(node, SwitchNode):
+            index = node.targets.get(switch_value(self.evaluate(node.expression)))
+            if index is not None:
+                return self.evaluate(node.cases[index][1])
+            elif node.default:
+                return self.evaluate(node.default)
 
-                return None
+        elif isinstance(node, ForNode):
+            self.evaluate(node.initialization)
+            return self.run_for_loop(node)
 
+        elif isinstance(node, ParallelForNode):
+            from .parallel import run_parallel  # Imported on first use; most programs never need it
+            run_parallel(node, self, self.parallel_workers)
+            return None
 
-            elif isinstance(node, IncrementNode):
-                identifier = node.identifier.name
-                if identifier not in self.symbol_table:
-                    raise ValueError(f"Undefined variable: '{identifier}'")
+        elif isinstance(node, VectorizedLoopNode):
+            self.evaluate(node.loop.initialization)
+            from .vectorizer import run_vectorized  # Imported on first use, like run_parallel
+            if not run_vectorized(node, self.symbol_table):
+                # A guard failed; the original loop gives the element-by-element behaviour
+                return self.run_for_loop(node.loop)
+            return None
 
-                self.symbol_table[identifier] += 1
-                return self.symbol_table[identifier]
 
-            elif isinstance(node, DecrementNode):
-                identifier = node.identifier.name
+        elif isinstance(node, IncrementNode):
+            identifier = node.identifier.name
+            if identifier not in self.symbol_table:
+                raise ValueError(f"Undefined variable: '{identifier}'")
 
-                if identifier not in self.symbol_table:
-                    raise ValueError(f"Undefined variable: '{identifier}'")
+            self.symbol_table[identifier] += 1
+            return self.symbol_table[identifier]
 
-                old_value = self.symbol_table[identifier]
-                new_value = old_value - 1
-                self.symbol_table[identifier] = new_value
+        elif isinstance(node, DecrementNode):
+            identifier = node.identifier.name
 
-                print(f"DEBUG: Decremented {identifier} from {old_value} to {new_value}")
+            if identifier not in self.symbol_table:
+                raise ValueError(f"Undefined variable: '{identifier}'")
 
-                return new_value
+            new_value = self.symbol_table[identifier] - 1
+            self.symbol_table[identifier] = new_value
+            return new_value
 
 
 
-            elif isinstance(node, WhileNode):
-                print("DEBUG: Evaluating WhileNode condition ->", repr(self.evaluate(node.condition)))
+        elif isinstance(node, WhileNode):
+            if not isinstance(node.body, BlockNode):
+                raise ValueError("While loop body should be a BlockNode.")
 
-                while self.evaluate(node.condition):
+            compiled = self.compiled_loop(node)
+            if compiled is not None:
+                return compiled(self)
 
-                    if isinstance(node.body, BlockNode):
-                        self.evaluate(node.body)
-                    else:
-                        raise ValueError("Error: While loop body should be a BlockNode.")
+            while self.evaluate(node.condition):
+                if self.evaluate(node.body) is RETURN:
+                    return RETURN
 
-                return None
+                if self.tiers is not None:
+                    compiled = self.tiers.loop_backedge(node)
+                    if compiled is not None:
+                        return compiled(self)
 
+            return None
 
-            elif isinstance(node, BlockNode):
 
-                for statement in node.statements:
-                    self.evaluate(statement)
+        elif isinstance(node, BlockNode):
 
+            for statement in node.statements:
+                if self.evaluate(statement) is RETURN:
+                    return RETURN
 
-            elif isinstance(node, FunctionCallNode):
-                return self.evaluate_function_call(node)
 
-            elif isinstance(node, FunctionDefinitionNode):
-                self.symbol_table = node.name
-                return None  # Functions are stored during parsing
+        elif isinstance(node, FunctionCallNode):
+            return self.evaluate_function_call(node)
 
-            elif isinstance(node, ReturnNode):
-                return self.evaluate(node.expression)
+        elif isinstance(node, FunctionDefinitionNode):
+            self.functions[node.name] = node
+            return None
 
-            elif isinstance(node, NoOpNode):
-                return None
+        elif isinstance(node, ReturnNode):
+            self.return_value = self.evaluate(node.expression)
+            return RETURN
 
-            else:
-                raise ValueError(f"Unknown AST node: {node}")
+        elif isinstance(node, NoOpNode):
+            return None
 
-        except Exception as e:
-            self.output.append(f"Error: {e}\n")
+        else:
+            raise ValueError(f"Unknown AST node: {node}")
+
+    def run_for_loop(self, node):
+        """Runs a `for` loop whose initialization has already been evaluated."""
+        if not isinstance(node.body, BlockNode):
+            raise ValueError("For loop body should be a BlockNode.")
+
+        compiled = self.compiled_loop(node)
+        if compiled is not None:
+            return compiled(self)
+
+        while self.evaluate(node.condition):
+            if self.evaluate(node.body) is RETURN:
+                return RETURN
+            self.evaluate(node.increment)
+
+            if self.tiers is not None:
+                compiled = self.tiers.loop_backedge(node)
+                if compiled is not None:
+                    return compiled(self)
+
+        return None
+
+    def assign_array(self, target, value_node):
+        """Whole-array assignment; arrays keep their buffer and the new values are written into it."""
+        if isinstance(value_node, BinaryOperationNode) and value_node.operator in ARRAY_UFUNCS:
+            left = self.evaluate(value_node.left)
+            right = self.evaluate(value_node.right)
+            store_result(target, value_node.operator, left, right)
+        else:
+            store_array(target, self.evaluate(value_node))
+
+    def quicken_add(self, node, left, right):
+        """Evaluates a `+` node and specialises it for the operand types seen."""
+        if node.deopt_count < MAX_DEOPTS:
+            handler = ADD_HANDLERS.get((type(left), type(right)))
+            if handler is not None:
+                node.left_type = type(left)
+                node.right_type = type(right)
+                node.handler = handler
+                return handler(left, right)
+        return _generic_add(left, right)
+
+    def deoptimize(self, node):
+        """Drops a node's specialised handler after its type guard failed."""
+        node.handler = None
+        node.left_type = None
+        node.right_type = None
+        node.deopt_count += 1
+
+    def compiled_loop(self, node):
+        """The compiled form of a loop that has already been promoted, or None."""
+        if self.tiers is None:
             return None
+        return self.tiers.loop_entry(node)
 
     def evaluate_function_call(self, node):
-        function_name = node.name
         arguments = [self.evaluate(arg) for arg in node.arguments]
-        print(f"DEBUG evaluator.py: Function Name passed to eval func call: {function_name}")
-        print(f"DEBUG evaluator.py: symbol_table items: {self.symbol_table}")
-
-        if function_name not in self.symbol_table:
+        callee = node.callee
+        if callee is None:
+            return self.call_function(node.name, arguments)
+        # Linked call: the callee and the argument count were checked at compile time
+        if type(callee) is NativeFunction:
+            return callee.call(arguments)
+        return self.invoke(callee, arguments)
+
+    def call_function(self, function_name, arguments):
+        """Calls a builtin or user-defined function by name with already evaluated arguments."""
+        native = self.builtins.get(function_name)
+        if native is not None:
+            return native.call(arguments)
+
+        if function_name not in self.functions:
             raise ValueError(f"Undefined function: {function_name}")
 
-        function_definition = self.symbol_table[function_name]
+        function_definition = self.functions[function_name]
         parameters = function_definition.parameters
-        body = function_definition.body
 
         if len(arguments) != len(parameters):
             raise ValueError(
                 f"Incorrect number of arguments for function {function_name}. Expected {len(parameters)}, got {len(arguments)}"
             )
+        return self.invoke(function_definition, arguments)
 
-        function_scope = {param['name']: arguments[i] for i, param in enumerate(parameters)}
+    def invoke(self, function_definition, arguments):
+        """Runs a user-defined function in a new scope; the arguments must match its parameters."""
         original_scope = self.symbol_table
-        self.symbol_table = function_scope
+        self.symbol_table = dict(zip(function_definition.parameter_names, arguments))
+
+        compiled = self.tiers.function_entry(function_definition) if self.tiers is not None else None
 
-        return_value = None
         try:
-            for statement in body.statements:
-                result = self.evaluate(statement)
-                if isinstance(statement, ReturnNode):
-                    return_value = result
-                    break
+            if compiled is not None:
+                return compiled(self)
+
+            for statement in function_definition.body.statements:
+                if self.evaluate(statement) is RETURN:
+                    return self.return_value
         finally:
             self.symbol_table = original_scope
 
-        return return_value
+        return None
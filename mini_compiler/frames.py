@@ -0,0 +1,45 @@
+# Free frames kept per function; frames beyond this (deep recursion) are dropped on return
+MAX_POOLED_FRAMES = 64
+
+
+class Frame:
+    """One active call of a CodeObject.
+
+    `locals` has exactly one entry per slot of the code, allocated when the
+    frame is made and reused for every call the frame serves. `pc` is where
+    the code resumes once a call it made returns, and `caller` the frame to
+    return to (None for the frame a run started in).
+    """
+
+    __slots__ = ('code', 'locals', 'pc', 'caller')
+
+    def __init__(self, code, locals=None):
+        self.code = code
+        self.locals = [None] * len(code.local_names) if locals is None else locals
+        self.pc = 0
+        self.caller = None
+
+    def __repr__(self):
+        return f"Frame(code={self.code.name}, pc={self.pc})"
+
+
+class FramePool:
+    """Free lists of frames, one per CodeObject, so calls reuse frames instead of allocating them.
+
+    The VM takes frames from and returns them to the lists inline, in its
+    dispatch loop. It clears a frame's slots (copying `blanks` over them)
+    before putting it back, so pooled frames keep no values alive and a
+    reused frame starts with every local unset.
+    """
+
+    def __init__(self, limit=MAX_POOLED_FRAMES):
+        self.limit = limit
+        self.free = {}    # CodeObject -> free frames
+        self.blanks = {}  # CodeObject -> list of None, one per slot, copied over released locals
+
+    def free_list(self, code):
+        free = self.free.get(code)
+        if free is None:
+            free = self.free[code] = []
+            self.blanks[code] = [None] * len(code.local_names)
+        return free
@@ -0,0 +1,488 @@
+class Const:
+    """A constant operand."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, Const) and type(self.value) is type(other.value) and self.value == other.value
+
+    def __hash__(self):
+        return hash((type(self.value), self.value))
+
+    def __repr__(self):
+        return repr(self.value)
+
+
+def is_temp(operand):
+    """Temporaries are compiler-generated variables; their names start with '%'."""
+    return isinstance(operand, str) and operand.startswith('%')
+
+
+def is_variable(operand):
+    return isinstance(operand, str)
+
+
+# Instructions that end a basic block
+TERMINATORS = ('jump', 'branch', 'switch', 'return')
+
+# Instructions with effects beyond writing their destination
+SIDE_EFFECTS = ('print', 'call', 'input')
+
+
+class Instruction:
+    """A three-address instruction.
+
+    Operands are variable names (temporaries start with '%') or `Const`s.
+
+        copy    dest <- args[0]
+        binary  dest <- args[0] <attr> args[1]
+        call    dest <- attr(*args)
+        print   args[0]
+        input   dest                  (reads a value for variable `attr`)
+        phi     dest <- args[i] when coming from attr[i]
+        export  makes args[i] the final value of variable attr[i] (SSA form only)
+        jump    targets[0]
+        branch  args[0] ? targets[0] : targets[1]
+        switch  targets[i + 1] if args[0] == attr[i], else targets[0] (args[0] must be an int)
+        return  args[0]
+
+    `span` is the source span of the AST node an instruction that may fail
+    at run time was lowered from, so the error can say where it happened.
+    """
+
+    def __init__(self, op, dest=None, args=(), attr=None, targets=(), span=None):
+        self.op = op
+        self.dest = dest
+        self.args = list(args)
+        self.attr = attr
+        self.targets = list(targets)
+        self.span = span
+
+    @property
+    def is_terminator(self):
+        return self.op in TERMINATORS
+
+    def uses(self):
+        """Variables this instruction reads."""
+        return [arg for arg in self.args if is_variable(arg)]
+
+    def replace_uses(self, mapping):
+        self.args = [mapping.get(arg, arg) if is_variable(arg) else arg for arg in self.args]
+
+    def __repr__(self):
+        args = ", ".join(repr(arg) if isinstance(arg, Const) else arg for arg in self.args)
+        if self.op == 'binary':
+            text = f"{self.dest} = {self.args[0]} {self.attr} {self.args[1]}"
+        elif self.op == 'call':
+            text = f"{self.dest} = call {self.attr}({args})"
+        elif self.op == 'phi':
+            pairs = ", ".join(f"{block.name}: {arg}" for block, arg in zip(self.attr, self.args))
+            text = f"{self.dest} = phi({pairs})"
+        elif self.op in ('jump', 'branch'):
+            targets = ", ".join(block.name for block in self.targets)
+            text = f"{self.op} {args}{', ' if args else ''}{targets}"
+        elif self.op == 'switch':
+            cases = ", ".join(f"{value}: {block.name}" for value, block in zip(self.attr, self.targets[1:]))
+            text = f"switch {args} [{cases}] default {self.targets[0].name}"
+        elif self.dest is not None:
+            text = f"{self.dest} = {self.op} {args}".rstrip()
+        else:
+            text = f"{self.op} {args}".rstrip()
+        return text
+
+
+class BasicBlock:
+    def __init__(self, name):
+        self.name = name
+        self.instructions = []
+        self.predecessors = []
+        self.successors = []
+
+    @property
+    def terminator(self):
+        if self.instructions and self.instructions[-1].is_terminator:
+            return self.instructions[-1]
+        return None
+
+    def __repr__(self):
+        return f"BasicBlock(name={self.name})"
+
+
+class IRFunction:
+    """One function (or the top-level program) as a control-flow graph of basic blocks."""
+
+    def __init__(self, name, parameters):
+        self.name = name
+        self.parameters = parameters
+        self.blocks = []  # The first block is the entry block
+        self.block_count = 0
+        self.temp_count = 0
+        self.exported = False  # Variables stay visible to the caller after a return (the top-level program)
+        self.ssa = False
+
+    @property
+    def entry(self):
+        return self.blocks[0]
+
+    def new_block(self, hint="block"):
+        self.block_count += 1
+        block = BasicBlock(f"{hint}{self.block_count}")
+        self.blocks.append(block)
+        return block
+
+    def new_temp(self):
+        self.temp_count += 1
+        return f"%{self.temp_count}"
+
+    def build_cfg(self):
+        """Recomputes predecessor and successor lists from the block terminators."""
+        for block in self.blocks:
+            block.predecessors = []
+            block.successors = []
+        for block in self.blocks:
+            terminator = block.terminator
+            if terminator is not None:
+                for target in terminator.targets:
+                    if target not in block.successors:
+                        block.successors.append(target)
+                        target.predecessors.append(block)
+
+    def remove_unreachable(self):
+        """Rebuilds the CFG, drops blocks the entry cannot reach and phi entries for vanished edges.
+
+        Returns True if any block was removed.
+        """
+        self.build_cfg()
+        reachable = set(self.reverse_postorder())
+        removed = len(reachable) != len(self.blocks)
+        if removed:
+            self.blocks = [block for block in self.blocks if block in reachable]
+            self.build_cfg()
+        for block in self.blocks:
+            for instruction in block.instructions:
+                if instruction.op == 'phi':
+                    keep = [(b, arg) for b, arg in zip(instruction.attr, instruction.args) if b in block.predecessors]
+                    instruction.attr = [b for b, _ in keep]
+                    instruction.args = [arg for _, arg in keep]
+        return removed
+
+    def reverse_postorder(self):
+        """Blocks reachable from the entry, in reverse postorder."""
+        order = []
+        visited = set()
+        stack = [(self.entry, iter(self.entry.successors))]
+        visited.add(self.entry)
+        while stack:
+            block, successors = stack[-1]
+            for successor in successors:
+                if successor not in visited:
+                    visited.add(successor)
+                    stack.append((successor, iter(successor.successors)))
+                    break
+            else:
+                stack.pop()
+                order.append(block)
+        order.reverse()
+        return order
+
+    def variables(self):
+        """All variable names defined or used in the function, parameters included."""
+        names = set(self.parameters)
+        for block in self.blocks:
+            for instruction in block.instructions:
+                if instruction.dest is not None:
+                    names.add(instruction.dest)
+                names.update(instruction.uses())
+        return names
+
+    def exported_variables(self):
+        """Variables whose final values a return hands back to the caller (outside SSA form)."""
+        if not self.exported or self.ssa:
+            return []
+        return sorted(name for name in self.variables() if not is_temp(name))
+
+    def reads(self, instruction, exported=None):
+        """Variables an instruction reads, counting the implicit reads of an exporting return."""
+        uses = instruction.uses()
+        if instruction.op == 'return':
+            uses += self.exported_variables() if exported is None else exported
+        return uses
+
+    def dump(self):
+        lines = [f"function {self.name}({', '.join(self.parameters)}):"]
+        for block in self.blocks:
+            predecessors = ", ".join(p.name for p in block.predecessors)
+            lines.append(f"  {block.name}:{'  ; preds ' + predecessors if predecessors else ''}")
+            lines.extend(f"    {instruction}" for instruction in block.instructions)
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"IRFunction(name={self.name}, blocks={len(self.blocks)})"
+
+
+class IRModule:
+    """A lowered program: the top-level code plus every user-defined function."""
+
+    def __init__(self, main, functions):
+        self.main = main
+        self.functions = functions  # name -> IRFunction
+
+    def all_functions(self):
+        return [self.main] + list(self.functions.values())
+
+    def dump(self):
+        return "\n\n".join(function.dump() for function in self.all_functions())
+
+
+class DominatorTree:
+    """Immediate dominators, dominator-tree children and dominance frontiers of a function."""
+
+    def __init__(self, function):
+        self.function = function
+        self.order = function.reverse_postorder()
+        self.idom = self.compute_idoms()
+        self.children = {block: [] for block in self.order}
+        for block, parent in self.idom.items():
+            if parent is not block:
+                self.children[parent].append(block)
+        self.frontiers = self.compute_frontiers()
+
+    def compute_idoms(self):
+        """Cooper, Harvey and Kennedy's iterative algorithm."""
+        position = {block: index for index, block in enumerate(self.order)}
+        entry = self.function.entry
+        idom = {entry: entry}
+
+        def intersect(first, second):
+            while first is not second:
+                while position[first] > position[second]:
+                    first = idom[first]
+                while position[second] > position[first]:
+                    second = idom[second]
+            return first
+
+        changed = True
+        while changed:
+            changed = False
+            for block in self.order[1:]:
+                processed = [p for p in block.predecessors if p in idom]
+                new_idom = processed[0]
+                for predecessor in processed[1:]:
+                    new_idom = intersect(predecessor, new_idom)
+                if idom.get(block) is not new_idom:
+                    idom[block] = new_idom
+                    changed = True
+        return idom
+
+    def compute_frontiers(self):
+        frontiers = {block: set() for block in self.order}
+        for block in self.order:
+            predecessors = [p for p in block.predecessors if p in self.idom]
+            if len(predecessors) < 2:
+                continue
+            for predecessor in predecessors:
+                runner = predecessor
+                while runner is not self.idom[block]:
+                    frontiers[runner].add(block)
+                    runner = self.idom[runner]
+        return frontiers
+
+    def dominates(self, first, second):
+        """True if every path from the entry to `second` passes through `first`."""
+        while True:
+            if second is first:
+                return True
+            parent = self.idom.get(second)
+            if parent is None or parent is second:
+                return False
+            second = parent
+
+    def preorder(self):
+        result = []
+        stack = [self.function.entry]
+        while stack:
+            block = stack.pop()
+            result.append(block)
+            stack.extend(reversed(self.children[block]))
+        return result
+
+
+class DefUseChains:
+    """Maps every variable to the instructions that define it and the instructions that use it."""
+
+    def __init__(self, function):
+        self.definitions = {}  # name -> [(block, instruction)]
+        self.uses = {}         # name -> [(block, instruction)]
+        for block in function.blocks:
+            for instruction in block.instructions:
+                if instruction.dest is not None:
+                    self.definitions.setdefault(instruction.dest, []).append((block, instruction))
+                for name in instruction.uses():
+                    self.uses.setdefault(name, []).append((block, instruction))
+
+    def use_count(self, name):
+        return len(self.uses.get(name, ()))
+
+    def single_definition(self, name):
+        definitions = self.definitions.get(name, ())
+        return definitions[0] if len(definitions) == 1 else None
+
+
+class Liveness:
+    """Variables live on entry to and exit from every block (backward dataflow).
+
+    Phi operands count as uses at the end of the corresponding predecessor,
+    and a return in an exported function reads every variable.
+    """
+
+    def __init__(self, function):
+        self.function = function
+        self.exported = function.exported_variables()
+        self.uses = {}     # block -> variables read before being written in the block
+        self.defines = {}  # block -> variables written in the block
+        for block in function.blocks:
+            uses, defines = set(), set()
+            for instruction in block.instructions:
+                if instruction.op != 'phi':
+                    uses.update(name for name in function.reads(instruction, self.exported) if name not in defines)
+                if instruction.dest is not None:
+                    defines.add(instruction.dest)
+            self.uses[block] = uses
+            self.defines[block] = defines
+
+        self.live_in = {block: set() for block in function.blocks}
+        self.live_out = {block: set() for block in function.blocks}
+        order = list(reversed(function.reverse_postorder()))
+        changed = True
+        while changed:
+            changed = False
+            for block in order:
+                live_out = set()
+                for successor in block.successors:
+                    live_out |= self.live_in[successor]
+                    for instruction in successor.instructions:
+                        if instruction.op == 'phi':
+                            live_out.discard(instruction.dest)
+                            live_out.update(arg for b, arg in zip(instruction.attr, instruction.args)
+                                            if b is block and is_variable(arg))
+                live_in = self.uses[block] | (live_out - self.defines[block])
+                if live_out != self.live_out[block] or live_in != self.live_in[block]:
+                    self.live_out[block] = live_out
+                    self.live_in[block] = live_in
+                    changed = True
+
+    def dying(self, block):
+        """For each instruction of a block, the variables it reads for the last time."""
+        live = set(self.live_out[block])
+        result = []
+        for instruction in reversed(block.instructions):
+            after = set(live)
+            if instruction.dest is not None:
+                live.discard(instruction.dest)
+            if instruction.op != 'phi':
+                reads = self.function.reads(instruction, self.exported)
+                live.update(reads)
+                result.append({name for name in reads if name not in after})
+            else:
+                result.append(set())
+        result.reverse()
+        return result
+
+
+class InterferenceGraph:
+    """Pairs of variables that hold values at the same time and so cannot share storage.
+
+    Built from liveness: a definition interferes with everything live after
+    it, except the source of a copy, which holds the same value. Two
+    exported variables always interfere: the caller reads each of them
+    from a slot of its own.
+    """
+
+    def __init__(self, function, liveness=None):
+        liveness = liveness or Liveness(function)
+        exported = set(liveness.exported)
+        self.edges = {name: set() for name in function.variables()}
+        for block in function.blocks:
+            live = set(liveness.live_out[block])
+            for instruction in reversed(block.instructions):
+                dest = instruction.dest
+                if dest is not None:
+                    source = instruction.args[0] if instruction.op == 'copy' else None
+                    if dest in exported and source in exported:
+                        source = None
+                    for name in live:
+                        if name != dest and name != source:
+                            self.add(dest, name)
+                    live.discard(dest)
+                if instruction.op != 'phi':
+                    live.update(function.reads(instruction, liveness.exported))
+        # Parameters and anything read before being written are all set on entry
+        entry_live = set(function.parameters) | liveness.live_in[function.entry]
+        for name in entry_live:
+            for other in entry_live:
+                if name != other:
+                    self.add(name, other)
+
+    def add(self, first, second):
+        self.edges.setdefault(first, set()).add(second)
+        self.edges.setdefault(second, set()).add(first)
+
+    def interferes(self, first, second):
+        return second in self.edges.get(first, ())
+
+
+class IRVerificationError(ValueError):
+    """Raised when a pass leaves the IR in an inconsistent state."""
+
+
+def verify_function(function):
+    """Checks the structural invariants every pass must preserve."""
+    blocks = set(function.blocks)
+    if not function.blocks:
+        raise IRVerificationError(f"{function.name}: function has no blocks")
+    if function.entry.predecessors:
+        raise IRVerificationError(f"{function.name}: entry block has predecessors")
+
+    defined = set(function.parameters)
+    for block in function.blocks:
+        for instruction in block.instructions:
+            if instruction.dest is not None:
+                if function.ssa and instruction.dest in defined:
+                    raise IRVerificationError(f"{function.name}: {instruction.dest} is assigned more than once in SSA form")
+                defined.add(instruction.dest)
+
+    for block in function.blocks:
+        if block.terminator is None:
+            raise IRVerificationError(f"{function.name}: block {block.name} has no terminator")
+        seen_non_phi = False
+        for index, instruction in enumerate(block.instructions):
+            if instruction.is_terminator and index != len(block.instructions) - 1:
+                raise IRVerificationError(f"{function.name}: terminator in the middle of {block.name}")
+            for target in instruction.targets:
+                if target not in blocks:
+                    raise IRVerificationError(f"{function.name}: {block.name} jumps to a removed block")
+            if instruction.op == 'phi':
+                if seen_non_phi:
+                    raise IRVerificationError(f"{function.name}: phi after other instructions in {block.name}")
+                if not function.ssa:
+                    raise IRVerificationError(f"{function.name}: phi in {block.name} outside SSA form")
+                if set(instruction.attr) != set(block.predecessors) or len(instruction.attr) != len(block.predecessors):
+                    raise IRVerificationError(f"{function.name}: phi in {block.name} does not match its predecessors")
+            else:
+                seen_non_phi = True
+            for name in instruction.uses():
+                if is_temp(name) and name not in defined:
+                    raise IRVerificationError(f"{function.name}: {name} is used but never defined")
+
+        successors = block.terminator.targets
+        if set(successors) != set(block.successors):
+            raise IRVerificationError(f"{function.name}: stale successors for {block.name}")
+        for successor in block.successors:
+            if block not in successor.predecessors:
+                raise IRVerificationError(f"{function.name}: {block.name} missing from predecessors of {successor.name}")
+
+
+def verify_module(module):
+    for function in module.all_functions():
+        verify_function(function)
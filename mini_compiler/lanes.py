@@ -0,0 +1,371 @@
+import operator
+
+from .arrays import load_numpy
+from .ast_nodes import (
+    BlockNode, NumberNode, StringNode, IdentifierNode, BinaryOperationNode,
+    AssignmentNode, IfNode, ForNode, WhileNode, IncrementNode, DecrementNode,
+    CinNode, PrintNode, FunctionDefinitionNode, NoOpNode, LogicalOperationNode, NotNode
+)
+
+# Arithmetic on ints is done in int64 lanes; every int must stay within the
+# range where int64 and float64 agree with Python's unbounded ints
+INT_LIMIT = 2 ** 53
+
+ARITHMETIC = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+}
+
+COMPARISONS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+}
+
+# Node types the lanes run, with the attributes holding their child nodes;
+# anything else runs on the scalar engines
+LANE_NODES = {
+    BlockNode: ('statements',),
+    AssignmentNode: ('value',),
+    IfNode: ('condition', 'then_branch', 'else_branch'),
+    ForNode: ('initialization', 'condition', 'increment', 'body'),
+    WhileNode: ('condition', 'body'),
+    IncrementNode: (),
+    DecrementNode: (),
+    CinNode: (),
+    PrintNode: ('value',),
+    FunctionDefinitionNode: (),  # Only calls to it are not laneable
+    NoOpNode: (),
+    NumberNode: (),
+    StringNode: (),
+    IdentifierNode: (),
+    BinaryOperationNode: ('left', 'right'),
+    LogicalOperationNode: ('left', 'right'),
+    NotNode: ('operand',),
+}
+
+
+class NotLaneable(Exception):
+    """Raised when a program, or one of its runs, cannot execute in lock-step lanes; the message says why."""
+
+
+class LaneExecution:
+    """Runs one program over many input sets at once, one NumPy lane per input set.
+
+    Every variable holds an array with a value per lane (or a plain Python
+    value while it is the same in every lane). Statements run for the lanes
+    of a mask: an `if` splits the mask by its condition, a loop keeps
+    running while its condition holds in any lane and drops the others, and
+    `&&`/`||` only evaluate their right side in the lanes that need it.
+    `cout` records the value and mask, and `outputs()` turns the records
+    into each lane's lines once the program has finished.
+
+    Only numeric top-level code runs in lanes: no function calls, arrays,
+    `switch` or `return`, and `cin` values must be ints or floats. Where a
+    lane would do something the scalar engines do differently (a value too
+    large for an exact int64, a division by zero, a missing input, a
+    variable whose type differs between lanes) NotLaneable is raised and
+    the whole batch should be run on a scalar engine instead.
+    """
+
+    def __init__(self, ast, input_sets):
+        check_laneable(ast)
+        self.numpy = numpy = load_numpy()
+        self.ast = ast
+        self.lanes = len(input_sets)
+        self.variables = {}  # Name -> value: array with a value per lane, or a Python scalar
+        self.defined = {}  # Name -> lanes that have the variable, or None for every lane
+        self.printed = []  # (mask or None, value) per `cout`, in order
+        self.read_inputs(input_sets)
+        self.cursor = numpy.zeros(self.lanes, dtype='int64')  # Inputs each lane has read
+
+    def read_inputs(self, input_sets):
+        """Lays the input sets out as padded (lane, position) tables of ints and floats."""
+        numpy = self.numpy
+        width = max((len(inputs) for inputs in input_sets), default=0)
+        self.input_counts = numpy.array([len(inputs) for inputs in input_sets], dtype='int64')
+        self.int_inputs = numpy.zeros((self.lanes, width), dtype='int64')
+        self.float_inputs = numpy.zeros((self.lanes, width), dtype='float64')
+        self.input_is_float = numpy.zeros((self.lanes, width), dtype=bool)
+        for lane, inputs in enumerate(input_sets):
+            for position, value in enumerate(inputs):
+                if type(value) is int:
+                    if abs(value) > INT_LIMIT:
+                        raise NotLaneable(f"input {value} is too large for an int lane")
+                    self.int_inputs[lane, position] = value
+                elif type(value) is float:
+                    self.float_inputs[lane, position] = value
+                    self.input_is_float[lane, position] = True
+                else:
+                    raise NotLaneable(f"input {value!r} is not an int or a float")
+
+    def run(self):
+        with self.numpy.errstate(all='ignore'):  # Lanes a mask has switched off may compute anything
+            for statement in self.ast:
+                self.execute(statement, None)
+        return self
+
+    def execute(self, node, mask):
+        """Runs a statement in the lanes of `mask` (None for every lane), which has at least one lane."""
+        if isinstance(node, BlockNode):
+            for statement in node.statements:
+                self.execute(statement, mask)
+
+        elif isinstance(node, AssignmentNode):
+            self.assign(node.identifier.name, self.evaluate(node.value, mask), mask)
+
+        elif isinstance(node, (IncrementNode, DecrementNode)):
+            name = node.identifier.name
+            step = 1 if isinstance(node, IncrementNode) else -1
+            self.assign(name, self.arithmetic('+', self.load(name, mask), step), mask)
+
+        elif isinstance(node, CinNode):
+            name = node.identifier.name
+            self.load(name, mask)  # `cin` needs the variable to exist
+            self.assign(name, self.read_input(name, mask), mask)
+
+        elif isinstance(node, PrintNode):
+            value = self.evaluate(node.value, mask)
+            if value is None:
+                raise NotLaneable("printing a value that is not set")
+            self.printed.append((mask, value))
+
+        elif isinstance(node, IfNode):
+            condition = self.truth(self.evaluate(node.condition, mask))
+            if not isinstance(condition, self.numpy.ndarray):
+                branch = node.then_branch if condition else node.else_branch
+                if branch:
+                    self.execute(branch, mask)
+                return
+            taken = self.restrict(mask, condition)
+            if taken is not None:
+                self.execute(node.then_branch, taken)
+            if node.else_branch:
+                skipped = self.restrict(mask, ~condition)
+                if skipped is not None:
+                    self.execute(node.else_branch, skipped)
+
+        elif isinstance(node, WhileNode):
+            self.loop(node.condition, node.body, None, mask)
+
+        elif isinstance(node, ForNode):
+            self.execute(node.initialization, mask)
+            self.loop(node.condition, node.body, node.increment, mask)
+
+        elif isinstance(node, (FunctionDefinitionNode, NoOpNode)):
+            pass  # The linker has already made the function table; calls are not laneable
+
+        else:
+            raise NotLaneable(f"{type(node).__name__} does not run in lanes")
+
+    def loop(self, condition_node, body, increment, mask):
+        """Runs a loop body while its condition holds in at least one lane, in only those lanes."""
+        active = mask
+        while True:
+            condition = self.truth(self.evaluate(condition_node, active))
+            if isinstance(condition, self.numpy.ndarray):
+                active = self.restrict(active, condition)
+                if active is None:
+                    return
+            elif not condition:
+                return
+            self.execute(body, active)
+            if increment is not None:
+                self.execute(increment, active)
+
+    def restrict(self, mask, condition):
+        """The lanes of `mask` where `condition` holds, or None when there are none."""
+        lanes = condition if mask is None else mask & condition
+        return lanes if lanes.any() else None
+
+    def evaluate(self, node, mask):
+        """The value of an expression in the lanes of `mask`; other lanes get values nobody reads."""
+        if isinstance(node, NumberNode):
+            return node.value
+
+        elif isinstance(node, IdentifierNode):
+            return self.load(node.name, mask)
+
+        elif isinstance(node, BinaryOperationNode):
+            left = self.evaluate(node.left, mask)
+            right = self.evaluate(node.right, mask)
+            if node.operator in COMPARISONS:
+                self.check_numeric(left, right, node.operator)
+                return COMPARISONS[node.operator](left, right)
+            if node.operator == '/':
+                self.check_divisor(right, mask)
+            return self.arithmetic(node.operator, left, right)
+
+        elif isinstance(node, LogicalOperationNode):
+            left = self.truth(self.evaluate(node.left, mask))
+            if not isinstance(left, self.numpy.ndarray):
+                if left == (node.operator == '||'):
+                    return left
+                return self.truth(self.evaluate(node.right, mask))
+            # The right side only runs in the lanes where the left side does not decide
+            lanes = self.restrict(mask, left if node.operator == '&&' else ~left)
+            if lanes is None:
+                return left
+            right = self.truth(self.evaluate(node.right, lanes))
+            return left & right if node.operator == '&&' else left | right
+
+        elif isinstance(node, NotNode):
+            condition = self.truth(self.evaluate(node.operand, mask))
+            return ~condition if isinstance(condition, self.numpy.ndarray) else not condition
+
+        elif isinstance(node, StringNode):
+            return node.value
+
+        raise NotLaneable(f"{type(node).__name__} does not run in lanes")
+
+    def load(self, name, mask):
+        if name not in self.variables:
+            raise NotLaneable(f"'{name}' is used before it is set")
+        defined = self.defined[name]
+        if defined is not None and not self.covers(defined, mask):
+            raise NotLaneable(f"'{name}' is used in a lane where it is not set")
+        return self.variables[name]
+
+    def assign(self, name, value, mask):
+        kind = self.kind(value)
+        if kind == 's':
+            raise NotLaneable(f"string value assigned to '{name}'")
+        if kind == 'i' and not isinstance(value, self.numpy.ndarray) and abs(value) > INT_LIMIT:
+            raise NotLaneable(f"{value} is too large for an int lane")
+        if mask is None:
+            self.variables[name] = value
+            self.defined[name] = None
+            return
+        numpy = self.numpy
+        if name in self.variables:
+            old, defined = self.variables[name], self.defined[name]
+            kept = ~mask if defined is None else defined & ~mask
+            if self.kind(old) != kind and kept.any():
+                raise NotLaneable(f"'{name}' would hold a different type in different lanes")
+            defined = None if defined is None else defined | mask
+        else:
+            old, defined = 0, mask
+        lanes = numpy.broadcast_to(numpy.asarray(value), (self.lanes,))
+        self.variables[name] = numpy.where(mask, lanes, numpy.asarray(old).astype(lanes.dtype))
+        self.defined[name] = defined
+
+    def read_input(self, name, mask):
+        numpy = self.numpy
+        exhausted = self.cursor >= self.input_counts
+        if (exhausted if mask is None else exhausted & mask).any():
+            raise NotLaneable(f"a lane has no input left for '{name}'")
+        lanes = numpy.arange(self.lanes)
+        position = numpy.minimum(self.cursor, max(self.int_inputs.shape[1] - 1, 0))
+        is_float = self.input_is_float[lanes, position]
+        chosen = is_float if mask is None else is_float[mask]
+        if chosen.any() and not chosen.all():
+            raise NotLaneable(f"'{name}' reads an int in some lanes and a float in others")
+        values = (self.float_inputs if chosen.all() else self.int_inputs)[lanes, position]
+        self.cursor = self.cursor + (1 if mask is None else mask)
+        return values
+
+    def arithmetic(self, operator_name, left, right):
+        """`left op right` with Python's results: bools count as ints and ints stay exact."""
+        self.check_numeric(left, right, operator_name)
+        left, right = self.as_number(left), self.as_number(right)
+        if operator_name != '/' and self.kind(left) == 'i' and self.kind(right) == 'i':
+            bound = self.bound(left), self.bound(right)
+            largest = bound[0] * bound[1] if operator_name == '*' else bound[0] + bound[1]
+            if largest > INT_LIMIT:
+                raise NotLaneable(f"an int result may exceed {INT_LIMIT}")
+        elif operator_name == '/' and INT_LIMIT < max(self.bound(left), self.bound(right)):
+            raise NotLaneable("dividing ints too large to convert to float exactly")
+        return ARITHMETIC[operator_name](left, right)
+
+    def check_divisor(self, right, mask):
+        zero = right == 0
+        if isinstance(zero, self.numpy.ndarray):
+            zero = zero.any() if mask is None else (zero & mask).any()
+        if zero:
+            raise NotLaneable("division by zero in a lane")
+
+    def check_numeric(self, left, right, operator_name):
+        if self.kind(left) == 's' or self.kind(right) == 's':
+            raise NotLaneable(f"string operand of '{operator_name}'")
+
+    def truth(self, value):
+        """The value as a condition: a bool, or an array of them."""
+        if isinstance(value, self.numpy.ndarray):
+            return value if value.dtype.kind == 'b' else value != 0
+        if self.kind(value) == 's':
+            raise NotLaneable("string used as a condition")
+        return bool(value)
+
+    def as_number(self, value):
+        if isinstance(value, self.numpy.ndarray):
+            return value.astype('int64') if value.dtype.kind == 'b' else value
+        return int(value) if type(value) is bool else value
+
+    def kind(self, value):
+        """'i', 'f', 'b' or 's': the type every lane of `value` has."""
+        if isinstance(value, self.numpy.ndarray):
+            return value.dtype.kind
+        if type(value) is bool:
+            return 'b'
+        if type(value) is int:
+            return 'i'
+        if type(value) is float:
+            return 'f'
+        return 's'
+
+    def bound(self, value):
+        """The largest magnitude `value` has in any lane, as a Python number."""
+        if isinstance(value, self.numpy.ndarray):
+            return int(self.numpy.abs(value).max()) if value.size else 0
+        return abs(value)
+
+    def covers(self, defined, mask):
+        return defined.all() if mask is None else not (mask & ~defined).any()
+
+    def outputs(self):
+        """The lines each lane printed, as a list per lane."""
+        numpy = self.numpy
+        outputs = [[] for _ in range(self.lanes)]
+        for mask, value in self.printed:
+            lanes = range(self.lanes) if mask is None else numpy.flatnonzero(mask).tolist()
+            if isinstance(value, numpy.ndarray):
+                values = value.tolist()
+                for lane in lanes:
+                    outputs[lane].append(f"{values[lane]}\n")
+            else:
+                line = str(value) + "\n"
+                for lane in lanes:
+                    outputs[lane].append(line)
+        return outputs
+
+    def symbol_tables(self):
+        """The variables each lane ended with, as a dict per lane."""
+        tables = [{} for _ in range(self.lanes)]
+        for name, value in self.variables.items():
+            values = value.tolist() if isinstance(value, self.numpy.ndarray) else [value] * self.lanes
+            defined = self.defined[name]
+            lanes = range(self.lanes) if defined is None else self.numpy.flatnonzero(defined).tolist()
+            for lane in lanes:
+                tables[lane][name] = values[lane]
+        return tables
+
+
+def check_laneable(ast):
+    """Raises NotLaneable naming the first construct the lanes cannot run."""
+    pending = list(reversed(ast))
+    while pending:
+        node = pending.pop()
+        children = LANE_NODES.get(type(node))
+        if children is None:
+            raise NotLaneable(f"{type(node).__name__} does not run in lanes")
+        for name in reversed(children):
+            child = getattr(node, name)
+            if isinstance(child, list):
+                pending.extend(reversed(child))
+            elif child is not None or name not in ('else_branch', 'increment'):
+                pending.append(child)
@@ -1,4 +1,13 @@
+from .source import LineIndex
+
+
 class Lexer:
+    """Splits source text into (type, value, start, end) tokens.
+
+    `start` and `end` are offsets into the text; `lines` is the LineIndex
+    of the last tokenized text, which turns them into lines and columns.
+    """
+
     TOKENS = {
         '+': 'ADDITION',
         '-': 'SUBTRACTION',
@@ -9,10 +18,17 @@ class Lexer:
         ')': 'RPAREN',
         '{': 'LBRACE',
         '}': 'RBRACE',
+        '[': 'LBRACKET',
+        ']': 'RBRACKET',
         'for': 'FOR',
+        'parallel': 'PARALLEL',
         'if': 'IF',
         'else': 'ELSE',
         'while': 'WHILE',
+        'switch': 'SWITCH',
+        'case': 'CASE',
+        'default': 'DEFAULT',
+        ':': 'COLON',
         'return': 'RETURN',
         ';': 'SEMICOLON',
         '>': 'GREATER_THAN',
@@ -21,6 +37,9 @@ class Lexer:
         '<=': 'LESS_EQUAL',
         '==': 'EQUAL',
         '!=': 'NOT_EQUAL',
+        '&&': 'AND',
+        '||': 'OR',
+        '!': 'NOT',
         'cout': 'COUT',
         'cin': 'CIN',
         '<<': 'SHIFT_LEFT',
@@ -42,9 +61,10 @@ class Lexer:
     }
 
     def __init__(self):  
-        pass
+        self.lines = None
 
     def tokenize(self, input):
+        self.lines = LineIndex(input)
         tokens = []
         i = 0
         while i < len(input):
@@ -52,17 +72,18 @@ class Lexer:
             if char.isspace():
                 i += 1
                 continue
+            start = i
 
             # Check for multi-character tokens FIRST
             if i + 1 < len(input) and char + input[i + 1] in self.TOKENS:
                 double_char = char + input[i + 1]
-                tokens.append((self.TOKENS[double_char], double_char))
                 i += 2  # Advance past both characters
+                tokens.append((self.TOKENS[double_char], double_char, start, i))
                 continue
 
             if char in self.TOKENS:
-                tokens.append((self.TOKENS[char], char))
                 i += 1
+                tokens.append((self.TOKENS[char], char, start, i))
                 continue
 
             if char.isdigit():
@@ -72,14 +93,14 @@ class Lexer:
                 while i < len(input) and (input[i].isdigit() or input[i] == '.'):
                     if input[i] == '.':
                         if has_decimal:
-                            raise ValueError("Invalid number format: Multiple decimal points" + "\n")
+                            raise self.error("Invalid number format: Multiple decimal points", start)
                         has_decimal = True
                     num += input[i]
                     i += 1
                 if has_decimal:
-                    tokens.append(('FLOAT', float(num)))
+                    tokens.append(('FLOAT', float(num), start, i))
                 else:
-                    tokens.append(('INT', int(num)))
+                    tokens.append(('INT', int(num), start, i))
                 continue
 
             if char == '"':
@@ -89,9 +110,9 @@ class Lexer:
                     string_value += input[i]
                     i += 1
                 if i == len(input):
-                    raise ValueError("Unterminated string" + "\n")
-                tokens.append(('STRING', string_value))
+                    raise self.error("Unterminated string", start)
                 i += 1
+                tokens.append(('STRING', string_value, start, i))
                 continue
 
             if char.isalpha() or char == '_':
@@ -101,9 +122,9 @@ class Lexer:
                     ident += input[i]
                     i += 1
                 if ident in self.TOKENS:
-                    tokens.append((self.TOKENS[ident], ident))
+                    tokens.append((self.TOKENS[ident], ident, start, i))
                 else:
-                    tokens.append(('IDENTIFIER', ident))
+                    tokens.append(('IDENTIFIER', ident, start, i))
                 continue
 
             if char == '\"':  # Start of a string literal
@@ -113,10 +134,13 @@ class Lexer:
                     string_value += input[i]
                     i += 1
                 if i >= len(input) or input[i] != '\"':
-                    raise ValueError("Unterminated string literal" + "\n")
+                    raise self.error("Unterminated string literal", start)
                 i += 1  # Skip closing quote
-                tokens.append(('STRING', string_value))
+                tokens.append(('STRING', string_value, start, i))
                 continue
 
-            raise ValueError(f"Unknown character: {char}" + "\n")
-        return tokens
\ No newline at end of file
+            raise self.error(f"Unknown character: {char}", start)
+        return tokens
+
+    def error(self, message, offset):
+        return ValueError(f"{message} (at {self.lines.describe(offset)})" + "\n")
\ No newline at end of file
@@ -0,0 +1,71 @@
+from .ast_nodes import FunctionDefinitionNode, FunctionCallNode, walk
+
+
+def link_program(statements, builtins):
+    """Resolves every call in a parsed program; returns the function table.
+
+    All `FunctionDefinitionNode`s are collected by name, wherever they
+    appear, and each `FunctionCallNode` gets its callee: the builtin of that
+    name if there is one, otherwise the program's definition. Unknown names,
+    functions defined twice or over a builtin, and calls with the wrong
+    number of arguments are reported here instead of when the call runs.
+    """
+    functions = {}
+    for statement in statements:
+        for node in walk(statement):
+            if isinstance(node, FunctionDefinitionNode):
+                if node.name in builtins:
+                    raise ValueError(f"Function '{node.name}' is already defined as a builtin")
+                if node.name in functions:
+                    raise ValueError(f"Function '{node.name}' is defined more than once")
+                functions[node.name] = node
+
+    for statement in statements:
+        for node in walk(statement):
+            if isinstance(node, FunctionCallNode):
+                node.callee = resolve(node, functions, builtins)
+    return functions
+
+
+def resolve(node, functions, builtins):
+    """The callee of one call, after checking the argument count."""
+    callee = builtins.get(node.name)
+    if callee is not None:
+        expected = callee.arity
+    else:
+        callee = functions.get(node.name)
+        if callee is None:
+            raise ValueError(f"Undefined function: {node.name}")
+        expected = len(callee.parameters)
+    if len(node.arguments) != expected:
+        raise ValueError(
+            f"Incorrect number of arguments for function {node.name}. Expected {expected}, got {len(node.arguments)}"
+        )
+    return callee
+
+
+def link_code(codes, functions, builtins):
+    """Replaces the name-based CALLs in assembled bytecode with direct calls.
+
+    `CALL_CODE` holds the callee's CodeObject and `CALL_NATIVE` the builtin's
+    function, so the VM neither looks the name up nor checks the argument
+    count when the call runs.
+    """
+    for code in codes:
+        for index, (op, arg) in enumerate(code.instructions):
+            if op != 'CALL':
+                continue
+            name, argument_count = arg
+            native = builtins.get(name)
+            if native is not None:
+                expected = native.arity
+                code.instructions[index] = ('CALL_NATIVE', (native.call, argument_count))
+            elif name in functions:
+                expected = functions[name].parameter_count
+                code.instructions[index] = ('CALL_CODE', (functions[name], argument_count))
+            else:
+                raise ValueError(f"Undefined function: {name}")
+            if argument_count != expected:
+                raise ValueError(
+                    f"Incorrect number of arguments for function {name}. Expected {expected}, got {argument_count}"
+                )
@@ -0,0 +1,237 @@
+from .ast_nodes import (
+    BlockNode, NumberNode, StringNode, IdentifierNode, BinaryOperationNode,
+    AssignmentNode, IfNode, ForNode, WhileNode, IncrementNode, DecrementNode,
+    CinNode, PrintNode, FunctionDefinitionNode, FunctionCallNode, ReturnNode, NoOpNode,
+    LogicalOperationNode, NotNode, SwitchNode
+)
+from .ir import Const, Instruction, IRFunction, IRModule
+
+
+def lower_program(statements):
+    """Lowers a parsed program to an IRModule."""
+    functions = {}
+    for statement in statements:
+        if isinstance(statement, FunctionDefinitionNode):
+            functions[statement.name] = FunctionLowering(statement.name, statement.parameters).lower_function(statement)
+
+    main = FunctionLowering("<main>", [])
+    main.function.exported = True  # Top-level variables end up in the symbol table
+    for statement in statements:
+        if not isinstance(statement, FunctionDefinitionNode):
+            main.statement(statement)
+    main.finish()
+    return IRModule(main.function, functions)
+
+
+def writes(node, name):
+    """Checks whether evaluating an expression assigns the variable `name`."""
+    if isinstance(node, (IncrementNode, DecrementNode)):
+        return node.identifier.name == name
+    if isinstance(node, (BinaryOperationNode, LogicalOperationNode)):
+        return writes(node.left, name) or writes(node.right, name)
+    if isinstance(node, NotNode):
+        return writes(node.operand, name)
+    if isinstance(node, FunctionCallNode):
+        return any(writes(argument, name) for argument in node.arguments)
+    return False
+
+
+class FunctionLowering:
+    """Lowers the statements of one function into basic blocks of three-address code."""
+
+    def __init__(self, name, parameters):
+        self.function = IRFunction(name, [param['name'] for param in parameters])
+        self.block = self.function.new_block("entry")
+
+    def lower_function(self, definition):
+        if not isinstance(definition.body, BlockNode):
+            raise NotImplementedError("Function body must be a BlockNode")
+        self.statements(definition.body.statements)
+        self.finish()
+        return self.function
+
+    def finish(self):
+        if self.block.terminator is None:
+            self.emit(Instruction('return', args=[Const(None)]))
+        self.function.build_cfg()
+
+    def emit(self, instruction):
+        self.block.instructions.append(instruction)
+        return instruction
+
+    def jump(self, target):
+        if self.block.terminator is None:
+            self.emit(Instruction('jump', targets=[target]))
+
+    def start(self, block):
+        self.block = block
+
+    def statements(self, statements):
+        for statement in statements:
+            self.statement(statement)
+
+    def statement(self, node):
+        if self.block.terminator is not None:
+            # Code after a return is unreachable but still has to be well formed
+            self.start(self.function.new_block("dead"))
+
+        if isinstance(node, AssignmentNode):
+            value = Const(None) if node.value is None else self.expression(node.value)
+            self.emit(Instruction('copy', node.identifier.name, [value]))
+
+        elif isinstance(node, PrintNode):
+            self.emit(Instruction('print', args=[self.expression(node.value)], span=node.span))
+
+        elif isinstance(node, IfNode):
+            then_block = self.function.new_block("then")
+            end_block = self.function.new_block("endif")
+            else_block = self.function.new_block("else") if node.else_branch else end_block
+            self.condition(node.condition, then_block, else_block)
+            self.start(then_block)
+            self.statements(node.then_branch.statements)
+            self.jump(end_block)
+            if node.else_branch:
+                self.start(else_block)
+                self.statements(node.else_branch.statements)
+                self.jump(end_block)
+            self.start(end_block)
+
+        elif isinstance(node, SwitchNode):
+            value = self.expression(node.expression)
+            end_block = self.function.new_block("endswitch")
+            case_blocks = [self.function.new_block("case") for _ in node.cases]
+            default_block = end_block
+            if node.default:
+                # A default stacked on a case label shares that case's block
+                default_block = next((block for (_, body), block in zip(node.cases, case_blocks)
+                                      if body is node.default), None) or self.function.new_block("default")
+            values, targets = [], []
+            for (case_values, _), block in zip(node.cases, case_blocks):
+                values.extend(case_values)
+                targets.extend([block] * len(case_values))
+            self.emit(Instruction('switch', args=[value], targets=[default_block] + targets, attr=values,
+                                  span=node.span))
+            for (_, body), block in zip(node.cases, case_blocks):
+                self.start(block)
+                self.statements(body.statements)
+                self.jump(end_block)
+            if node.default and default_block not in case_blocks:
+                self.start(default_block)
+                self.statements(node.default.statements)
+                self.jump(end_block)
+            self.start(end_block)
+
+        elif isinstance(node, (ForNode, WhileNode)):
+            if not isinstance(node.body, BlockNode):
+                raise NotImplementedError("Loop body must be a BlockNode")
+            if isinstance(node, ForNode):
+                self.statement(node.initialization)
+            header = self.function.new_block("loop")
+            body = self.function.new_block("body")
+            exit_block = self.function.new_block("endloop")
+            self.jump(header)
+            self.start(header)
+            self.condition(node.condition, body, exit_block)
+            self.start(body)
+            self.statements(node.body.statements)
+            if isinstance(node, ForNode):
+                self.statement(node.increment)
+            self.jump(header)
+            self.start(exit_block)
+
+        elif isinstance(node, BlockNode):
+            self.statements(node.statements)
+
+        elif isinstance(node, ReturnNode):
+            # At the top level too: a return ends the program, as in the interpreter
+            self.emit(Instruction('return', args=[self.expression(node.expression)], span=node.span))
+
+        elif isinstance(node, CinNode):
+            name = node.identifier.name
+            self.emit(Instruction('input', name, attr=name, span=node.span))
+
+        elif isinstance(node, NoOpNode):
+            pass
+
+        elif isinstance(node, FunctionDefinitionNode):
+            raise NotImplementedError("Nested function definitions are not supported")
+
+        else:
+            self.expression(node)
+
+    def condition(self, node, true_block, false_block):
+        """Emits branches to `true_block` or `false_block` depending on a condition.
+
+        `&&`, `||` and `!` become control flow rather than values, so each
+        comparison branches straight to where evaluation continues.
+        """
+        if isinstance(node, LogicalOperationNode):
+            right_block = self.function.new_block("and" if node.operator == '&&' else "or")
+            if node.operator == '&&':
+                self.condition(node.left, right_block, false_block)
+            else:
+                self.condition(node.left, true_block, right_block)
+            self.start(right_block)
+            self.condition(node.right, true_block, false_block)
+        elif isinstance(node, NotNode):
+            self.condition(node.operand, false_block, true_block)
+        else:
+            condition = self.expression(node)
+            self.emit(Instruction('branch', args=[condition], targets=[true_block, false_block], span=node.span))
+
+    def expression(self, node):
+        """Emits the code for an expression and returns the operand holding its value."""
+        if isinstance(node, (NumberNode, StringNode)):
+            return Const(node.value)
+
+        elif isinstance(node, IdentifierNode):
+            return node.name
+
+        elif isinstance(node, BinaryOperationNode):
+            left = self.expression(node.left)
+            if isinstance(left, str) and writes(node.right, left):
+                # The right operand changes the variable; keep the value read on the left
+                snapshot = self.function.new_temp()
+                self.emit(Instruction('copy', snapshot, [left]))
+                left = snapshot
+            right = self.expression(node.right)
+            result = self.function.new_temp()
+            self.emit(Instruction('binary', result, [left, right], attr=node.operator, span=node.span))
+            return result
+
+        elif isinstance(node, (LogicalOperationNode, NotNode)):
+            # The value is True or False, whatever the operands were
+            result = self.function.new_temp()
+            true_block = self.function.new_block("true")
+            false_block = self.function.new_block("false")
+            end_block = self.function.new_block("endcond")
+            self.condition(node, true_block, false_block)
+            self.start(true_block)
+            self.emit(Instruction('copy', result, [Const(True)]))
+            self.jump(end_block)
+            self.start(false_block)
+            self.emit(Instruction('copy', result, [Const(False)]))
+            self.jump(end_block)
+            self.start(end_block)
+            return result
+
+        elif isinstance(node, (IncrementNode, DecrementNode)):
+            name = node.identifier.name
+            operator = '+' if isinstance(node, IncrementNode) else '-'
+            self.emit(Instruction('binary', name, [name, Const(1)], attr=operator, span=node.span))
+            return name
+
+        elif isinstance(node, FunctionCallNode):
+            arguments = []
+            for index, argument in enumerate(node.arguments):
+                value = self.expression(argument)
+                if isinstance(value, str) and any(writes(later, value) for later in node.arguments[index + 1:]):
+                    snapshot = self.function.new_temp()
+                    self.emit(Instruction('copy', snapshot, [value]))
+                    value = snapshot
+                arguments.append(value)
+            result = self.function.new_temp()
+            self.emit(Instruction('call', result, arguments, attr=node.name, span=node.span))
+            return result
+
+        raise NotImplementedError(f"Cannot lower AST node: {node}")
@@ -70,8 +70,8 @@ class MiniCompilerUI:
         self.status_bar = ctk.CTkLabel(root, text="Ready", anchor=tk.W)
         self.status_bar.pack(fill=tk.X, padx=10, pady=2)
 
-        # Initialize Compiler
-        self.compiler = Compiler(ui=self)
+        # Initialize Compiler; the editor shows every error of a run, so it keeps going after one
+        self.compiler = Compiler(ui=self, continue_on_error=True)
 
 
     def create_menu(self):
@@ -339,8 +339,8 @@ class MiniCompilerUI:
         """Print all tokens for debugging"""
         print("\n===== TOKEN DEBUG =====")
         for i, token in enumerate(tokens):
-            token_type, token_value = token
-            print(f"{i:3}: {token_type:15} | {repr(token_value)}")
+            token_type, token_value, start, end = token
+            print(f"{i:3}: {token_type:15} | {repr(token_value):20} | {start}-{end}")
         print("=======================\n")
 
     def validate_input(code):
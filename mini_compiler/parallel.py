@@ -0,0 +1,249 @@
+import os
+
+from .arrays import numpy, ndarray, load_numpy, on_numpy_loaded
+from .ast_nodes import AssignmentNode, IncrementNode, DecrementNode, CinNode, ForNode, walk
+from .errors import execution_error
+
+# Loops with fewer iterations run their chunks in this process; a pool costs more than it saves
+PARALLEL_MIN_ITERATIONS = 2000
+CHUNKS_PER_WORKER = 4
+
+
+def _bind_numpy(module):
+    global numpy, ndarray
+    numpy, ndarray = module, module.ndarray
+
+
+on_numpy_loaded(_bind_numpy)
+
+
+class ParallelJob:
+    """Everything a worker needs to run chunks of one `parallel for`: shipped once per worker.
+
+    `variables` is a snapshot of the symbol table when the loop starts. In a
+    worker process, arrays in it are replaced by SharedArray descriptors so
+    element stores reach the parent.
+    """
+
+    def __init__(self, node, variable, variables, builtins):
+        self.node = node  # Its calls are linked, so the functions they call travel with it
+        self.variable = variable
+        self.variables = variables
+        self.builtins = builtins  # The evaluator's BuiltinRegistry; host functions must be picklable for a pool
+
+
+class ChunkResult:
+    def __init__(self, output, reductions, assigned):
+        self.output = output          # Lines printed by the chunk, in order
+        self.reductions = reductions  # Reduction variable -> value at the end of the chunk
+        self.assigned = assigned      # Other variables the chunk stored to -> value at the end of the chunk
+
+
+class ChunkVariables(dict):
+    """A chunk's copy of the variables, which remembers the names stored to.
+
+    Used when the body writes a variable under a condition, so only some
+    chunks may write it; whether one did cannot be told from the value.
+    """
+
+    def __init__(self, variables):
+        super().__init__(variables)
+        self.written = set()
+
+    def __setitem__(self, name, value):
+        self.written.add(name)
+        dict.__setitem__(self, name, value)
+
+
+class SharedArray:
+    """Descriptor of an array copied into shared memory, which a worker maps back into an ndarray."""
+
+    def __init__(self, memory_name, dtype, shape):
+        self.memory_name = memory_name
+        self.dtype = dtype
+        self.shape = shape
+
+
+def assigned_names(node):
+    return {child.identifier.name for child in walk(node)
+            if isinstance(child, (AssignmentNode, IncrementNode, DecrementNode, CinNode))}
+
+
+def always_assigned_names(body):
+    """Names a statement at the top of the loop body assigns, which every iteration writes."""
+    names = set()
+    for statement in body.statements:
+        if isinstance(statement, ForNode):
+            statement = statement.initialization
+        if isinstance(statement, (AssignmentNode, IncrementNode, DecrementNode, CinNode)):
+            names.add(statement.identifier.name)
+    return names
+
+
+def split_range(start, stop, chunks):
+    """Splits [start, stop) into at most `chunks` contiguous, non-empty ranges, in order."""
+    count = stop - start
+    chunks = max(1, min(chunks, count))
+    size, extra = divmod(count, chunks)
+    ranges = []
+    for index in range(chunks):
+        end = start + size + (1 if index < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def run_parallel(node, ev, workers=None):
+    """Runs a ParallelForNode for the evaluator `ev`.
+
+    The counter range is split into contiguous chunks. Every chunk starts
+    from the same snapshot of the variables, with `sum` variables reset to
+    zero, and returns what it printed plus its final values. The results
+    are merged in chunk order, so output comes out exactly as a sequential
+    run prints it. Reductions are combined across chunks (`sum` adds the
+    partial sums to the value before the loop; `min`/`max` keep the
+    extreme), and other variables the body assigns keep the value from the
+    last chunk that assigned them, as after a sequential run. Array stores
+    go to shared memory and are copied back.
+    """
+    loop = node.loop
+    variable = loop.initialization.identifier.name
+    ev.evaluate(loop.initialization)
+    start = ev.symbol_table.get(variable)
+    stop = ev.evaluate(loop.condition.right)
+    if type(start) is not int or type(stop) is not int:
+        raise TypeError("parallel for bounds must be integers")
+    if loop.condition.operator == '<=':
+        stop += 1
+
+    assigned = assigned_names(loop.body)
+    if variable in assigned:
+        raise ValueError(f"parallel for body must not assign the counter '{variable}'")
+    for operation, name in node.reductions:
+        if name not in ev.symbol_table:
+            raise ValueError(f"Reduction variable '{name}' must be assigned before the parallel loop")
+        value = ev.symbol_table[name]
+        if operation == 'sum' and type(value) not in (int, float):
+            raise TypeError(f"sum reduction needs a number, but '{name}' holds {type(value).__name__}")
+
+    if stop > start:
+        workers = workers or os.cpu_count() or 1
+        chunks = split_range(start, stop, workers * CHUNKS_PER_WORKER)
+        job = ParallelJob(node, variable, dict(ev.symbol_table), ev.builtins)
+        if workers == 1 or stop - start < PARALLEL_MIN_ITERATIONS:
+            results = [run_chunk(job, chunk_start, chunk_stop, type(ev)(None, ev.ui, ev.tiers, ev.builtins))
+                       for chunk_start, chunk_stop in chunks]
+        else:
+            results = run_in_pool(job, chunks, workers)
+        merge_results(node, ev, results)
+
+    ev.symbol_table[variable] = max(start, stop)
+
+
+def run_chunk(job, start, stop, evaluator):
+    """Runs iterations [start, stop) of the job's loop on a private copy of the variables."""
+    body = job.node.loop.body
+    variable = job.variable
+    reduction_names = {name for _, name in job.node.reductions}
+    always = always_assigned_names(body) - reduction_names - {variable}
+    # Recording stores slows every one of them, so only bodies with conditional writes pay for it
+    sometimes = assigned_names(body) - always - reduction_names - {variable}
+    variables = ChunkVariables(job.variables) if sometimes else dict(job.variables)
+    for operation, name in job.node.reductions:
+        if operation == 'sum':
+            dict.__setitem__(variables, name, type(variables[name])())
+    evaluator.symbol_table = variables
+    evaluator.output = []
+
+    for counter in range(start, stop):
+        dict.__setitem__(variables, variable, counter)
+        evaluator.evaluate(body)
+
+    written = always | (sometimes & variables.written) if sometimes else always
+    return ChunkResult(evaluator.output,
+                       {name: variables[name] for name in reduction_names},
+                       {name: variables[name] for name in written if name in variables})
+
+
+def merge_results(node, ev, results):
+    for result in results:
+        ev.output.extend(result.output)
+
+    for operation, name in node.reductions:
+        partials = [result.reductions[name] for result in results]
+        if operation == 'sum':
+            total = ev.symbol_table[name]
+            for partial in partials:
+                total += partial
+            ev.symbol_table[name] = total
+        elif operation == 'min':
+            ev.symbol_table[name] = min(partials)
+        else:
+            ev.symbol_table[name] = max(partials)
+
+    for result in results:
+        ev.symbol_table.update(result.assigned)  # In chunk order, so the last chunk that wrote a name wins
+
+
+def run_in_pool(job, chunks, workers):
+    """Runs the chunks on a process pool; arrays are shared with the workers through shared memory."""
+    # Imported here: the pool machinery costs more to import than most programs take to run
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing.shared_memory import SharedMemory
+
+    memories = {}
+    variables = {}
+    try:
+        for name, value in job.variables.items():
+            if type(value) is ndarray:
+                memory = SharedMemory(create=True, size=max(1, value.nbytes))
+                numpy.ndarray(value.shape, value.dtype, buffer=memory.buf)[...] = value
+                memories[name] = memory
+                value = SharedArray(memory.name, value.dtype.str, value.shape)
+            variables[name] = value
+
+        shipped = ParallelJob(job.node, job.variable, variables, job.builtins)
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_start_worker,
+                                 initargs=(shipped,)) as executor:
+            results = list(executor.map(_run_worker_chunk, *zip(*chunks)))
+
+        for name, memory in memories.items():
+            array = job.variables[name]
+            array[...] = numpy.ndarray(array.shape, array.dtype, buffer=memory.buf)
+        return results
+    finally:
+        for memory in memories.values():
+            memory.close()
+            memory.unlink()
+
+
+# State of a worker process: its job, the evaluator chunks run on and the shared memory it maps
+_worker = None
+
+
+def _start_worker(job):
+    # Imported here because the evaluator imports this module
+    from multiprocessing.shared_memory import SharedMemory
+    from .evaluator import Evaluator
+    from .tiering import TieredExecution
+
+    global _worker
+    memories = []
+    for name, value in job.variables.items():
+        if isinstance(value, SharedArray):
+            load_numpy()  # A fresh worker process has made no array yet
+            memory = SharedMemory(name=value.memory_name)
+            memories.append(memory)
+            job.variables[name] = numpy.ndarray(value.shape, numpy.dtype(value.dtype), buffer=memory.buf)
+    evaluator = Evaluator(None, None, TieredExecution(background=False), job.builtins)
+    evaluator.parallel_workers = 1  # Worker processes cannot start pools of their own
+    _worker = (job, evaluator, memories)
+
+
+def _run_worker_chunk(start, stop):
+    job, evaluator, _ = _worker
+    try:
+        return run_chunk(job, start, stop, evaluator)
+    except Exception as error:
+        # Only the exception reaches the parent, so the failing node is read from the traceback here
+        raise execution_error(error) from None
@@ -0,0 +1,450 @@
+import copy
+
+from .ast_nodes import (
+    BlockNode, NumberNode, StringNode, IdentifierNode, BinaryOperationNode,
+    AssignmentNode, IfNode, ForNode, WhileNode, IncrementNode, DecrementNode,
+    CinNode, PrintNode, FunctionDefinitionNode, FunctionCallNode, ReturnNode, NoOpNode,
+    ArrayDeclarationNode, IndexNode, IndexAssignmentNode, VectorizedLoopNode, ParallelForNode,
+    LogicalOperationNode, NotNode, SwitchNode
+)
+from .bytecode import BINARY_FUNCTIONS
+from .builtins import default_builtins
+from .control import RETURN
+from .rope import Rope
+from .switch import switch_value
+
+
+class BudgetExceeded(Exception):
+    """Raised when compile-time evaluation runs out of steps."""
+
+
+class ConstantInterpreter:
+    """Runs calls to pure functions at compile time, giving up after a fixed number of steps.
+
+    `execute` follows the evaluator's protocol for `return`: it stores the
+    value and hands RETURN up through the enclosing statements.
+    """
+
+    def __init__(self, functions, step_budget, builtins):
+        self.functions = functions
+        self.steps_left = step_budget
+        self.builtins = builtins
+        self.return_value = None
+
+    def call(self, name, arguments):
+        native = self.builtins.get(name)
+        if native is not None:
+            return native.call(arguments)
+        definition = self.functions[name]
+        scope = dict(zip(definition.parameter_names, arguments))
+        if self.execute(definition.body, scope) is RETURN:
+            return self.return_value
+        return None
+
+    def tick(self):
+        self.steps_left -= 1
+        if self.steps_left < 0:
+            raise BudgetExceeded()
+
+    def execute(self, node, scope):
+        self.tick()
+        if isinstance(node, AssignmentNode):
+            scope[node.identifier.name] = self.evaluate(node.value, scope)
+        elif isinstance(node, ReturnNode):
+            self.return_value = self.evaluate(node.expression, scope)
+            return RETURN
+        elif isinstance(node, IfNode):
+            if self.evaluate(node.condition, scope):
+                return self.execute(node.then_branch, scope)
+            elif node.else_branch:
+                return self.execute(node.else_branch, scope)
+        elif isinstance(node, SwitchNode):
+            index = node.targets.get(switch_value(self.evaluate(node.expression, scope)))
+            if index is not None:
+                return self.execute(node.cases[index][1], scope)
+            elif node.default:
+                return self.execute(node.default, scope)
+        elif isinstance(node, WhileNode):
+            while self.evaluate(node.condition, scope):
+                if self.execute(node.body, scope) is RETURN:
+                    return RETURN
+        elif isinstance(node, ForNode):
+            self.execute(node.initialization, scope)
+            while self.evaluate(node.condition, scope):
+                if self.execute(node.body, scope) is RETURN:
+                    return RETURN
+                self.execute(node.increment, scope)
+        elif isinstance(node, BlockNode):
+            for statement in node.statements:
+                if self.execute(statement, scope) is RETURN:
+                    return RETURN
+        elif isinstance(node, NoOpNode):
+            pass
+        else:
+            self.evaluate(node, scope)
+        return None
+
+    def evaluate(self, node, scope):
+        self.tick()
+        if isinstance(node, (NumberNode, StringNode)):
+            return node.value
+        elif isinstance(node, IdentifierNode):
+            return scope.get(node.name, None)
+        elif isinstance(node, BinaryOperationNode):
+            left = self.evaluate(node.left, scope)
+            right = self.evaluate(node.right, scope)
+            return BINARY_FUNCTIONS[node.operator](left, right)
+        elif isinstance(node, LogicalOperationNode):
+            left = bool(self.evaluate(node.left, scope))
+            if left == (node.operator == '||'):
+                return left
+            return bool(self.evaluate(node.right, scope))
+        elif isinstance(node, NotNode):
+            return not self.evaluate(node.operand, scope)
+        elif isinstance(node, (IncrementNode, DecrementNode)):
+            name = node.identifier.name
+            if name not in scope:
+                raise ValueError(f"Undefined variable: '{name}'")
+            scope[name] += 1 if isinstance(node, IncrementNode) else -1
+            return scope[name]
+        elif isinstance(node, FunctionCallNode):
+            arguments = [self.evaluate(argument, scope) for argument in node.arguments]
+            return self.call(node.name, arguments)
+        raise ValueError(f"Cannot evaluate at compile time: {node}")
+
+
+def constant_value(node):
+    """Returns (True, value) for a literal node and (False, None) for anything else."""
+    if isinstance(node, (NumberNode, StringNode)):
+        return True, node.value
+    return False, None
+
+
+def literal(value):
+    """Builds the literal node for a compile-time value, or None if it has no literal form."""
+    if type(value) is int:
+        return NumberNode(value, 'int')
+    if type(value) is float:
+        return NumberNode(value, 'float')
+    if type(value) in (str, Rope):
+        return StringNode(str(value))
+    return None
+
+
+class PartialEvaluator:
+    """Evaluates calls to pure functions with literal arguments at compile time.
+
+    A call whose arguments are all `NumberNode`/`StringNode` literals is run by
+    a `ConstantInterpreter` with a step budget and replaced by its result. A
+    call with only some literal arguments is redirected to a copy of the
+    function specialised for those values, in which the constants are folded.
+    """
+
+    def __init__(self, step_budget=10000, max_specialisations=64, builtins=None):
+        self.step_budget = step_budget
+        self.builtins = default_builtins() if builtins is None else builtins
+        self.max_specialisations = max_specialisations
+        self.functions = {}
+        self.pure = set()
+        self.specialisations = {}  # (name, ((index, value), ...)) -> specialised function name
+        self.new_definitions = []
+        self.calls_folded = 0
+
+    def optimize(self, statements):
+        """Returns a new statement list with constant calls folded and specialised."""
+        statements = list(statements)
+        # Builtins take precedence at run time, so definitions sharing their names are never called
+        self.functions = {node.name: node for node in statements
+                          if isinstance(node, FunctionDefinitionNode) and node.name not in self.builtins}
+        self.pure = self.find_pure_functions()
+
+        statements = [self.rewrite_statement(statement) for statement in statements]
+
+        # Specialised copies may themselves contain foldable calls
+        index = 0
+        while index < len(self.new_definitions):
+            definition = self.new_definitions[index]
+            definition.body = self.rewrite_statement(definition.body)
+            index += 1
+
+        # Definitions come first so they are registered before any call runs
+        return self.new_definitions + statements
+
+    def find_pure_functions(self):
+        """Finds functions that neither print nor read input, directly or through calls."""
+        candidates = {name for name, definition in self.functions.items()
+                      if isinstance(definition.body, BlockNode) and self.side_effect_free(definition.body)}
+        pure_builtins = {name for name in self.builtins.names() if self.builtins.get(name).pure}
+        changed = True
+        while changed:
+            changed = False
+            for name in list(candidates):
+                if not self.calls_only(self.functions[name].body, candidates | pure_builtins):
+                    candidates.discard(name)
+                    changed = True
+        return candidates
+
+    def side_effect_free(self, node):
+        if isinstance(node, (PrintNode, CinNode, FunctionDefinitionNode)):
+            return False
+        if isinstance(node, AssignmentNode) and node.value is None:
+            return False
+        return all(self.side_effect_free(child) for child in children(node))
+
+    def calls_only(self, node, names):
+        if isinstance(node, FunctionCallNode) and node.name not in names:
+            return False
+        return all(self.calls_only(child, names) for child in children(node))
+
+    def rewrite_statement(self, node):
+        if isinstance(node, FunctionCallNode):
+            call = self.rewrite_call(node)
+            # A folded call used as a statement has no effect left
+            return NoOpNode() if constant_value(call)[0] else call
+
+        if isinstance(node, AssignmentNode):
+            if node.value is not None:
+                node.value = self.rewrite_expression(node.value)
+        elif isinstance(node, ArrayDeclarationNode):
+            node.size = self.rewrite_expression(node.size)
+            if node.value is not None:
+                node.value = self.rewrite_expression(node.value)
+        elif isinstance(node, IndexAssignmentNode):
+            node.index = self.rewrite_expression(node.index)
+            node.value = self.rewrite_expression(node.value)
+        elif isinstance(node, PrintNode):
+            node.value = self.rewrite_expression(node.value)
+        elif isinstance(node, ReturnNode):
+            node.expression = self.rewrite_expression(node.expression)
+        elif isinstance(node, IfNode):
+            node.condition = self.rewrite_expression(node.condition)
+            node.then_branch = self.rewrite_statement(node.then_branch)
+            if node.else_branch:
+                node.else_branch = self.rewrite_statement(node.else_branch)
+            is_constant, value = self.static_truth(node.condition)
+            if is_constant:
+                return node.then_branch if value else (node.else_branch or NoOpNode())
+        elif isinstance(node, SwitchNode):
+            node.expression = self.rewrite_expression(node.expression)
+            bodies = {}  # Shared bodies are rewritten once
+            for _, body in node.cases + ([(None, node.default)] if node.default else []):
+                if id(body) not in bodies:
+                    bodies[id(body)] = self.rewrite_statement(body)
+            node.cases = [(values, bodies[id(body)]) for values, body in node.cases]
+            if node.default:
+                node.default = bodies[id(node.default)]
+            is_constant, value = constant_value(node.expression)
+            if is_constant and type(value) is int:
+                index = node.targets.get(value)
+                if index is not None:
+                    return node.cases[index][1]
+                return node.default or NoOpNode()
+        elif isinstance(node, ForNode):
+            node.initialization = self.rewrite_statement(node.initialization)
+            node.condition = self.rewrite_expression(node.condition)
+            node.increment = self.rewrite_statement(node.increment)
+            node.body = self.rewrite_statement(node.body)
+        elif isinstance(node, WhileNode):
+            node.condition = self.rewrite_expression(node.condition)
+            node.body = self.rewrite_statement(node.body)
+        elif isinstance(node, ParallelForNode):
+            node.loop = self.rewrite_statement(node.loop)
+        elif isinstance(node, BlockNode):
+            node.statements = [self.rewrite_statement(statement) for statement in node.statements]
+        elif isinstance(node, FunctionDefinitionNode):
+            node.body = self.rewrite_statement(node.body)
+        return node
+
+    def rewrite_expression(self, node):
+        if isinstance(node, BinaryOperationNode):
+            node.left = self.rewrite_expression(node.left)
+            node.right = self.rewrite_expression(node.right)
+            return self.fold_binary_operation(node)
+        if isinstance(node, LogicalOperationNode):
+            node.left = self.rewrite_expression(node.left)
+            node.right = self.rewrite_expression(node.right)
+            return node
+        if isinstance(node, NotNode):
+            node.operand = self.rewrite_expression(node.operand)
+            return node
+        if isinstance(node, FunctionCallNode):
+            return self.rewrite_call(node)
+        if isinstance(node, IndexNode):
+            node.index = self.rewrite_expression(node.index)
+        return node
+
+    def fold_binary_operation(self, node):
+        left_constant, left = constant_value(node.left)
+        right_constant, right = constant_value(node.right)
+        if not (left_constant and right_constant) or node.operator not in BINARY_FUNCTIONS:
+            return node
+        try:
+            value = BINARY_FUNCTIONS[node.operator](left, right)
+        except Exception:
+            return node  # Reported when the program runs
+        # Comparisons produce booleans, which have no literal node
+        return literal(value) or node
+
+    def static_truth(self, node):
+        """Returns (True, truthiness) for a condition known at compile time, else (False, None)."""
+        is_constant, value = constant_value(node)
+        if is_constant:
+            return True, bool(value)
+        if isinstance(node, BinaryOperationNode) and node.operator in BINARY_FUNCTIONS:
+            left_constant, left = constant_value(node.left)
+            right_constant, right = constant_value(node.right)
+            if left_constant and right_constant:
+                try:
+                    return True, bool(BINARY_FUNCTIONS[node.operator](left, right))
+                except Exception:
+                    pass
+        if isinstance(node, LogicalOperationNode):
+            # A left operand that decides the result makes the right one irrelevant
+            left_constant, left = self.static_truth(node.left)
+            if left_constant and left == (node.operator == '||'):
+                return True, left
+            if left_constant:
+                return self.static_truth(node.right)
+        if isinstance(node, NotNode):
+            is_constant, value = self.static_truth(node.operand)
+            if is_constant:
+                return True, not value
+        return False, None
+
+    def rewrite_call(self, node):
+        node.arguments = [self.rewrite_expression(argument) for argument in node.arguments]
+        native = self.builtins.get(node.name)
+        if native is not None:
+            return self.fold_native_call(node, native)
+        definition = self.functions.get(node.name)
+        if definition is None or len(node.arguments) != len(definition.parameters):
+            return node
+
+        constants = [constant_value(argument) for argument in node.arguments]
+        if all(is_constant for is_constant, _ in constants):
+            if node.name in self.pure:
+                interpreter = ConstantInterpreter(self.functions, self.step_budget, self.builtins)
+                try:
+                    value = interpreter.call(node.name, [value for _, value in constants])
+                except Exception:
+                    return node  # Out of budget, or an error that should surface at run time
+                result = literal(value)
+                if result is not None:
+                    self.calls_folded += 1
+                    return result
+            return node
+
+        if any(is_constant for is_constant, _ in constants):
+            return self.specialise(node, definition, constants)
+        return node
+
+    def fold_native_call(self, node, native):
+        """Replaces a call to a pure builtin on literal arguments with its result."""
+        constants = [constant_value(argument) for argument in node.arguments]
+        if not native.pure or not all(is_constant for is_constant, _ in constants):
+            return node
+        try:
+            value = native.call([value for _, value in constants])
+        except Exception:
+            return node  # Reported when the program runs
+        result = literal(value)
+        if result is None:
+            return node
+        self.calls_folded += 1
+        return result
+
+    def specialise(self, node, definition, constants):
+        """Redirects a call to a copy of the callee with its literal arguments baked in."""
+        bound = tuple((index, value) for index, (is_constant, value) in enumerate(constants) if is_constant)
+        key = (node.name, tuple((index, type(value), value) for index, value in bound))
+
+        name = self.specialisations.get(key)
+        if name is None:
+            if len(self.specialisations) >= self.max_specialisations:
+                return node
+            name = f"{node.name}__{len(self.specialisations) + 1}"
+            self.specialisations[key] = name
+            self.new_definitions.append(self.specialised_definition(definition, name, dict(bound)))
+            self.functions[name] = self.new_definitions[-1]
+            if node.name in self.pure:
+                self.pure.add(name)
+
+        arguments = [argument for index, argument in enumerate(node.arguments) if index not in dict(bound)]
+        call = FunctionCallNode(name, arguments)
+        call.span = node.span
+        return call
+
+    def specialised_definition(self, definition, name, bound):
+        body = copy.deepcopy(definition.body)
+        parameters = []
+        prologue = []
+        for index, param in enumerate(definition.parameters):
+            if index not in bound:
+                parameters.append(param)
+            elif assigns(body, param['name']):
+                prologue.append(AssignmentNode(IdentifierNode(param['name']), literal(bound[index])))
+            else:
+                substitute(body, param['name'], bound[index])
+        body.statements = prologue + body.statements
+        return FunctionDefinitionNode(name, parameters, body, definition.return_type)
+
+
+def children(node):
+    """Returns the direct child nodes of an AST node."""
+    if isinstance(node, BlockNode):
+        return node.statements
+    if isinstance(node, (BinaryOperationNode, LogicalOperationNode)):
+        return [node.left, node.right]
+    if isinstance(node, NotNode):
+        return [node.operand]
+    if isinstance(node, AssignmentNode):
+        return [node.identifier] + ([node.value] if node.value is not None else [])
+    if isinstance(node, ArrayDeclarationNode):
+        return [node.identifier, node.size] + ([node.value] if node.value is not None else [])
+    if isinstance(node, IndexNode):
+        return [node.identifier, node.index]
+    if isinstance(node, IndexAssignmentNode):
+        return [node.identifier, node.index, node.value]
+    if isinstance(node, IfNode):
+        return [node.condition, node.then_branch] + ([node.else_branch] if node.else_branch else [])
+    if isinstance(node, SwitchNode):
+        bodies = [body for _, body in node.cases]
+        return [node.expression] + bodies + ([node.default] if node.default and node.default not in bodies else [])
+    if isinstance(node, ForNode):
+        return [node.initialization, node.condition, node.increment, node.body]
+    if isinstance(node, WhileNode):
+        return [node.condition, node.body]
+    if isinstance(node, (VectorizedLoopNode, ParallelForNode)):
+        return [node.loop]
+    if isinstance(node, (PrintNode,)):
+        return [node.value]
+    if isinstance(node, ReturnNode):
+        return [node.expression]
+    if isinstance(node, FunctionCallNode):
+        return node.arguments
+    if isinstance(node, (IncrementNode, DecrementNode, CinNode)):
+        return [node.identifier]
+    if isinstance(node, FunctionDefinitionNode):
+        return [node.body]
+    return []
+
+
+def assigns(node, name):
+    """Checks whether a variable is written anywhere inside a node."""
+    if (isinstance(node, (AssignmentNode, ArrayDeclarationNode, IncrementNode, DecrementNode, CinNode))
+            and node.identifier.name == name):
+        return True
+    return any(assigns(child, name) for child in children(node))
+
+
+def substitute(node, name, value):
+    """Replaces every read of a variable inside a node with a literal, in place."""
+    for attribute in ('value', 'expression', 'condition', 'left', 'right', 'operand', 'index', 'size'):
+        child = getattr(node, attribute, None)
+        if isinstance(child, IdentifierNode) and child.name == name:
+            setattr(node, attribute, literal(value))
+    if isinstance(node, FunctionCallNode):
+        node.arguments = [literal(value) if isinstance(argument, IdentifierNode) and argument.name == name
+                          else argument for argument in node.arguments]
+    for child in children(node):
+        substitute(child, name, value)
@@ -0,0 +1,429 @@
+import time
+
+from .bytecode import BINARY_FUNCTIONS
+from .ir import Const, Instruction, DefUseChains, is_temp, is_variable, verify_function
+from .ssa import base_name, construct_ssa, destruct_ssa
+
+
+def switch_target(instruction, value=None):
+    """The block a switch on a constant int goes to, or None while the value is unknown."""
+    value = instruction.args[0] if value is None else value
+    if not isinstance(value, Const) or type(value.value) is not int:
+        return None
+    for case_value, target in zip(instruction.attr, instruction.targets[1:]):
+        if case_value == value.value:
+            return target
+    return instruction.targets[0]
+
+
+class FunctionPass:
+    """Base class for optimisation passes that work on one IRFunction at a time."""
+
+    name = "pass"
+
+    def run(self, function):
+        """Transforms the function in place; returns True if anything changed."""
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+class ConstantFolding(FunctionPass):
+    """Evaluates binary operations whose operands are both constants."""
+
+    name = "constant-folding"
+
+    def run(self, function):
+        changed = False
+        for block in function.blocks:
+            for index, instruction in enumerate(block.instructions):
+                if instruction.op != 'binary' or not all(isinstance(arg, Const) for arg in instruction.args):
+                    continue
+                left, right = instruction.args
+                try:
+                    value = BINARY_FUNCTIONS[instruction.attr](left.value, right.value)
+                except Exception:
+                    continue  # Reported when the program runs
+                block.instructions[index] = Instruction('copy', instruction.dest, [Const(value)])
+                changed = True
+        return changed
+
+
+class SimplifyCFG(FunctionPass):
+    """Folds constant branches, bypasses empty blocks, merges straight-line blocks and drops unreachable ones."""
+
+    name = "simplify-cfg"
+
+    def run(self, function):
+        changed = False
+        for block in function.blocks:
+            terminator = block.terminator
+            if terminator.op == 'branch':
+                condition = terminator.args[0]
+                if isinstance(condition, Const):
+                    target = terminator.targets[0] if condition.value else terminator.targets[1]
+                    block.instructions[-1] = Instruction('jump', targets=[target])
+                    changed = True
+                elif terminator.targets[0] is terminator.targets[1]:
+                    block.instructions[-1] = Instruction('jump', targets=[terminator.targets[0]])
+                    changed = True
+            elif terminator.op == 'switch':
+                target = switch_target(terminator)
+                if target is not None:
+                    block.instructions[-1] = Instruction('jump', targets=[target])
+                    changed = True
+
+        # Jumps to a block that does nothing but jump on
+        for block in function.blocks:
+            terminator = block.terminator
+            for index, target in enumerate(terminator.targets):
+                final = self.forward(target)
+                if final is not target and not self.has_phis(final):
+                    terminator.targets[index] = final
+                    changed = True
+
+        changed |= function.remove_unreachable()
+        changed |= self.merge_blocks(function)
+        return changed
+
+    def forward(self, block):
+        seen = set()
+        while (len(block.instructions) == 1 and block.instructions[0].op == 'jump'
+               and block not in seen):
+            seen.add(block)
+            block = block.instructions[0].targets[0]
+        return block
+
+    def has_phis(self, block):
+        return any(instruction.op == 'phi' for instruction in block.instructions)
+
+    def merge_blocks(self, function):
+        """Appends a block to its only predecessor when that predecessor has no other successor."""
+        changed = False
+        for block in list(function.blocks):
+            if block is function.entry or block not in function.blocks:
+                continue
+            if len(block.predecessors) != 1 or self.has_phis(block):
+                continue
+            predecessor = block.predecessors[0]
+            if predecessor.successors != [block] or predecessor.terminator.op != 'jump':
+                continue
+            predecessor.instructions.pop()
+            predecessor.instructions.extend(block.instructions)
+            function.blocks.remove(block)
+            # Phis in the merged block's successors now come from the predecessor
+            for successor in block.successors:
+                for instruction in successor.instructions:
+                    if instruction.op == 'phi':
+                        instruction.attr = [predecessor if b is block else b for b in instruction.attr]
+            function.build_cfg()
+            changed = True
+        return changed
+
+
+class ToSSA(FunctionPass):
+    name = "to-ssa"
+
+    def run(self, function):
+        construct_ssa(function)
+        return True
+
+
+class OutOfSSA(FunctionPass):
+    name = "out-of-ssa"
+
+    def run(self, function):
+        destruct_ssa(function)
+        return True
+
+
+# Lattice values for SCCP besides Const: not known yet, and not a constant
+UNDEFINED = object()
+OVERDEFINED = object()
+
+
+class SparseConditionalConstantPropagation(FunctionPass):
+    """Wegman and Zadeck's SCCP on SSA form.
+
+    Values are only propagated along edges found to be executable, so
+    constants reaching a join through a branch that is never taken do not
+    spoil the result. Constant operands are substituted, constant branches
+    become jumps and blocks that can never run are removed.
+    """
+
+    name = "sccp"
+
+    def run(self, function):
+        if not function.ssa:
+            return False
+        self.values = {}
+        self.executable = set()
+        chains = DefUseChains(function)
+        visited = set()
+        flow = [(None, function.entry)]
+        work = []
+
+        while flow or work:
+            if flow:
+                edge = flow.pop()
+                if edge in self.executable:
+                    continue
+                self.executable.add(edge)
+                block = edge[1]
+                for instruction in block.instructions:
+                    if instruction.op == 'phi':
+                        self.visit_phi(block, instruction, work, chains)
+                if block not in visited:
+                    visited.add(block)
+                    for instruction in block.instructions:
+                        if instruction.op != 'phi':
+                            self.visit(block, instruction, flow, work, chains)
+            else:
+                block, instruction = work.pop()
+                if block not in visited:
+                    continue
+                if instruction.op == 'phi':
+                    self.visit_phi(block, instruction, work, chains)
+                else:
+                    self.visit(block, instruction, flow, work, chains)
+
+        return self.rewrite(function, visited)
+
+    def value(self, operand):
+        if isinstance(operand, Const):
+            return operand
+        # Parameters and variables read before assignment are unknown
+        return self.values.get(operand, OVERDEFINED)
+
+    def update(self, name, value, work, chains):
+        old = self.values.get(name, UNDEFINED)
+        if old is value or old == value:
+            return
+        self.values[name] = value
+        work.extend(chains.uses.get(name, ()))
+
+    def visit_phi(self, block, instruction, work, chains):
+        result = UNDEFINED
+        for predecessor, arg in zip(instruction.attr, instruction.args):
+            if (predecessor, block) not in self.executable:
+                continue
+            value = self.value(arg)
+            if value is UNDEFINED:
+                continue
+            if result is UNDEFINED:
+                result = value
+            elif value is OVERDEFINED or result is OVERDEFINED or value != result:
+                result = OVERDEFINED
+        self.update(instruction.dest, result, work, chains)
+
+    def visit(self, block, instruction, flow, work, chains):
+        op = instruction.op
+        if op == 'copy':
+            self.update(instruction.dest, self.value(instruction.args[0]), work, chains)
+        elif op == 'binary':
+            left, right = (self.value(arg) for arg in instruction.args)
+            if left is OVERDEFINED or right is OVERDEFINED:
+                result = OVERDEFINED
+            elif left is UNDEFINED or right is UNDEFINED:
+                result = UNDEFINED
+            else:
+                try:
+                    result = Const(BINARY_FUNCTIONS[instruction.attr](left.value, right.value))
+                except Exception:
+                    result = OVERDEFINED  # Reported when the program runs
+            self.update(instruction.dest, result, work, chains)
+        elif instruction.dest is not None:
+            self.update(instruction.dest, OVERDEFINED, work, chains)
+        elif op == 'jump':
+            flow.append((block, instruction.targets[0]))
+        elif op == 'branch':
+            condition = self.value(instruction.args[0])
+            if condition is OVERDEFINED:
+                flow.extend((block, target) for target in instruction.targets)
+            elif condition is not UNDEFINED:
+                flow.append((block, instruction.targets[0] if condition.value else instruction.targets[1]))
+        elif op == 'switch':
+            value = self.value(instruction.args[0])
+            if value is OVERDEFINED or (value is not UNDEFINED and type(value.value) is not int):
+                # A value that is not an int raises at run time; keep every edge
+                flow.extend((block, target) for target in instruction.targets)
+            elif value is not UNDEFINED:
+                flow.append((block, switch_target(instruction, value)))
+
+    def rewrite(self, function, visited):
+        changed = False
+        constants = {name: value for name, value in self.values.items() if isinstance(value, Const)}
+        for block in function.blocks:
+            if block not in visited:
+                continue
+            for index, instruction in enumerate(block.instructions):
+                if any(is_variable(arg) and arg in constants for arg in instruction.args):
+                    instruction.args = [constants.get(arg, arg) if is_variable(arg) else arg
+                                        for arg in instruction.args]
+                    changed = True
+                if instruction.op in ('binary', 'phi') and instruction.dest in constants:
+                    block.instructions[index] = Instruction('copy', instruction.dest, [constants[instruction.dest]])
+                    changed = True
+                elif instruction.op == 'branch' and isinstance(instruction.args[0], Const):
+                    taken = instruction.targets[0] if instruction.args[0].value else instruction.targets[1]
+                    block.instructions[index] = Instruction('jump', targets=[taken])
+                    changed = True
+                elif instruction.op == 'switch' and switch_target(instruction) is not None:
+                    block.instructions[index] = Instruction('jump', targets=[switch_target(instruction)])
+                    changed = True
+            # Phis folded to copies move below the remaining phis
+            block.instructions.sort(key=lambda instruction: instruction.op != 'phi')
+        changed |= function.remove_unreachable()
+        return changed
+
+
+class CopyPropagation(FunctionPass):
+    """Replaces uses of an SSA copy (or of a phi whose inputs all agree) with its source."""
+
+    name = "copy-propagation"
+
+    def run(self, function):
+        if not function.ssa:
+            return False
+        changed = self.forward_temporaries(function)
+        replacements = {}
+        for block in function.blocks:
+            for instruction in block.instructions:
+                if instruction.op == 'copy':
+                    replacements[instruction.dest] = instruction.args[0]
+                elif instruction.op == 'phi':
+                    sources = {arg for arg in instruction.args if arg != instruction.dest}
+                    if len(sources) == 1:
+                        replacements[instruction.dest] = sources.pop()
+
+        def resolve(operand):
+            seen = set()
+            while is_variable(operand) and operand in replacements and operand not in seen:
+                seen.add(operand)
+                operand = replacements[operand]
+            return operand
+
+        for block in function.blocks:
+            for instruction in block.instructions:
+                args = [resolve(arg) if is_variable(arg) else arg for arg in instruction.args]
+                if args != instruction.args:
+                    instruction.args = args
+                    changed = True
+        return changed
+
+
+    def forward_temporaries(self, function):
+        """Computes `v = copy %t` directly into v when the copy is the temporary's only use.
+
+        Otherwise propagating the copy would leave the value in the temporary,
+        which out-of-SSA cannot merge back into the variable.
+        """
+        chains = DefUseChains(function)
+        removed = set()
+        for block in function.blocks:
+            kept = []
+            for instruction in block.instructions:
+                source = instruction.args[0] if instruction.op == 'copy' else None
+                definition = chains.single_definition(source) if is_temp(source) else None
+                if (definition is not None and base_name(source) is None and chains.use_count(source) == 1
+                        and definition[1] not in removed and definition[1].op in ('binary', 'call', 'copy')):
+                    definition[1].dest = instruction.dest
+                    removed.add(instruction)
+                    continue
+                kept.append(instruction)
+            block.instructions = kept
+        return bool(removed)
+
+
+class DeadStoreElimination(FunctionPass):
+    """Removes side-effect-free definitions whose value is never read.
+
+    In SSA form this covers every version of every variable; otherwise only
+    temporaries and, outside the exported top level, local variables.
+    Arithmetic that may raise at run time is kept so the error still shows.
+    """
+
+    name = "dead-store-elimination"
+
+    def run(self, function):
+        changed = False
+        while True:
+            chains = DefUseChains(function)
+            removed = False
+            for block in function.blocks:
+                kept = []
+                for instruction in block.instructions:
+                    if self.removable(function, instruction) and chains.use_count(instruction.dest) == 0:
+                        removed = True
+                        continue
+                    kept.append(instruction)
+                block.instructions = kept
+            if not removed:
+                return changed
+            changed = True
+
+    def removable(self, function, instruction):
+        if instruction.op not in ('copy', 'phi', 'binary'):
+            return False
+        if not (function.ssa or is_temp(instruction.dest) or not function.exported):
+            return False
+        if instruction.op == 'binary':
+            return instruction.attr in ('==', '!=')
+        return True
+
+
+DEFAULT_PASSES = [
+    SimplifyCFG(),
+    ToSSA(),
+    SparseConditionalConstantPropagation(),
+    CopyPropagation(),
+    DeadStoreElimination(),
+    OutOfSSA(),
+    SimplifyCFG(),
+    DeadStoreElimination(),
+]
+
+
+class PassManager:
+    """Runs an ordered list of function passes over a module.
+
+    Each pass is timed, and with `verify=True` the IR invariants are checked
+    after every pass so a broken pass is reported by name.
+    """
+
+    def __init__(self, passes=None, verify=True):
+        self.passes = list(DEFAULT_PASSES if passes is None else passes)
+        self.verify = verify
+        self.timings = []  # (pass name, seconds) for every pass run
+
+    def add(self, function_pass):
+        self.passes.append(function_pass)
+        return self
+
+    def run(self, module):
+        for function in module.all_functions():
+            self.run_function(function)
+        return module
+
+    def run_function(self, function):
+        if self.verify:
+            verify_function(function)
+        changed = False
+        for function_pass in self.passes:
+            start = time.perf_counter()
+            changed |= bool(function_pass.run(function))
+            self.timings.append((function_pass.name, time.perf_counter() - start))
+            if self.verify:
+                try:
+                    verify_function(function)
+                except ValueError as e:
+                    raise type(e)(f"after {function_pass.name}: {e}") from e
+        return changed
+
+    def report(self):
+        """Total time per pass, in the order the passes first ran."""
+        totals = {}
+        for name, seconds in self.timings:
+            totals[name] = totals.get(name, 0.0) + seconds
+        return totals
@@ -0,0 +1,246 @@
+from collections import Counter
+
+from .bytecode import (BINARY_FUNCTIONS, COMPARISON_OPERATORS, SWITCH_OPCODES, jump_targets, located,
+                       map_targets, span_of)
+
+
+def remove_redundant_loads_and_stores(instructions):
+    """Drops load/store pairs that cancel out and values that are loaded only to be popped."""
+    result = []
+    for instruction in instructions:
+        result.append(instruction)
+        while True:
+            if len(result) >= 2:
+                (first_op, first_arg), (second_op, second_arg) = result[-2], result[-1]
+                # x = x;
+                if first_op in ('LOAD_LOCAL', 'LOAD_LOCAL_CLEAR') and second_op == 'STORE_LOCAL' and first_arg == second_arg:
+                    del result[-2:]
+                    continue
+                # A value pushed and immediately discarded
+                if first_op in ('LOAD_LOCAL', 'LOAD_CONST', 'DUP') and second_op == 'POP':
+                    del result[-2:]
+                    continue
+            if len(result) >= 3:
+                # i++ used as a statement: DUP; STORE_LOCAL; POP -> STORE_LOCAL
+                ops = [op for op, _ in result[-3:]]
+                if ops == ['DUP', 'STORE_LOCAL', 'POP']:
+                    store = result[-2]
+                    del result[-3:]
+                    result.append(store)
+                    continue
+            break
+    return result
+
+
+def fold_constants(instructions):
+    """Folds `LOAD_CONST; LOAD_CONST; BINARY_OP` and turns `LOAD_CONST; BINARY_OP` into `BINARY_OP_CONST`."""
+    result = []
+    for instruction in instructions:
+        result.append(instruction)
+        while len(result) >= 2 and result[-1][0] == 'BINARY_OP' and result[-2][0] == 'LOAD_CONST':
+            operator_symbol = result[-1][1]
+            constant = result[-2][1]
+            if len(result) >= 3 and result[-3][0] == 'LOAD_CONST':
+                try:
+                    value = BINARY_FUNCTIONS[operator_symbol](result[-3][1], constant)
+                except Exception:
+                    # Leave the error to be raised at run time
+                    value = None
+                else:
+                    del result[-3:]
+                    result.append(('LOAD_CONST', value))
+                    continue
+            span = span_of(result[-1])
+            del result[-2:]
+            result.append(located(('BINARY_OP_CONST', (operator_symbol, constant)), span))
+        if len(result) >= 2 and result[-1][0] == 'POP_JUMP_IF_FALSE' and result[-2][0] == 'LOAD_CONST':
+            # Constant condition: either always jump or never jump
+            target = result[-1][1]
+            taken = not result[-2][1]
+            del result[-2:]
+            if taken:
+                result.append(('JUMP', target))
+    return result
+
+
+def thread_jumps(instructions):
+    """Retargets jumps to unconditional jumps and drops jumps to the next instruction."""
+    label_positions = {arg: index for index, (op, arg) in enumerate(instructions) if op == 'LABEL'}
+
+    def final_target(label):
+        seen = set()
+        while label not in seen:
+            seen.add(label)
+            index = label_positions[label] + 1
+            while index < len(instructions) and instructions[index][0] == 'LABEL':
+                index += 1
+            if index < len(instructions) and instructions[index][0] == 'JUMP':
+                label = instructions[index][1]
+            else:
+                break
+        return label
+
+    result = []
+    for index, instruction in enumerate(instructions):
+        if jump_targets(instruction):
+            instruction = map_targets(instruction, final_target)
+            if instruction[0] == 'JUMP':
+                # Jump to the instruction that would run next anyway
+                following = index + 1
+                while following < len(instructions) and instructions[following][0] == 'LABEL':
+                    if instructions[following][1] == instruction[1]:
+                        break
+                    following += 1
+                if following < len(instructions) and instructions[following] == ('LABEL', instruction[1]):
+                    continue
+        result.append(instruction)
+    return result
+
+
+def remove_dead_code(instructions):
+    """Removes instructions that follow an unconditional jump or return and are not jumped to."""
+    result = []
+    reachable = True
+    for instruction in instructions:
+        if instruction[0] == 'LABEL':
+            reachable = True
+        if reachable:
+            result.append(instruction)
+        if instruction[0] in ('JUMP', 'RETURN') + SWITCH_OPCODES:
+            reachable = False
+    return result
+
+
+def remove_unused_labels(instructions):
+    """Drops labels nothing jumps to, so they no longer split fusable instruction pairs."""
+    used = {target for instruction in instructions for target in jump_targets(instruction)}
+    return [instruction for instruction in instructions
+            if instruction[0] != 'LABEL' or instruction[1] in used]
+
+
+PEEPHOLE_PASSES = [
+    fold_constants,
+    remove_redundant_loads_and_stores,
+    thread_jumps,
+    remove_dead_code,
+    remove_unused_labels,
+]
+
+
+def optimize(instructions, passes=PEEPHOLE_PASSES, max_rounds=10):
+    """Runs the peephole passes until the instruction list stops changing."""
+    for _ in range(max_rounds):
+        previous = instructions
+        for peephole_pass in passes:
+            instructions = peephole_pass(instructions)
+        if instructions == previous:
+            break
+    return instructions
+
+
+def _fuse_compare_jump(window):
+    (op, operator_symbol), (_, target) = window
+    if operator_symbol in COMPARISON_OPERATORS:
+        return [('COMPARE_JUMP', (operator_symbol, target))]
+    return None
+
+
+def _fuse_compare_const_jump(window):
+    (_, (operator_symbol, constant)), (_, target) = window
+    if operator_symbol in COMPARISON_OPERATORS:
+        return [('COMPARE_CONST_JUMP', (operator_symbol, constant, target))]
+    return None
+
+
+def _fuse_increment_local(window):
+    (_, slot), (_, (operator_symbol, constant)), (_, store_slot) = window
+    if slot == store_slot and operator_symbol in ('+', '-') and type(constant) in (int, float):
+        return [('INC_LOCAL', (slot, constant if operator_symbol == '+' else -constant))]
+    return None
+
+
+def _fuse_load_local_pair(window):
+    (_, first), (_, second) = window
+    return [('LOAD_LOCAL_PAIR', (first, second))]
+
+
+class Superinstruction:
+    """A fused instruction replacing a fixed opcode sequence."""
+
+    def __init__(self, name, pattern, fuse):
+        self.name = name
+        self.pattern = pattern  # Opcode sequence the superinstruction replaces
+        self.fuse = fuse        # window -> replacement instructions, or None to leave it alone
+
+    @property
+    def key_pair(self):
+        return self.pattern[:2]
+
+    def apply(self, instructions):
+        size = len(self.pattern)
+        result = []
+        for instruction in instructions:
+            result.append(instruction)
+            if len(result) >= size and tuple(op for op, _ in result[-size:]) == self.pattern:
+                window = result[-size:]
+                replacement = self.fuse(window)
+                if replacement is not None:
+                    # A fused instruction fails where the instruction doing its work would have
+                    span = next(filter(None, map(span_of, window)), None)
+                    del result[-size:]
+                    result.extend(located(instruction, span) for instruction in replacement)
+        return result
+
+    def __repr__(self):
+        return f"Superinstruction(name={self.name}, pattern={self.pattern})"
+
+
+SUPERINSTRUCTIONS = {
+    'COMPARE_JUMP': Superinstruction(
+        'COMPARE_JUMP', ('BINARY_OP', 'POP_JUMP_IF_FALSE'), _fuse_compare_jump),
+    'COMPARE_CONST_JUMP': Superinstruction(
+        'COMPARE_CONST_JUMP', ('BINARY_OP_CONST', 'POP_JUMP_IF_FALSE'), _fuse_compare_const_jump),
+    'INC_LOCAL': Superinstruction(
+        'INC_LOCAL', ('LOAD_LOCAL', 'BINARY_OP_CONST', 'STORE_LOCAL'), _fuse_increment_local),
+    'LOAD_LOCAL_PAIR': Superinstruction(
+        'LOAD_LOCAL_PAIR', ('LOAD_LOCAL', 'LOAD_LOCAL'), _fuse_load_local_pair),
+}
+
+# Selected by benchmarks/bench_superinstructions.py from the pair frequencies of benchmarks/corpus
+DEFAULT_SUPERINSTRUCTIONS = ['INC_LOCAL', 'COMPARE_CONST_JUMP', 'COMPARE_JUMP']
+
+
+def select_superinstructions(pair_counts, min_share=0.02):
+    """Picks the superinstructions whose leading opcode pair is frequent enough to pay off.
+
+    `pair_counts` maps `(opcode, next_opcode)` to how often that pair was
+    dispatched. The result is ordered by frequency, which is also the order
+    the fusions are applied in.
+    """
+    total = sum(pair_counts.values()) or 1
+    ranked = sorted(SUPERINSTRUCTIONS.values(), key=lambda s: pair_counts.get(s.key_pair, 0), reverse=True)
+    return [s.name for s in ranked if pair_counts.get(s.key_pair, 0) / total >= min_share]
+
+
+def fuse_superinstructions(instructions, names=None):
+    if names is None:
+        names = DEFAULT_SUPERINSTRUCTIONS
+    for name in names:
+        instructions = SUPERINSTRUCTIONS[name].apply(instructions)
+    return instructions
+
+
+def measure_pair_frequencies(programs):
+    """Counts dispatched opcode pairs while running unfused bytecode for parsed programs."""
+    from .bytecode import BytecodeCompiler
+    from .vm import VirtualMachine
+
+    pair_counts = Counter()
+    for statements in programs:
+        main, functions = BytecodeCompiler().compile_program(statements)
+        for code in [main] + list(functions.values()):
+            code.instructions = optimize(code.instructions)
+            code.assemble()
+        vm = VirtualMachine(functions, [], pair_counts=pair_counts)
+        vm.run(main)
+    return pair_counts
@@ -0,0 +1,180 @@
+from .evaluator import Evaluator
+from .control import RETURN
+from .errors import execution_error
+from .rope import flatten_variables
+
+NO_INPUT = object()  # What get_user_input finds once the input values run out
+
+
+class ExecutionContext:
+    """The state of one run of a program: where `cin` reads, where `cout` writes, the variables.
+
+    `inputs` answers `cin`: either an object with `get_user_input(name)`,
+    like the editor, or an iterable of values handed out in order. `output`
+    receives the printed lines (anything with `append`). `symbol_table`
+    holds the top-level variables during the run and afterwards. Errors the
+    run reports are in `errors`, and their report lines also go to
+    `error_output` when one is given.
+    """
+
+    def __init__(self, inputs=None, output=None, symbol_table=None, errors=None, error_output=None):
+        if inputs is None or hasattr(inputs, 'get_user_input'):
+            self.input_provider = inputs
+            self.inputs = None
+        else:
+            self.input_provider = None
+            self.inputs = iter(inputs)
+        self.output = [] if output is None else output
+        self.symbol_table = {} if symbol_table is None else symbol_table
+        self.errors = [] if errors is None else errors
+        self.error_output = error_output
+
+    def get_user_input(self, variable_name):
+        """The value for a `cin` into `variable_name`."""
+        if self.input_provider is not None:
+            return self.input_provider.get_user_input(variable_name)
+        if self.inputs is None:
+            raise ValueError("UI reference is missing. Cannot prompt for input.")
+        value = next(self.inputs, NO_INPUT)
+        if value is NO_INPUT:
+            raise ValueError(f"No input left for '{variable_name}'")
+        return value
+
+    def text(self):
+        """Everything the run printed, as one string."""
+        return "".join(str(line) for line in self.output)
+
+    def report(self, error, lines=None):
+        """Records an exception that escaped the running program as an ExecutionError."""
+        error = execution_error(error, lines)
+        self.errors.append(error)
+        if self.error_output is not None:
+            self.error_output.append(error.report())
+
+
+class CompiledProgram:
+    """A parsed, optimised and linked program that can be run any number of times.
+
+    Made by `Compiler.compile`. A run never changes the program: each one
+    gets an ExecutionContext and an engine of its own, so runs may follow
+    each other. What runs do share are caches that make later runs faster:
+    the inline caches on the tree's nodes and the hotness counters,
+    closures and traces of the tiers. Those are updated without locking,
+    so runs must not overlap in threads; `run_many` runs many input sets
+    side by side on a process pool instead.
+    """
+
+    def __init__(self, ast, functions, builtins, lines=None, bytecode=None, tiers=None,
+                 parallel_workers=None, continue_on_error=False, keep_variables=True):
+        self.ast = ast
+        self.functions = functions  # Function table from the linker
+        self.builtins = builtins
+        self.lines = lines  # LineIndex of the source, for error positions
+        self.bytecode = bytecode  # (main_code, functions) on the bytecode backend, otherwise None
+        self.tiers = tiers
+        self.parallel_workers = parallel_workers
+        self.continue_on_error = continue_on_error
+        self.keep_variables = keep_variables
+
+    def run(self, inputs=None, output=None, symbol_table=None, context=None):
+        """Runs the program once and returns its ExecutionContext.
+
+        `inputs` are the values `cin` reads, in order, or an input provider;
+        see ExecutionContext for `output` and `symbol_table`. A prepared
+        `context` replaces all three.
+        """
+        if context is None:
+            context = ExecutionContext(inputs, output, symbol_table)
+        self.execute(context)
+        return context
+
+    def run_many(self, input_sets, workers=None, chunksize=16):
+        """Runs the program once per input set on a process pool; returns an ExecutionContext for each, in order.
+
+        The program is sent to each worker process once, when it starts,
+        and is not compiled again; every worker has tiers of its own.
+        Errors come back without their node, as in `batch.run_many`.
+        """
+        from .batch import run_input_sets
+        input_sets = [list(inputs) for inputs in input_sets]
+        results = run_input_sets(self, input_sets, workers, chunksize)
+        return [ExecutionContext(inputs, output, symbol_table, errors)
+                for inputs, (output, symbol_table, errors) in zip(input_sets, results)]
+
+    def run_lanes(self, input_sets, fallback=True):
+        """Runs the program once per input set and returns an ExecutionContext for each. Experimental.
+
+        Numeric programs run over all input sets at once, one NumPy lane per
+        set, in lock-step (see lanes.LaneExecution). Programs or inputs the
+        lanes cannot run exactly like the scalar engines are run one set at
+        a time with `run` instead; with `fallback=False` NotLaneable is
+        raised, saying why.
+        """
+        from .lanes import LaneExecution, NotLaneable
+        input_sets = [list(inputs) for inputs in input_sets]
+        try:
+            if not input_sets:
+                return []
+            if self.continue_on_error:
+                raise NotLaneable("continue_on_error reports errors per statement")
+            try:
+                execution = LaneExecution(self.ast, input_sets).run()
+            except ImportError as error:
+                raise NotLaneable(str(error)) from None
+        except NotLaneable:
+            if not fallback:
+                raise
+            return [self.run(inputs) for inputs in input_sets]
+        return [ExecutionContext(inputs, output, symbol_table) for inputs, output, symbol_table
+                in zip(input_sets, execution.outputs(), execution.symbol_tables())]
+
+    def execute(self, context, evaluator=None):
+        """Runs the program in `context`; returns the result of the top-level statements, or None after an error.
+
+        The interpreter uses `evaluator` when one is given; it must use the
+        context's symbol table and output.
+        """
+        if self.bytecode is not None:
+            return self.run_bytecode(context)
+        if evaluator is None:
+            evaluator = Evaluator(context.symbol_table, context, self.tiers, self.builtins)
+            evaluator.output = context.output
+            evaluator.functions = self.functions
+            evaluator.parallel_workers = self.parallel_workers
+        result = self.interpret(evaluator, context)
+        flatten_variables(context.symbol_table)  # Long strings may still be ropes
+        return result
+
+    def interpret(self, evaluator, context):
+        if not self.continue_on_error:
+            try:
+                return evaluator.evaluate(self.ast)
+            except Exception as error:
+                context.report(error, self.lines)
+                return None
+
+        results = []
+        for statement in self.ast:
+            try:
+                result = evaluator.evaluate(statement)
+            except Exception as error:
+                context.report(error, self.lines)
+                continue
+            if result is RETURN:
+                break
+            results.append(result)
+        return results
+
+    def run_bytecode(self, context):
+        from .vm import VirtualMachine
+        main, functions = self.bytecode
+        vm = VirtualMachine(functions, context.output, context, builtins=self.builtins)
+        try:
+            result, variables = vm.run(main)
+        except Exception as error:
+            context.report(error, self.lines)
+            return None
+        if self.keep_variables:
+            flatten_variables(variables)
+            context.symbol_table.update(variables)
+        return result
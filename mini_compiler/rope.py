@@ -0,0 +1,131 @@
+# Concatenations shorter than this stay plain strings
+ROPE_THRESHOLD = 256
+
+
+class Rope:
+    """A string built by concatenation, flattened to a `str` only when its text is needed.
+
+    A rope is the first `count` entries of a list of string pieces. Appending
+    to the newest rope of a chain adds to the same list, so `s = s + piece`
+    in a loop costs O(len(piece)) instead of copying `s`. Every operator
+    but `+` works on the flat text, so ropes compare, hash, print and fail
+    like the string they stand for. Hosts never see them: runs flatten the
+    variables they hand back (see `flatten_variables`).
+    """
+
+    __slots__ = ('pieces', 'count', 'length', 'flat')
+
+    def __init__(self, pieces, length):
+        self.pieces = pieces  # May be shared with longer ropes built from this one
+        self.count = len(pieces)
+        self.length = length
+        self.flat = None
+
+    def append(self, text):
+        pieces = self.pieces
+        if self.count != len(pieces):
+            # Another rope already extended the shared list; branch off a copy
+            pieces = pieces[:self.count]
+        if type(text) is Rope:
+            pieces.extend(text.pieces[:text.count])
+        else:
+            pieces.append(text)
+        return Rope(pieces, self.length + len(text))
+
+    def prepend(self, text):
+        return Rope([text] + self.pieces[:self.count], self.length + len(text))
+
+    def __str__(self):
+        if self.flat is None:
+            self.flat = "".join(self.pieces[:self.count])
+            # Later appends start from the flat text instead of all the pieces
+            self.pieces = [self.flat]
+            self.count = 1
+        return self.flat
+
+    def __len__(self):
+        return self.length
+
+    def __bool__(self):
+        return self.length > 0
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __eq__(self, other):
+        return str(self) == flatten(other)
+
+    def __ne__(self, other):
+        return str(self) != flatten(other)
+
+    def __lt__(self, other):
+        return str(self) < flatten(other)
+
+    def __le__(self, other):
+        return str(self) <= flatten(other)
+
+    def __gt__(self, other):
+        return str(self) > flatten(other)
+
+    def __ge__(self, other):
+        return str(self) >= flatten(other)
+
+    def __add__(self, other):
+        if isinstance(other, (str, Rope)):
+            return self.append(other)
+        return str(self) + other
+
+    def __radd__(self, other):
+        if isinstance(other, str):
+            return self.prepend(other)
+        return other + str(self)
+
+    def __sub__(self, other):
+        return str(self) - flatten(other)
+
+    def __rsub__(self, other):
+        return other - str(self)
+
+    def __mul__(self, other):
+        return str(self) * flatten(other)
+
+    def __rmul__(self, other):
+        return other * str(self)
+
+    def __truediv__(self, other):
+        return str(self) / flatten(other)
+
+    def __rtruediv__(self, other):
+        return other / str(self)
+
+    def __format__(self, format_spec):
+        return format(str(self), format_spec)
+
+    def __repr__(self):
+        return f"Rope({str(self)!r})"
+
+
+def concat(left, right, threshold=None):
+    """Concatenates two strings or ropes, switching to a rope once the result gets long."""
+    if type(left) is Rope:
+        return left.append(right)
+    if type(right) is Rope:
+        return right.prepend(left)
+    length = len(left) + len(right)
+    if length < (ROPE_THRESHOLD if threshold is None else threshold):
+        return left + right
+    return Rope([left, right], length)
+
+
+def flatten(value):
+    """Returns the plain `str` for a rope and any other value unchanged."""
+    if type(value) is Rope:
+        return str(value)
+    return value
+
+
+def flatten_variables(symbol_table):
+    """Replaces the ropes among a symbol table's values with plain strings."""
+    for name, value in symbol_table.items():
+        if type(value) is Rope:
+            symbol_table[name] = str(value)
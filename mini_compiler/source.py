@@ -0,0 +1,28 @@
+from bisect import bisect_right
+
+
+class LineIndex:
+    """Turns offsets into a source text into line and column numbers.
+
+    Tokens and AST nodes only record offsets; the index keeps one sorted
+    list with the offset each line starts at, and a position is looked up
+    with a binary search when an error needs it. Lines and columns count
+    from 1.
+    """
+
+    def __init__(self, text):
+        starts = [0]
+        newline = text.find('\n')
+        while newline >= 0:
+            starts.append(newline + 1)
+            newline = text.find('\n', newline + 1)
+        self.starts = starts
+
+    def position(self, offset):
+        """(line, column) of an offset."""
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+    def describe(self, offset):
+        line, column = self.position(offset)
+        return f"line {line}, column {column}"
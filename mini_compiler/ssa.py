@@ -0,0 +1,209 @@
+from .ir import Instruction, DominatorTree, InterferenceGraph, Liveness, is_temp, is_variable
+
+
+def version_name(name, number):
+    return f"%{name}.{number}"
+
+
+def base_name(name):
+    """The source variable an SSA version belongs to, or None for other names."""
+    if is_temp(name) and '.' in name:
+        return name[1:].rsplit('.', 1)[0]
+    return None
+
+
+def construct_ssa(function):
+    """Rewrites a function into SSA form.
+
+    Phis are placed on the iterated dominance frontiers of each variable's
+    definitions, then a walk of the dominator tree gives every definition a
+    fresh version. Reads with no reaching definition keep the original name
+    (parameters, or variables read before being assigned). In an exported
+    function each return is preceded by an `export` of the final versions.
+    Temporaries are renamed too when they have several definitions, as the
+    value of a short-circuit `&&` or `||` does; they only get phis where
+    they are live, since a temporary is never read on a path that skips it.
+    """
+    function.remove_unreachable()
+    dominators = DominatorTree(function)
+
+    definition_blocks = {}
+    definition_counts = {}
+    for block in function.blocks:
+        for instruction in block.instructions:
+            if instruction.dest is not None:
+                definition_blocks.setdefault(instruction.dest, set()).add(block)
+                definition_counts[instruction.dest] = definition_counts.get(instruction.dest, 0) + 1
+    for name, count in definition_counts.items():
+        if is_temp(name) and count == 1:
+            del definition_blocks[name]
+    liveness = Liveness(function) if any(is_temp(name) for name in definition_blocks) else None
+
+    for name, blocks in definition_blocks.items():
+        has_phi = set()
+        worklist = list(blocks)
+        while worklist:
+            block = worklist.pop()
+            for frontier in dominators.frontiers[block]:
+                if frontier in has_phi or (is_temp(name) and name not in liveness.live_in[frontier]):
+                    continue
+                has_phi.add(frontier)
+                predecessors = list(frontier.predecessors)
+                phi = Instruction('phi', name, [name] * len(predecessors), attr=predecessors)
+                frontier.instructions.insert(0, phi)
+                if frontier not in blocks:
+                    worklist.append(frontier)
+
+    variables = sorted(definition_blocks)
+    counters = {name: 0 for name in variables}
+    current = {name: [] for name in variables}
+
+    def new_version(name):
+        counters[name] += 1
+        version = version_name(name, counters[name])
+        current[name].append(version)
+        return version
+
+    def renamed(operand):
+        if is_variable(operand) and current.get(operand):
+            return current[operand][-1]
+        return operand
+
+    # Iterative walk of the dominator tree; None marks the point to pop a block's versions
+    stack = [function.entry]
+    pushed = []
+    while stack:
+        block = stack.pop()
+        if block is None:
+            for name in pushed.pop():
+                current[name].pop()
+            continue
+
+        defined_here = []
+        instructions = []
+        for instruction in block.instructions:
+            if instruction.op != 'phi':
+                instruction.args = [renamed(arg) for arg in instruction.args]
+                if instruction.op == 'return' and function.exported:
+                    exported = [name for name in variables if current[name] and not is_temp(name)]
+                    instructions.append(Instruction('export', args=[current[name][-1] for name in exported],
+                                                    attr=exported))
+            if instruction.dest in current:
+                defined_here.append(instruction.dest)
+                instruction.dest = new_version(instruction.dest)
+            instructions.append(instruction)
+        block.instructions = instructions
+
+        for successor in block.successors:
+            for instruction in successor.instructions:
+                if instruction.op != 'phi':
+                    break
+                index = instruction.attr.index(block)
+                instruction.args[index] = renamed(instruction.args[index])
+
+        pushed.append(defined_here)
+        stack.append(None)
+        stack.extend(reversed(dominators.children[block]))
+
+    function.ssa = True
+
+
+def split_critical_edges(function):
+    """Gives every edge into a phi block from a block with several successors a block of its own."""
+    for block in list(function.blocks):
+        if len(block.predecessors) < 2 or not any(i.op == 'phi' for i in block.instructions):
+            continue
+        for predecessor in list(block.predecessors):
+            if len(predecessor.successors) < 2:
+                continue
+            edge = function.new_block("edge")
+            edge.instructions.append(Instruction('jump', targets=[block]))
+            terminator = predecessor.terminator
+            terminator.targets = [edge if target is block else target for target in terminator.targets]
+            for instruction in block.instructions:
+                if instruction.op == 'phi':
+                    instruction.attr = [edge if b is predecessor else b for b in instruction.attr]
+    function.build_cfg()
+
+
+def sequentialize_copies(function, copies):
+    """Orders a parallel copy `dests <- sources` as plain copies, breaking cycles with a temporary."""
+    pending = [(dest, source) for dest, source in copies if dest != source]
+    result = []
+    while pending:
+        sources = {source for _, source in pending}
+        for index, (dest, source) in enumerate(pending):
+            if dest not in sources:
+                result.append(Instruction('copy', dest, [source]))
+                del pending[index]
+                break
+        else:
+            # Every destination is still needed as a source: save one of them first
+            dest = pending[0][0]
+            temporary = function.new_temp()
+            result.append(Instruction('copy', temporary, [dest]))
+            pending = [(d, temporary if s == dest else s) for d, s in pending]
+    return result
+
+
+def destruct_ssa(function):
+    """Translates a function out of SSA form.
+
+    Phis become copies at the end of their predecessors and exports become
+    copies to the source variables. Versions of the same variable whose
+    lifetimes do not overlap are then merged back into one name, which
+    removes most of the copies again.
+    """
+    split_critical_edges(function)
+
+    for block in function.blocks:
+        phis = [instruction for instruction in block.instructions if instruction.op == 'phi']
+        if not phis:
+            continue
+        block.instructions = block.instructions[len(phis):]
+        for predecessor in block.predecessors:
+            copies = [(phi.dest, phi.args[phi.attr.index(predecessor)]) for phi in phis]
+            predecessor.instructions[-1:-1] = sequentialize_copies(function, copies)
+
+    for block in function.blocks:
+        instructions = []
+        for instruction in block.instructions:
+            if instruction.op == 'export':
+                instructions.extend(sequentialize_copies(function, list(zip(instruction.attr, instruction.args))))
+            else:
+                instructions.append(instruction)
+        block.instructions = instructions
+
+    function.ssa = False
+    coalesce_versions(function)
+
+
+def coalesce_versions(function):
+    """Renames SSA versions back to their variable wherever that does not merge overlapping lifetimes."""
+    interference = InterferenceGraph(function)
+    groups = {}
+    for name in sorted(interference.edges):
+        base = base_name(name)
+        if base is not None:
+            groups.setdefault(base, []).append(name)
+
+    mapping = {}
+    for base, versions in groups.items():
+        members = [base] if base in interference.edges else []
+        for version in versions:
+            if not any(interference.interferes(version, member) for member in members):
+                members.append(version)
+                mapping[version] = base
+
+    if not mapping:
+        return
+    for block in function.blocks:
+        instructions = []
+        for instruction in block.instructions:
+            instruction.replace_uses(mapping)
+            if instruction.dest is not None:
+                instruction.dest = mapping.get(instruction.dest, instruction.dest)
+            if instruction.op == 'copy' and instruction.args[0] == instruction.dest:
+                continue
+            instructions.append(instruction)
+        block.instructions = instructions
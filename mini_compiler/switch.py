@@ -0,0 +1,27 @@
+"""Jump tables for `switch` statements, shared by the engines that run them."""
+
+# Case values are dense enough for a list-indexed table when it needs at most
+# this many slots per case; sparser switches dispatch through a dict
+JUMP_TABLE_MAX_SLOTS_PER_CASE = 2
+
+
+def switch_value(value):
+    """Checks the value a switch dispatches on; only ints select a case."""
+    if type(value) is not int:
+        raise TypeError(f"switch needs an int value, got {type(value).__name__}")
+    return value
+
+
+def jump_table(targets, default):
+    """Builds the dispatch table for a switch.
+
+    `targets` maps case values to whatever the engine jumps to. Dense values
+    give (low, table): a tuple indexed by `value - low` whose gaps hold
+    `default`. Sparse values give (None, targets) for a dict lookup.
+    """
+    if not targets:
+        return None, dict(targets)
+    low, high = min(targets), max(targets)
+    if high - low + 1 > JUMP_TABLE_MAX_SLOTS_PER_CASE * len(targets):
+        return None, dict(targets)
+    return low, tuple(targets.get(value, default) for value in range(low, high + 1))
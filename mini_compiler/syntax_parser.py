@@ -2,8 +2,31 @@ from .ast_nodes import (
     BlockNode, NumberNode, StringNode, IdentifierNode,
     BinaryOperationNode, AssignmentNode, IfNode, ForNode, WhileNode,
     IncrementNode, DecrementNode, CinNode, PrintNode, FunctionDefinitionNode,
-    FunctionCallNode, ReturnNode, NoOpNode
+    FunctionCallNode, ReturnNode, NoOpNode, ArrayDeclarationNode, IndexNode, IndexAssignmentNode,
+    ParallelForNode, LogicalOperationNode, NotNode, SwitchNode, walk, child_nodes
 )
+from .rope import Rope, concat
+
+
+# Reduction clauses a `parallel for` accepts, e.g. `sum(total)`
+REDUCTIONS = ('sum', 'min', 'max')
+
+
+def spanned(parse):
+    """Gives the node a parse method returns the span of the tokens the method consumed.
+
+    An enclosing spanned method that returns the same node (a statement
+    around its keyword, a term around its parentheses) widens the span.
+    """
+    def parse_spanned(self, *args):
+        first = self.consumed()
+        node = parse(self, *args)
+        if node is not None and self.consumed() > first:
+            node.span = (self.source_tokens[first][2], self.source_tokens[self.consumed() - 1][3])
+        return node
+    parse_spanned.__name__ = parse.__name__
+    parse_spanned.__doc__ = parse.__doc__
+    return parse_spanned
 
 
 class Parser:
@@ -12,6 +35,7 @@ class Parser:
         self.symbol_table = {}  # Initialize as an empty dict
         self.function_definitions = {}  # Initialize as an empty dict
         self.tokens = tokens
+        self.source_tokens = list(tokens)  # Tokens are consumed from the front of self.tokens
 
     def parse(self):
         """Parses the token list into an AST."""
@@ -19,9 +43,28 @@ class Parser:
         while self.tokens:
             statement = self.parse_statement()
             if statement:
+                self.fill_spans(statement)
                 statements.append(statement)
         return statements
 
+    def consumed(self):
+        """How many tokens have been parsed so far."""
+        return len(self.source_tokens) - len(self.tokens)
+
+    def offset(self):
+        """Source offset of the last token parsed, or None before the first."""
+        if not self.consumed():
+            return None
+        return self.source_tokens[self.consumed() - 1][2]
+
+    def fill_spans(self, node):
+        """Gives nodes built without a parse method of their own (the `x` of `x = 1`) the span around them."""
+        for child in child_nodes(node):
+            if child.span is None:
+                child.span = node.span
+            self.fill_spans(child)
+
+    @spanned
     def parse_statement(self):
         """Parses individual statements."""
         if not self.tokens:
@@ -47,9 +90,16 @@ class Parser:
         elif token[0] == 'IF':
             return self.parse_if_statement()
 
+        elif token[0] == 'SWITCH':
+            return self.parse_switch_statement()
+
         elif token[0] == 'FOR':
             return self.parse_for_loop()
 
+        elif token[0] == 'PARALLEL':
+            self.require_token('FOR')
+            return self.parse_for_loop(parallel=True)
+
         elif token[0] == 'WHILE':
             return self.parse_while_loop()
 
@@ -59,12 +109,15 @@ class Parser:
         elif token[0] == 'SEMICOLON':
             return None  # Empty statement
 
-        raise ValueError(f"Unexpected token: {token}")
+        raise ValueError(f"Unexpected token: {token[:2]}")
 
     def parse_variable_declaration(self, data_type_token):
         """Parses variable declarations like `int x = 10;`."""
         data_type = data_type_token[1]
 
+        if self.tokens and self.tokens[0][0] == 'LBRACKET':
+            return self.parse_array_declaration(data_type)
+
         if not self.tokens or self.tokens[0][0] != 'IDENTIFIER':
             raise ValueError(f"Expected identifier after type '{data_type}'")
 
@@ -79,6 +132,34 @@ class Parser:
         self.require_semicolon()
         return AssignmentNode(IdentifierNode(identifier), value if value is not None else None)
 
+    def parse_array_declaration(self, element_type):
+        """Parses array declarations like `int[10] a;` or `float[n] b = c * 2;`."""
+        if element_type not in ('int', 'float'):
+            raise ValueError(f"Arrays of type '{element_type}' are not supported")
+
+        self.require_token('LBRACKET')
+        size = self.parse_expression()
+        self.require_token('RBRACKET')
+
+        if not self.tokens or self.tokens[0][0] != 'IDENTIFIER':
+            raise ValueError(f"Expected identifier after '{element_type}[...]'")
+        identifier = self.tokens.pop(0)[1]
+
+        value = None
+        if self.tokens and self.tokens[0][0] == 'ASSIGN':
+            self.tokens.pop(0)
+            value = self.parse_expression()
+
+        self.require_semicolon()
+        return ArrayDeclarationNode(IdentifierNode(identifier), element_type, size, value)
+
+    def parse_index(self):
+        """Parses `[expression]` after an array name."""
+        self.require_token('LBRACKET')
+        index = self.parse_expression()
+        self.require_token('RBRACKET')
+        return index
+
     def parse_identifier_statement(self, token):
         """Handles assignments and function calls for identifiers."""
         identifier = token[1]
@@ -90,6 +171,14 @@ class Parser:
             self.require_semicolon()
             return func_call
 
+        # Element assignment: `a[i] = value;`
+        if self.tokens and self.tokens[0][0] == 'LBRACKET':
+            index = self.parse_index()
+            self.require_token('ASSIGN')
+            value = self.parse_expression()
+            self.require_semicolon()
+            return IndexAssignmentNode(IdentifierNode(identifier), index, value)
+
         # Then handle assignment
         if self.tokens and self.tokens[0][0] == 'ASSIGN':
             self.tokens.pop(0)
@@ -103,7 +192,7 @@ class Parser:
             return IncrementNode(IdentifierNode(identifier), pre=False) if op[0] == 'INCREMENT' else DecrementNode(
                 IdentifierNode(identifier), pre=False)
 
-        raise ValueError(f"Unexpected token after identifier: {self.tokens[0]}")
+        raise ValueError(f"Unexpected token after identifier: {self.tokens[0][:2]}")
 
     def parse_print_statement(self):
         """Parses `cout << value;`."""
@@ -147,8 +236,71 @@ class Parser:
 
         return IfNode(condition, then_branch, else_branch)
 
-    def parse_for_loop(self):
-        """Parses `for (initialization; condition; increment) { block }`."""
+    def parse_switch_statement(self):
+        """Parses `switch (expression) { case 1: statements case 2: case 3: statements default: statements }`.
+
+        Each body runs up to the next label; labels with no statements of
+        their own share the body below them.
+        """
+        self.require_token('LPAREN')
+        expression = self.parse_expression()
+        self.require_token('RPAREN')
+        self.require_token('LBRACE')
+
+        cases = []
+        default = None
+        seen = set()
+        pending = []  # Labels waiting for the body below them; None stands for `default`
+        while self.tokens and self.tokens[0][0] != 'RBRACE':
+            token = self.tokens.pop(0)
+            if token[0] == 'CASE':
+                label = self.parse_case_value()
+                if label in seen:
+                    raise ValueError(f"Duplicate case {label} in switch")
+                seen.add(label)
+            elif token[0] == 'DEFAULT':
+                if default is not None or None in pending:
+                    raise ValueError("A switch can only have one default")
+                label = None
+            else:
+                raise ValueError(f"Expected 'case' or 'default' in switch, but found '{token[1]}'")
+            self.require_token('COLON')
+            pending.append(label)
+
+            statements = []
+            while self.tokens and self.tokens[0][0] not in ('CASE', 'DEFAULT', 'RBRACE'):
+                statement = self.parse_statement()
+                if statement:
+                    statements.append(statement)
+            if statements or not self.tokens or self.tokens[0][0] == 'RBRACE':
+                body = BlockNode(statements)
+                values = [label for label in pending if label is not None]
+                if values:
+                    cases.append((values, body))
+                if None in pending:
+                    default = body
+                pending = []
+
+        self.require_token('RBRACE')
+        return SwitchNode(expression, cases, default)
+
+    def parse_case_value(self):
+        """Parses a case label: an integer literal, optionally negative."""
+        negative = bool(self.tokens) and self.tokens[0][0] == 'SUBTRACTION'
+        if negative:
+            self.tokens.pop(0)
+        if not self.tokens or self.tokens[0][0] != 'INT' or type(self.tokens[0][1]) is not int:
+            found = self.tokens[0][1] if self.tokens else "end of input"
+            raise ValueError(f"Case labels must be integer literals, but found '{found}'")
+        value = self.tokens.pop(0)[1]
+        return -value if negative else value
+
+    def parse_for_loop(self, parallel=False):
+        """Parses `for (initialization; condition; increment) { block }`.
+
+        A `parallel for` may list reduction clauses such as `sum(total) max(best)`
+        between the closing parenthesis and the block.
+        """
         self.require_token('LPAREN')
 
         initialization = self.parse_statement()
@@ -157,15 +309,53 @@ class Parser:
         self.require_semicolon()
 
         increment = self.parse_increment_statement() or self.parse_statement() or NoOpNode()
-        print("DEBUG: Parsed for loop increment ->", repr(increment))
 
         self.require_token('RPAREN')
 
-        body = self.parse_block()
-        print("DEBUG: Parsed for loop body ->", repr(body))
+        reductions = self.parse_reductions() if parallel else None
 
-        return ForNode(initialization, condition, increment, body)
+        body = self.parse_block()
 
+        loop = ForNode(initialization, condition, increment, body)
+        if parallel:
+            self.check_parallel_loop(loop)
+            return ParallelForNode(loop, reductions)
+        return loop
+
+    def parse_reductions(self):
+        """Parses reduction clauses like `sum(total) min(low, best)` into (operation, name) pairs."""
+        reductions = []
+        while self.tokens and self.tokens[0][0] == 'IDENTIFIER' and self.tokens[0][1] in REDUCTIONS:
+            operation = self.tokens.pop(0)[1]
+            self.require_token('LPAREN')
+            while True:
+                if not self.tokens or self.tokens[0][0] != 'IDENTIFIER':
+                    raise ValueError(f"Expected variable name in '{operation}(...)'")
+                reductions.append((operation, self.tokens.pop(0)[1]))
+                if self.tokens and self.tokens[0][0] == 'COMMA':
+                    self.tokens.pop(0)
+                    continue
+                break
+            self.require_token('RPAREN')
+        return reductions
+
+    def check_parallel_loop(self, loop):
+        """A parallel loop must count one variable up by one, so its range can be split into chunks."""
+        initialization = loop.initialization
+        condition = loop.condition
+        if (isinstance(initialization, AssignmentNode) and initialization.value is not None
+                and isinstance(condition, BinaryOperationNode) and condition.operator in ('<', '<=')
+                and isinstance(condition.left, IdentifierNode)
+                and condition.left.name == initialization.identifier.name
+                and isinstance(loop.increment, IncrementNode)
+                and loop.increment.identifier.name == initialization.identifier.name):
+            # Chunks run independently, so none of them can end the loop for the others
+            if any(isinstance(node, ReturnNode) for node in walk(loop.body)):
+                raise ValueError("parallel for body must not return")
+            return
+        raise ValueError("parallel for needs the form 'for (i = start; i < bound; i++)'")
+
+    @spanned
     def parse_increment_statement(self):
         """Handles increment (`i++`) and decrement (`i--`) operators."""
         if not self.tokens:
@@ -187,19 +377,11 @@ class Parser:
     def parse_while_loop(self):
         """Parses `while (condition) { block }`."""
         self.require_token('LPAREN')
-
-        print("DEBUG: Starting condition parsing...")
-
         condition = self.parse_expression()
-
-        print("DEBUG: Parsed while loop condition ->", repr(condition))
-        print("DEBUG: Next token before RPAREN check ->", repr(self.tokens[0] if self.tokens else "None"))
         self.require_token('RPAREN')
 
         body = self.parse_block()
 
-        print("DEBUG: Parsed while loop body ->", repr(body))
-
         return WhileNode(condition, body)
 
     def parse_return_statement(self):
@@ -237,8 +419,11 @@ class Parser:
             raise ValueError("Expected return type")
 
         body = self.parse_block()
-        return FunctionDefinitionNode(function_name, parameters, body, return_type[1])
+        node = FunctionDefinitionNode(function_name, parameters, body, return_type[1])
+        self.function_definitions[function_name] = node
+        return node
 
+    @spanned
     def parse_block(self):
         """Parses `{ statements }` blocks."""
         self.require_token('LBRACE')
@@ -271,7 +456,24 @@ class Parser:
         return FunctionCallNode(name, arguments)
 
     def parse_expression(self):
-        """Parses expressions (numbers, variables, operations)."""
+        """Parses expressions. `||` binds loosest, then `&&`, then the other binary operators left to right."""
+        left = self.parse_and()
+        while self.tokens and self.tokens[0][0] == 'OR':
+            self.tokens.pop(0)
+            right = self.parse_and()
+            left = self.joined(LogicalOperationNode(left, '||', right))
+        return left
+
+    def parse_and(self):
+        left = self.parse_binary_expression()
+        while self.tokens and self.tokens[0][0] == 'AND':
+            self.tokens.pop(0)
+            right = self.parse_binary_expression()
+            left = self.joined(LogicalOperationNode(left, '&&', right))
+        return left
+
+    def parse_binary_expression(self):
+        """Parses arithmetic and comparisons (numbers, variables, operations)."""
         left = self.parse_term()
 
         # Handle function calls in expressions
@@ -286,11 +488,11 @@ class Parser:
                                                     'EQUAL', 'NOT_EQUAL']:
             op_token = self.tokens.pop(0)
             right = self.parse_term()
-            left = BinaryOperationNode(left, op_token[1], right)
+            left = self.joined(BinaryOperationNode(left, op_token[1], right))
 
-        print("DEBUG: Parsed Expression ->", repr(left))
         return left
 
+    @spanned
     def parse_term(self):
         """Parses terms (single tokens in expressions)."""
         if not self.tokens:
@@ -307,12 +509,22 @@ class Parser:
             # Check if this identifier is followed by a function call
             if self.tokens and self.tokens[0][0] == 'LPAREN':
                 return self.parse_function_call(self.tokens, token[1])
+            if self.tokens and self.tokens[0][0] == 'LBRACKET':
+                return IndexNode(IdentifierNode(token[1]), self.parse_index())
             return IdentifierNode(token[1])
+        elif token[0] == 'NOT':
+            return NotNode(self.parse_term())
         elif token[0] == 'LPAREN':
             expr = self.parse_expression()
             self.require_token('RPAREN')
             return expr
-        raise ValueError(f"Unexpected term: {token}")
+        raise ValueError(f"Unexpected term: {token[:2]}")
+
+    @staticmethod
+    def joined(node):
+        """Spans an operation from the start of its left operand to the end of its right one."""
+        node.span = (node.left.span[0], node.right.span[1])
+        return node
 
     def require_semicolon(self):
         """Ensures the next token is a semicolon."""
@@ -333,13 +545,9 @@ class Parser:
 
         token = self.tokens.pop(0)
 
-        print(f"DEBUG: Checking token for '{expected_token}' -> Found: {repr(token)}")
-
         if token[0] != expected_token:
             raise ValueError(f"Error: Expected '{expected_token}', but found '{token[1]}' instead.")
 
-        print(f"DEBUG: Consumed '{expected_token}' token successfully.")
-
     def evaluate_function_call(self, node):
         function_name = node.name
 
@@ -406,208 +614,190 @@ class Parser:
 
 
     def evaluate(self, node):
-        """Evaluates an AST node."""
-        try:
-            if isinstance(node, list):  # ✅ Handle list of statements
-                results = []
-                for stmt in node:
-                    try:
-                        result = self.evaluate(stmt)
-                        results.append(result)
-                    except Exception as e:
-                        self.output.append(f"Error: {e}")  # ✅ Store error but continue execution
-                return results  # ✅ Continue execution
-
-            elif isinstance(node, NumberNode):
-                return node.value
-
-            elif isinstance(node, StringNode):
-                return node.value
-
-            elif isinstance(node, IdentifierNode):
-                if node.name in self.symbol_table:
-                    val = self.symbol_table[node.name]
-                    # Handle the case where the value might be stored with a 'value' key
-                    if isinstance(val, dict) and 'value' in val:
-                        return val['value']
-                    return val
-                raise ValueError(f"Undefined variable: {node.name}" + "\n")
-
-            elif isinstance(node, BinaryOperationNode):
-                left_value = self.evaluate(node.left)
-                right_value = self.evaluate(node.right)
-
-                # Extract values from dicts if needed
-                if isinstance(left_value, dict) and 'value' in left_value:
-                    left_value = left_value['value']
-                if isinstance(right_value, dict) and 'value' in right_value:
-                    right_value = right_value['value']
-
-                # Handle None values
-                if left_value is None or right_value is None:
-                    raise ValueError("Cannot perform operation on uninitialized values" + "\n")
-
-                if node.operator == '+':
-                    if isinstance(left_value, (int, float)) and isinstance(right_value, (int, float)):
-                        return left_value + right_value
-                    elif isinstance(left_value, str) and isinstance(right_value, str):
-                        return left_value + right_value
-                    elif isinstance(left_value, (int, float)) and isinstance(right_value, str) or isinstance(left_value,
-                                                                                                             str) and isinstance(
-                        right_value, (int, float)):
-                        return str(left_value) + str(right_value)
-                    else:
-                        raise TypeError(f"Unsupported operands for +: {type(left_value)} and {type(right_value)}")
-
-                elif node.operator == '*':
-                    if isinstance(left_value, str) and isinstance(right_value, (int, float)) or \
-                            isinstance(right_value, str) and isinstance(left_value, (int, float)):
-                        raise TypeError("Multiplication between a string and a number is not allowed")
-
-                    if not isinstance(left_value, (int, float)) or not isinstance(right_value, (int, float)):
-                        raise TypeError("Unsupported operands for * (Multiplication requires two numbers)")
-
-                    return left_value * right_value
-
-                elif node.operator == '-':
-                    if not isinstance(left_value, (int, float)) or not isinstance(right_value, (int, float)):
-                        raise TypeError("Subtraction requires numeric operands")
-                    return left_value - right_value
-
-                elif node.operator == '/':
-                    if not isinstance(left_value, (int, float)) or not isinstance(right_value, (int, float)):
-                        raise TypeError("Division requires numeric operands")
-                    if right_value == 0:
-                        raise ZeroDivisionError("Division by zero is not allowed")
-                    return left_value / right_value
-                elif node.operator == '>':
-                    return left_value > right_value
-                elif node.operator == '<':
-                    return left_value < right_value
-                elif node.operator == '>=':
-                    return left_value >= right_value
-                elif node.operator == '<=':
-                    return left_value <= right_value
-                elif node.operator == '==':
-                    return left_value == right_value
-                elif node.operator == '!=':
-                    return left_value != right_value
+        """Evaluates an AST node; errors propagate to the caller."""
+        if isinstance(node, list):  # ✅ Handle list of statements
+            results = []
+            for stmt in node:
+                results.append(self.evaluate(stmt))
+            return results
+
+        elif isinstance(node, NumberNode):
+            return node.value
+
+        elif isinstance(node, StringNode):
+            return node.value
+
+        elif isinstance(node, IdentifierNode):
+            if node.name in self.symbol_table:
+                val = self.symbol_table[node.name]
+                # Handle the case where the value might be stored with a 'value' key
+                if isinstance(val, dict) and 'value' in val:
+                    return val['value']
+                return val
+            raise ValueError(f"Undefined variable: {node.name}" + "\n")
+
+        elif isinstance(node, BinaryOperationNode):
+            left_value = self.evaluate(node.left)
+            right_value = self.evaluate(node.right)
+
+            # Extract values from dicts if needed
+            if isinstance(left_value, dict) and 'value' in left_value:
+                left_value = left_value['value']
+            if isinstance(right_value, dict) and 'value' in right_value:
+                right_value = right_value['value']
+
+            # Handle None values
+            if left_value is None or right_value is None:
+                raise ValueError("Cannot perform operation on uninitialized values" + "\n")
+
+            if node.operator == '+':
+                if isinstance(left_value, (int, float)) and isinstance(right_value, (int, float)):
+                    return left_value + right_value
+                elif isinstance(left_value, (str, Rope)) and isinstance(right_value, (str, Rope)):
+                    return concat(left_value, right_value)
+                elif isinstance(left_value, (int, float)) and isinstance(right_value, (str, Rope)) or isinstance(left_value,
+                                                                                                         (str, Rope)) and isinstance(
+                    right_value, (int, float)):
+                    return concat(left_value if isinstance(left_value, (str, Rope)) else str(left_value),
+                                  right_value if isinstance(right_value, (str, Rope)) else str(right_value))
                 else:
-                    raise ValueError(f"Unknown binary operator: {node.operator}" + "\n")
+                    raise TypeError(f"Unsupported operands for +: {type(left_value)} and {type(right_value)}")
+
+            elif node.operator == '*':
+                if isinstance(left_value, (str, Rope)) and isinstance(right_value, (int, float)) or \
+                        isinstance(right_value, (str, Rope)) and isinstance(left_value, (int, float)):
+                    raise TypeError("Multiplication between a string and a number is not allowed")
+
+                if not isinstance(left_value, (int, float)) or not isinstance(right_value, (int, float)):
+                    raise TypeError("Unsupported operands for * (Multiplication requires two numbers)")
+
+                return left_value * right_value
+
+            elif node.operator == '-':
+                if not isinstance(left_value, (int, float)) or not isinstance(right_value, (int, float)):
+                    raise TypeError("Subtraction requires numeric operands")
+                return left_value - right_value
+
+            elif node.operator == '/':
+                if not isinstance(left_value, (int, float)) or not isinstance(right_value, (int, float)):
+                    raise TypeError("Division requires numeric operands")
+                if right_value == 0:
+                    raise ZeroDivisionError("Division by zero is not allowed")
+                return left_value / right_value
+            elif node.operator == '>':
+                return left_value > right_value
+            elif node.operator == '<':
+                return left_value < right_value
+            elif node.operator == '>=':
+                return left_value >= right_value
+            elif node.operator == '<=':
+                return left_value <= right_value
+            elif node.operator == '==':
+                return left_value == right_value
+            elif node.operator == '!=':
+                return left_value != right_value
+            else:
+                raise ValueError(f"Unknown binary operator: {node.operator}" + "\n")
 
-            elif isinstance(node, AssignmentNode):
-                value = None
-                if node.value is not None:
-                    value = self.evaluate(node.value)
+        elif isinstance(node, AssignmentNode):
+            value = None
+            if node.value is not None:
+                value = self.evaluate(node.value)
 
-                if isinstance(value, NumberNode):
-                    value = value.value
+            if isinstance(value, NumberNode):
+                value = value.value
 
-                self.symbol_table[node.identifier.name] = value
-                return None
+            self.symbol_table[node.identifier.name] = value
+            return None
 
-            elif isinstance(node, PrintNode):
-                value = self.evaluate(node.value)
+        elif isinstance(node, PrintNode):
+            value = self.evaluate(node.value)
 
-                if isinstance(value, NumberNode):
-                    value = value.value
-
-                if value is None:
-                    raise ValueError("Attempting to print an uninitialized or undefined variable" + "\n")
-
-                if not isinstance(value, (str, int, float)):
-                    raise TypeError(f"Print statement only supports numbers and strings, got {type(value)}")
-
-                self.output.append(str(value) + "\n")  # ✅ Ensure output appears on a new line
-                return value
-
-            elif isinstance(node, CinNode):
-                # Implement your input handling here
-                # For now, let's just assign a default value
-                self.symbol_table[node.identifier.name] = 0
-                return None
-
-            elif isinstance(node, IfNode):
-                condition_value = self.evaluate(node.condition)
-                if condition_value:
-                    return self.evaluate(node.then_branch)
-                elif node.else_branch:
-                    return self.evaluate(node.else_branch)
-                return None
-
-            elif isinstance(node, IncrementNode):
-                if node.identifier.name not in self.symbol_table:
-                    raise ValueError(f"Undefined variable: {node.identifier.name} before increment" + "\n")
-                if node.pre:
-                    self.symbol_table[node.identifier.name] += 1
-                    return self.symbol_table[node.identifier.name]
-                else:
-                    old_value = self.symbol_table[node.identifier.name]
-                    self.symbol_table[node.identifier.name] += 1
-                    return old_value
-
-            elif isinstance(node, DecrementNode):
-                if node.identifier.name not in self.symbol_table:
-                    raise ValueError(f"Undefined variable: {node.identifier.name} before decrement" + "\n")
-                if node.pre:
-                    self.symbol_table[node.identifier.name] -= 1
-                    return self.symbol_table[node.identifier.name]
-                else:
-                    old_value = self.symbol_table[node.identifier.name]
-                    self.symbol_table[node.identifier.name] -= 1
-                    return old_value
-
-            elif isinstance(node, ForNode):
-                self.evaluate(node.initialization)
-                while self.evaluate(node.condition):
-                    # Handle BlockNode or list of statements
-                    statements = node.body.statements if isinstance(node.body, BlockNode) else node.body
-                    for stmt in statements:
-                        try:
-                            self.evaluate(stmt)
-                        except Exception as e:
-                            self.output.append(f"Error in loop: {e}")  # ✅ Continue loop execution
-                    if node.increment:
-                        self.evaluate(node.increment)
-                return None
-
-            elif isinstance(node, WhileNode):
+            if isinstance(value, NumberNode):
+                value = value.value
+
+            if value is None:
+                raise ValueError("Attempting to print an uninitialized or undefined variable" + "\n")
+
+            if not isinstance(value, (str, Rope, int, float)):
+                raise TypeError(f"Print statement only supports numbers and strings, got {type(value)}")
+
+            self.output.append(str(value) + "\n")  # ✅ Ensure output appears on a new line
+            return value
+
+        elif isinstance(node, CinNode):
+            # Implement your input handling here
+            # For now, let's just assign a default value
+            self.symbol_table[node.identifier.name] = 0
+            return None
+
+        elif isinstance(node, IfNode):
+            condition_value = self.evaluate(node.condition)
+            if condition_value:
+                return self.evaluate(node.then_branch)
+            elif node.else_branch:
+                return self.evaluate(node.else_branch)
+            return None
+
+        elif isinstance(node, IncrementNode):
+            if node.identifier.name not in self.symbol_table:
+                raise ValueError(f"Undefined variable: {node.identifier.name} before increment" + "\n")
+            if node.pre:
+                self.symbol_table[node.identifier.name] += 1
+                return self.symbol_table[node.identifier.name]
+            else:
+                old_value = self.symbol_table[node.identifier.name]
+                self.symbol_table[node.identifier.name] += 1
+                return old_value
+
+        elif isinstance(node, DecrementNode):
+            if node.identifier.name not in self.symbol_table:
+                raise ValueError(f"Undefined variable: {node.identifier.name} before decrement" + "\n")
+            if node.pre:
+                self.symbol_table[node.identifier.name] -= 1
+                return self.symbol_table[node.identifier.name]
+            else:
+                old_value = self.symbol_table[node.identifier.name]
+                self.symbol_table[node.identifier.name] -= 1
+                return old_value
+
+        elif isinstance(node, ForNode):
+            self.evaluate(node.initialization)
+            while self.evaluate(node.condition):
                 # Handle BlockNode or list of statements
                 statements = node.body.statements if isinstance(node.body, BlockNode) else node.body
-                while self.evaluate(node.condition):
-                    for stmt in statements:
-                        try:
-                            self.evaluate(stmt)
-                        except Exception as e:
-                            self.output.append(f"Error in loop: {e}")  # ✅ Continue loop execution
-                return None
-
-            elif isinstance(node, FunctionCallNode):
-                return self.evaluate_function_call(node)
-
-            elif isinstance(node, FunctionDefinitionNode):
-                # Function definitions are handled during parsing, not evaluation
-                return None
-
-            elif isinstance(node, ReturnNode):
-                return self.evaluate(node.expression)
-
-            elif isinstance(node, NoOpNode):
-                return None
-
-            elif isinstance(node, BlockNode):
-                results = []
-                for stmt in node.statements:
-                    try:
-                        result = self.evaluate(stmt)
-                        results.append(result)
-                    except Exception as e:
-                        self.output.append(f"Error: {e}")
-                return results
+                for stmt in statements:
+                    self.evaluate(stmt)
+                if node.increment:
+                    self.evaluate(node.increment)
+            return None
+
+        elif isinstance(node, WhileNode):
+            # Handle BlockNode or list of statements
+            statements = node.body.statements if isinstance(node.body, BlockNode) else node.body
+            while self.evaluate(node.condition):
+                for stmt in statements:
+                    self.evaluate(stmt)
+            return None
 
-            raise ValueError(f"Unknown AST node: {node}" + "\n")
+        elif isinstance(node, FunctionCallNode):
+            return self.evaluate_function_call(node)
 
-        except Exception as e:
-            self.output.append(f"Error: {e}")  # ✅ Store error instead of stopping execution
+        elif isinstance(node, FunctionDefinitionNode):
+            # Function definitions are handled during parsing, not evaluation
             return None
 
+        elif isinstance(node, ReturnNode):
+            return self.evaluate(node.expression)
+
+        elif isinstance(node, NoOpNode):
+            return None
+
+        elif isinstance(node, BlockNode):
+            results = []
+            for stmt in node.statements:
+                results.append(self.evaluate(stmt))
+            return results
+
+        raise ValueError(f"Unknown AST node: {node}" + "\n")
+
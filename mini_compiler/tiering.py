@@ -0,0 +1,110 @@
+class TieredExecution:
+    """Counts function calls and loop iterations and promotes hot code to compiled closures.
+
+    Code starts on the interpreter. Once a function has been called, or a loop
+    has iterated, `threshold` times it is handed to the `ClosureCompiler`; with
+    `background=True` that happens on a worker thread and the interpreter keeps
+    running until the compiled version is ready. Code that cannot be compiled
+    stays interpreted.
+
+    With `loop_jit='trace'` hot loops are handed to the `TracingJIT` instead,
+    which records the path actually taken through the body; loops it cannot
+    trace still fall back to closures.
+    """
+
+    def __init__(self, threshold=1000, background=True, loop_jit='closures'):
+        if loop_jit not in ('closures', 'trace'):
+            raise ValueError(f"Unknown loop JIT: {loop_jit}")
+        self.threshold = threshold
+        self.background = background
+        self.loop_jit = loop_jit
+        # Both are imported and built when something first gets hot; most runs never get there
+        self.compiler = None
+        self.tracer = None
+        self.counters = {}  # node -> executions seen so far
+        self.compiled = {}  # node -> compiled callable
+        self.pending = {}   # node -> Future of a background compilation
+        self.failed = set()
+        self.executor = None
+
+    def __reduce__(self):
+        # A copy sent to another process starts cold: compiled closures and threads do not travel
+        return TieredExecution, (self.threshold, self.background, self.loop_jit)
+
+    def function_entry(self, definition):
+        """Counts one call of a function; returns its compiled body once available."""
+        compiled = self.compiled.get(definition)
+        if compiled is not None:
+            return compiled
+        return self.count(definition, self.compile_function)
+
+    def loop_entry(self, node):
+        """Returns the compiled form of a loop that was already promoted, or None."""
+        return self.compiled.get(node)
+
+    def loop_backedge(self, node):
+        """Counts one loop iteration; returns the compiled loop once available."""
+        compiled = self.compiled.get(node)
+        if compiled is not None:
+            return compiled
+        if self.loop_jit == 'trace' and node not in self.failed:
+            if self.counters.get(node, 0) + 1 >= self.threshold:
+                if self.tracer is None:
+                    from .tracing_jit import TracingJIT
+                    self.tracer = TracingJIT()
+                driver = self.tracer.driver(node)
+                if driver is not None:
+                    self.compiled[node] = driver
+                    return driver
+        return self.count(node, self.compile_loop)
+
+    def compile_function(self, definition):
+        return self.closure_compiler().compile_function(definition)
+
+    def compile_loop(self, node):
+        return self.closure_compiler().compile_loop(node)
+
+    def closure_compiler(self):
+        if self.compiler is None:
+            from .closure_compiler import ClosureCompiler
+            self.compiler = ClosureCompiler()
+        return self.compiler
+
+    def count(self, node, compile_function):
+        count = self.counters.get(node, 0) + 1
+        self.counters[node] = count
+        if count < self.threshold or node in self.failed:
+            return None
+        return self.promote(node, compile_function)
+
+    def promote(self, node, compile_function):
+        """Starts or finishes compiling a hot node."""
+        if not self.background:
+            return self.install(node, compile_function, None)
+
+        future = self.pending.get(node)
+        if future is None:
+            if self.executor is None:
+                from concurrent.futures import ThreadPoolExecutor  # Only needed once something gets hot
+                self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mini-compiler-tier")
+            self.pending[node] = self.executor.submit(compile_function, node)
+            return None
+        if not future.done():
+            return None
+        del self.pending[node]
+        return self.install(node, compile_function, future)
+
+    def install(self, node, compile_function, future):
+        try:
+            compiled = future.result() if future is not None else compile_function(node)
+        except NotImplementedError:
+            self.failed.add(node)
+            return None
+        self.compiled[node] = compiled
+        return compiled
+
+    def close(self):
+        """Waits for outstanding compilations and stops the worker thread."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
@@ -0,0 +1,422 @@
+import time
+
+from .ast_nodes import (
+    BlockNode, NumberNode, StringNode, IdentifierNode, BinaryOperationNode,
+    AssignmentNode, IfNode, ForNode, WhileNode, IncrementNode, DecrementNode, PrintNode, NoOpNode,
+    LogicalOperationNode, NotNode
+)
+from .rope import Rope, concat
+
+
+# Exit codes returned by compiled traces; side exits use their guard index (>= 0)
+LOOP_DONE = -1
+ENTRY_GUARD_FAILED = -2
+
+# Value of a variable the trace binds that had none when it was entered, until the trace stores it
+UNBOUND = object()
+
+# A trace that keeps failing its guards is thrown away and recorded again
+MAX_GUARD_FAILURES = 64
+MAX_RECORDINGS = 4
+
+NUMERIC_TYPES = (int, float, bool)
+TEXT_TYPES = (str, Rope)
+GUARDABLE_TYPES = NUMERIC_TYPES + TEXT_TYPES + (type(None),)
+COMPARISONS = ('==', '!=', '>', '<', '>=', '<=')
+
+
+class TraceAbort(Exception):
+    """Raised while recording or generating a trace that cannot be compiled."""
+
+
+class TraceStats:
+    """Counters describing what the tracing JIT did during a run."""
+
+    def __init__(self):
+        self.traces_compiled = 0
+        self.traces_aborted = 0
+        self.trace_entries = 0
+        self.guard_failures = 0
+        self.compiled_time = 0.0  # Seconds spent inside compiled traces
+
+    def as_dict(self):
+        return {
+            'traces_compiled': self.traces_compiled,
+            'traces_aborted': self.traces_aborted,
+            'trace_entries': self.trace_entries,
+            'guard_failures': self.guard_failures,
+            'compiled_time': self.compiled_time,
+        }
+
+    def __repr__(self):
+        return f"TraceStats({self.as_dict()})"
+
+
+class Trace:
+    """A compiled loop trace and the interpreter continuations of its side exits."""
+
+    def __init__(self, function, source, exits):
+        self.function = function
+        self.source = source  # Generated Python source, kept for inspection
+        self.exits = exits    # guard index -> list of nodes the interpreter runs after that exit
+        self.guard_failures = 0
+
+
+class TraceRecorder:
+    """Records the path one loop iteration takes and turns it into Python source."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.ops = []  # ('stmt', node, continuation) or ('guard', condition, taken, continuation)
+
+    def record_iteration(self, ev):
+        """Executes one iteration of the loop body on the interpreter, recording its path.
+
+        The loop condition must already have been checked by the caller.
+        """
+        rest = [self.loop.increment] if isinstance(self.loop, ForNode) else []
+        self.walk(ev, self.loop.body.statements, rest)
+        for node in rest:
+            self.ops.append(('stmt', node, [node]))
+            ev.evaluate(node)
+
+    def walk(self, ev, statements, rest):
+        for index, statement in enumerate(statements):
+            continuation = [statement] + statements[index + 1:] + rest
+            if isinstance(statement, IfNode):
+                taken = bool(ev.evaluate(statement.condition))
+                self.ops.append(('guard', statement.condition, taken, continuation))
+                branch = statement.then_branch if taken else statement.else_branch
+                if branch:
+                    self.walk(ev, branch.statements, statements[index + 1:] + rest)
+            else:
+                self.ops.append(('stmt', statement, continuation))
+                ev.evaluate(statement)
+
+    def generate(self, entry_types):
+        """Generates the trace function's source; returns (source, exits)."""
+        generator = TraceCodeGenerator(dict(entry_types))
+        return generator.generate(self.loop.condition, self.ops)
+
+
+class TraceCodeGenerator:
+    """Emits type-specialised Python source for a recorded trace."""
+
+    def __init__(self, types):
+        self.entry_types = dict(types)
+        self.types = types  # Variable types at the current point of the trace
+        self.lines = []
+        self.exits = {}
+        self.assigned = set()
+
+    def generate(self, condition, ops):
+        for name, entry_type in self.entry_types.items():
+            if entry_type not in GUARDABLE_TYPES:
+                raise TraceAbort(f"Cannot guard variable '{name}' of type {entry_type.__name__}")
+
+        self.emit_division_guards(condition, None)
+        self.emit(f"if not {self.truth(condition)}:", 2)
+        self.emit("exit_code = LOOP_DONE", 3)
+        self.emit("break", 3)
+
+        for op in ops:
+            if op[0] == 'guard':
+                _, guard_condition, taken, continuation = op
+                self.emit_division_guards(guard_condition, continuation)
+                test = self.truth(guard_condition)
+                self.emit_exit(test if not taken else f"not {test}", continuation)
+            else:
+                self.emit_statement(op[1], op[2])
+
+        # The entry guard is only checked once, so every iteration must end with the types it started with
+        for name, entry_type in self.entry_types.items():
+            if self.types.get(name) is not entry_type:
+                raise TraceAbort(f"Type of '{name}' is not stable across iterations")
+
+        names = sorted(self.entry_types)
+        source = ["def trace(symbol_table, output):"]
+        if names:
+            source.append("    try:")
+            source.extend(f"        v_{name} = symbol_table['{name}']" for name in names)
+            source.append("    except KeyError:")
+            source.append("        return ENTRY_GUARD_FAILED")
+            checks = " or ".join(f"type(v_{name}) is not {self.entry_types[name].__name__}" for name in names)
+            source.append(f"    if {checks}:")
+            source.append("        return ENTRY_GUARD_FAILED")
+        # A name first bound on the trace's path stays unbound when an exit comes before its store
+        unbound = sorted(self.assigned - set(self.entry_types))
+        source.extend(f"    v_{name} = UNBOUND" for name in unbound)
+        source.append("    while True:")
+        source.extend(self.lines)
+        for name in sorted(self.assigned):
+            if name in self.entry_types:
+                source.append(f"    symbol_table['{name}'] = v_{name}")
+            else:
+                source.append(f"    if v_{name} is not UNBOUND:")
+                source.append(f"        symbol_table['{name}'] = v_{name}")
+        source.append("    return exit_code")
+        return "\n".join(source) + "\n", self.exits
+
+    def emit(self, line, depth):
+        self.lines.append("    " * depth + line)
+
+    def emit_exit(self, test, continuation):
+        """Emits a guard; a None continuation hands the whole iteration back to the interpreter."""
+        if continuation is None:
+            exit_code = "ENTRY_GUARD_FAILED"
+        else:
+            exit_code = len(self.exits)
+            self.exits[exit_code] = continuation
+        self.emit(f"if {test}:", 2)
+        self.emit(f"exit_code = {exit_code}", 3)
+        self.emit("break", 3)
+
+    def emit_division_guards(self, node, continuation):
+        """Leaves the trace before a division by zero, so the interpreter reports it."""
+        for divisor in self.divisors(node):
+            code, _ = self.expression(divisor)
+            self.emit_exit(f"{code} == 0", continuation)
+
+    def divisors(self, node):
+        if isinstance(node, BinaryOperationNode):
+            found = self.divisors(node.left) + self.divisors(node.right)
+            if node.operator == '/':
+                found.append(node.right)
+            return found
+        if isinstance(node, LogicalOperationNode):
+            # The right operand may not run; expression() refuses divisions there
+            return self.divisors(node.left)
+        if isinstance(node, NotNode):
+            return self.divisors(node.operand)
+        return []
+
+    def emit_statement(self, node, continuation):
+        if isinstance(node, AssignmentNode):
+            if node.value is None:
+                raise TraceAbort("Declaration without a value")
+            self.emit_division_guards(node.value, continuation)
+            code, value_type = self.expression(node.value)
+            self.store(node.identifier.name, code, value_type)
+
+        elif isinstance(node, (IncrementNode, DecrementNode)):
+            name = node.identifier.name
+            if self.types.get(name) not in NUMERIC_TYPES:
+                raise TraceAbort(f"Cannot step non-numeric variable '{name}'")
+            step = '+' if isinstance(node, IncrementNode) else '-'
+            value_type = float if self.types[name] is float else int
+            self.store(name, f"v_{name} {step} 1", value_type)
+
+        elif isinstance(node, PrintNode):
+            self.emit_division_guards(node.value, continuation)
+            code, value_type = self.expression(node.value)
+            if value_type is not type(None):
+                self.emit(f"output.append(str({code}) + '\\n')", 2)
+
+        elif isinstance(node, NoOpNode):
+            pass
+
+        else:
+            raise TraceAbort(f"Cannot trace statement: {node}")
+
+    def store(self, name, code, value_type):
+        self.emit(f"v_{name} = {code}", 2)
+        self.types[name] = value_type
+        self.assigned.add(name)
+
+    def truth(self, node):
+        code, _ = self.expression(node)
+        return f"({code})"
+
+    def expression(self, node):
+        """Returns (python_source, python_type) for a side-effect-free expression."""
+        if isinstance(node, NumberNode):
+            return repr(node.value), type(node.value)
+
+        elif isinstance(node, StringNode):
+            return repr(node.value), str
+
+        elif isinstance(node, IdentifierNode):
+            if node.name not in self.types:
+                raise TraceAbort(f"Variable '{node.name}' is not defined on trace entry")
+            return f"v_{node.name}", self.types[node.name]
+
+        elif isinstance(node, BinaryOperationNode):
+            left, left_type = self.expression(node.left)
+            right, right_type = self.expression(node.right)
+            numeric = left_type in NUMERIC_TYPES and right_type in NUMERIC_TYPES
+            result_type = float if float in (left_type, right_type) else int
+
+            if node.operator == '+':
+                if numeric:
+                    return f"({left} + {right})", result_type
+                # Concatenation always builds a rope so the result type is stable
+                if left_type in TEXT_TYPES and right_type in TEXT_TYPES:
+                    return f"concat({left}, {right}, 0)", Rope
+
+            elif node.operator in ('-', '*') and numeric:
+                return f"({left} {node.operator} {right})", result_type
+
+            elif node.operator == '/' and numeric:
+                return f"({left} / {right})", float
+
+            elif node.operator in ('==', '!='):
+                return f"({left} {node.operator} {right})", bool
+
+            elif node.operator in COMPARISONS and (numeric or (left_type in TEXT_TYPES and right_type in TEXT_TYPES)):
+                return f"({left} {node.operator} {right})", bool
+
+            raise TraceAbort(f"Cannot trace {left_type.__name__} {node.operator} {right_type.__name__}")
+
+        elif isinstance(node, LogicalOperationNode):
+            if self.divisors(node.right):
+                raise TraceAbort("Cannot guard a division that short-circuiting may skip")
+            left, left_type = self.expression(node.left)
+            right, right_type = self.expression(node.right)
+            code = f"({left} {'and' if node.operator == '&&' else 'or'} {right})"
+            if left_type is bool and right_type is bool:
+                return code, bool
+            return f"bool{code}", bool
+
+        elif isinstance(node, NotNode):
+            operand, _ = self.expression(node.operand)
+            return f"(not {operand})", bool
+
+        raise TraceAbort(f"Cannot trace expression: {node}")
+
+
+class TracingJIT:
+    """Records and compiles traces for hot loops."""
+
+    def __init__(self):
+        self.stats = TraceStats()
+
+    def driver(self, loop):
+        """Returns a callable that runs the rest of a loop through traces, or None if it cannot be traced."""
+        if not isinstance(loop.body, BlockNode) or not self.traceable(loop.body):
+            return None
+        if not self.traceable(loop.condition):
+            return None
+        if isinstance(loop, ForNode) and not self.traceable(loop.increment):
+            return None
+        return LoopDriver(self, loop)
+
+    def traceable(self, node):
+        """Checks statically that a node only uses constructs a trace can replay."""
+        if isinstance(node, BlockNode):
+            return all(self.traceable(statement) for statement in node.statements)
+        if isinstance(node, IfNode):
+            return (self.traceable(node.condition) and self.traceable(node.then_branch)
+                    and (node.else_branch is None or self.traceable(node.else_branch)))
+        if isinstance(node, AssignmentNode):
+            return node.value is not None and self.traceable(node.value)
+        if isinstance(node, PrintNode):
+            return self.traceable(node.value)
+        if isinstance(node, (BinaryOperationNode, LogicalOperationNode)):
+            return self.traceable(node.left) and self.traceable(node.right)
+        if isinstance(node, NotNode):
+            return self.traceable(node.operand)
+        return isinstance(node, (NumberNode, StringNode, IdentifierNode, IncrementNode,
+                                 DecrementNode, NoOpNode))
+
+    def record(self, ev, loop):
+        """Runs one iteration while recording it; returns the compiled Trace or None."""
+        entry_types = {}
+        for name in self.variables(loop):
+            if name in ev.symbol_table:
+                entry_types[name] = type(ev.symbol_table[name])
+
+        recorder = TraceRecorder(loop)
+        recorder.record_iteration(ev)
+
+        try:
+            source, exits = recorder.generate(entry_types)
+        except TraceAbort:
+            self.stats.traces_aborted += 1
+            return None
+
+        namespace = {'LOOP_DONE': LOOP_DONE, 'ENTRY_GUARD_FAILED': ENTRY_GUARD_FAILED, 'NoneType': type(None),
+                     'Rope': Rope, 'concat': concat, 'UNBOUND': UNBOUND}
+        exec(compile(source, "<mini-compiler trace>", "exec"), namespace)
+        self.stats.traces_compiled += 1
+        return Trace(namespace['trace'], source, exits)
+
+    def variables(self, node, found=None):
+        """Collects the names of all variables a loop reads or writes."""
+        if found is None:
+            found = set()
+        if isinstance(node, IdentifierNode):
+            found.add(node.name)
+        elif isinstance(node, (BinaryOperationNode, LogicalOperationNode)):
+            self.variables(node.left, found)
+            self.variables(node.right, found)
+        elif isinstance(node, NotNode):
+            self.variables(node.operand, found)
+        elif isinstance(node, AssignmentNode):
+            found.add(node.identifier.name)
+            self.variables(node.value, found)
+        elif isinstance(node, (IncrementNode, DecrementNode)):
+            found.add(node.identifier.name)
+        elif isinstance(node, PrintNode):
+            self.variables(node.value, found)
+        elif isinstance(node, IfNode):
+            self.variables(node.condition, found)
+            self.variables(node.then_branch, found)
+            self.variables(node.else_branch, found)
+        elif isinstance(node, BlockNode):
+            for statement in node.statements:
+                self.variables(statement, found)
+        elif isinstance(node, ForNode):
+            self.variables(node.condition, found)
+            self.variables(node.increment, found)
+            self.variables(node.body, found)
+        elif isinstance(node, WhileNode):
+            self.variables(node.condition, found)
+            self.variables(node.body, found)
+        return found
+
+
+class LoopDriver:
+    """Runs the remaining iterations of one loop, alternating between its trace and the interpreter."""
+
+    def __init__(self, jit, loop):
+        self.jit = jit
+        self.loop = loop
+        self.trace = None
+        self.recordings = 0
+
+    def __call__(self, ev):
+        loop = self.loop
+        stats = self.jit.stats
+
+        while True:
+            trace = self.trace
+            if trace is not None:
+                stats.trace_entries += 1
+                start = time.perf_counter()
+                exit_code = trace.function(ev.symbol_table, ev.output)
+                stats.compiled_time += time.perf_counter() - start
+
+                if exit_code == LOOP_DONE:
+                    return
+                stats.guard_failures += 1
+                trace.guard_failures += 1
+                if trace.guard_failures > MAX_GUARD_FAILURES:
+                    self.trace = None
+
+                if exit_code >= 0:
+                    # Side exit: finish the current iteration on the interpreter
+                    for node in trace.exits[exit_code]:
+                        ev.evaluate(node)
+                    continue
+
+            if not ev.evaluate(loop.condition):
+                return
+
+            if self.trace is None and self.recordings < MAX_RECORDINGS:
+                self.recordings += 1
+                self.trace = self.jit.record(ev, loop)
+                continue
+
+            ev.evaluate(loop.body)
+            if isinstance(loop, ForNode):
+                ev.evaluate(loop.increment)
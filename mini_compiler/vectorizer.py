@@ -0,0 +1,334 @@
+import operator
+
+from .arrays import numpy, ndarray, on_numpy_loaded
+from .ast_nodes import (
+    BlockNode, NumberNode, StringNode, IdentifierNode, BinaryOperationNode,
+    AssignmentNode, IfNode, ForNode, WhileNode, IncrementNode, DecrementNode,
+    CinNode, PrintNode, FunctionDefinitionNode, FunctionCallNode, ReturnNode, NoOpNode,
+    ArrayDeclarationNode, IndexNode, IndexAssignmentNode, VectorizedLoopNode, ParallelForNode,
+    LogicalOperationNode, NotNode, SwitchNode
+)
+
+# Operators an element-wise body may use; each works unchanged on NumPy arrays
+VECTOR_OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+}
+
+SCALAR_TYPES = (int, float, bool)
+
+
+def _bind_numpy(module):
+    global numpy, ndarray
+    numpy, ndarray = module, module.ndarray
+
+
+on_numpy_loaded(_bind_numpy)
+
+
+class NotVectorizable(Exception):
+    """Raised while analysing a loop that cannot run as whole-array operations; the message says why."""
+
+
+class LoopVectorizer:
+    """Rewrites element-wise `for` loops over arrays into whole-array NumPy operations.
+
+    A candidate loop counts `i` up by one from its initial value to a
+    loop-invariant bound, and its body only stores to `a[i]`, possibly under
+    `if` statements (which become masks). Reads may be `b[i + k]` for a
+    constant k. The body then runs one statement at a time over the whole
+    range instead of one iteration at a time, and the dependence check makes
+    sure every read still sees the same value: reading an earlier element
+    of an array is only allowed after the statement that writes it, and
+    reading a later element only before (or in) that statement. Division
+    needs a non-zero literal divisor, because a zero found half-way through
+    would leave some stores done.
+
+    Array names never alias, since assigning an array copies into its own
+    buffer. `report` lists every `for` loop seen, with the reason for loops
+    that were left alone.
+    """
+
+    def __init__(self):
+        self.report = []
+        self.loops_seen = 0
+
+    def rewrite(self, statements):
+        return [self.rewrite_statement(statement) for statement in statements]
+
+    def rewrite_statement(self, node):
+        if isinstance(node, ForNode):
+            self.loops_seen += 1
+            number = self.loops_seen
+            try:
+                vectorized = self.vectorize(node)
+            except NotVectorizable as e:
+                self.report.append(f"loop {number} ({self.describe(node)}): not vectorised: {e}")
+            else:
+                self.report.append(f"loop {number} ({self.describe(node)}): vectorised")
+                return vectorized
+            node.body = self.rewrite_statement(node.body)
+        elif isinstance(node, (WhileNode, ParallelForNode)):
+            # The body of a parallel loop runs per worker; loops inside it can still be vectorised
+            target = node.loop if isinstance(node, ParallelForNode) else node
+            target.body = self.rewrite_statement(target.body)
+        elif isinstance(node, IfNode):
+            node.then_branch = self.rewrite_statement(node.then_branch)
+            if node.else_branch:
+                node.else_branch = self.rewrite_statement(node.else_branch)
+        elif isinstance(node, SwitchNode):
+            for _, body in node.cases:
+                self.rewrite_statement(body)
+            if node.default and all(node.default is not body for _, body in node.cases):
+                self.rewrite_statement(node.default)
+        elif isinstance(node, BlockNode):
+            node.statements = self.rewrite(node.statements)
+        elif isinstance(node, FunctionDefinitionNode):
+            node.body = self.rewrite_statement(node.body)
+        return node
+
+    def describe(self, loop):
+        if isinstance(loop.initialization, AssignmentNode):
+            return f"for {loop.initialization.identifier.name}"
+        return "for"
+
+    def vectorize(self, loop):
+        """Returns the VectorizedLoopNode for a loop, or raises NotVectorizable."""
+        initialization = loop.initialization
+        if not isinstance(initialization, AssignmentNode) or initialization.value is None:
+            raise NotVectorizable("the loop does not start by assigning its counter")
+        self.variable = variable = initialization.identifier.name
+
+        condition = loop.condition
+        if not (isinstance(condition, BinaryOperationNode) and condition.operator in ('<', '<=')
+                and isinstance(condition.left, IdentifierNode) and condition.left.name == variable):
+            raise NotVectorizable(f"the condition is not '{variable} < bound' or '{variable} <= bound'")
+        increment = loop.increment
+        if not (isinstance(increment, IncrementNode) and increment.identifier.name == variable):
+            raise NotVectorizable(f"the counter does not step by '{variable}++'")
+        if not isinstance(loop.body, BlockNode):
+            raise NotVectorizable("the body is not a block")
+
+        self.scalars = set()
+        self.reads = []   # (array, offset, position)
+        self.writes = []  # (array, position)
+        self.position = 0
+        self.invariant(condition.right)
+        self.statements(loop.body.statements)
+        if not self.writes:
+            raise NotVectorizable("the body stores to no array")
+        self.check_dependences()
+
+        accesses = sorted({(array, offset) for array, offset, _ in self.reads}
+                          | {(array, 0) for array, _ in self.writes})
+        return VectorizedLoopNode(loop, variable, condition.right, condition.operator == '<=',
+                                  accesses, sorted(self.scalars - {variable}))
+
+    def invariant(self, node):
+        """Checks the loop bound: literals and variables the body cannot change."""
+        if isinstance(node, NumberNode):
+            return
+        if isinstance(node, IdentifierNode) and node.name != self.variable:
+            self.scalars.add(node.name)
+            return
+        if isinstance(node, BinaryOperationNode) and node.operator in ('+', '-', '*'):
+            self.invariant(node.left)
+            self.invariant(node.right)
+            return
+        raise NotVectorizable("the bound is not loop-invariant arithmetic")
+
+    def statements(self, statements):
+        for statement in statements:
+            self.statement(statement)
+
+    def statement(self, node):
+        if isinstance(node, IndexAssignmentNode):
+            name = node.identifier.name
+            if not (isinstance(node.index, IdentifierNode) and node.index.name == self.variable):
+                raise NotVectorizable(f"it stores to {name}[...] rather than {name}[{self.variable}]")
+            self.expression(node.value)
+            self.writes.append((name, self.position))
+            self.position += 1
+        elif isinstance(node, SwitchNode):
+            raise NotVectorizable("it contains a switch")
+        elif isinstance(node, IfNode):
+            self.expression(node.condition)
+            self.position += 1
+            self.statements(node.then_branch.statements)
+            if node.else_branch:
+                self.statements(node.else_branch.statements)
+        elif isinstance(node, NoOpNode):
+            pass
+        elif isinstance(node, AssignmentNode):
+            raise NotVectorizable(f"it assigns the scalar '{node.identifier.name}', "
+                                  f"which carries a value from one iteration to the next")
+        elif isinstance(node, (IncrementNode, DecrementNode, CinNode)):
+            raise NotVectorizable(f"it changes the scalar '{node.identifier.name}'")
+        elif isinstance(node, PrintNode):
+            raise NotVectorizable("it prints")
+        elif isinstance(node, (ForNode, WhileNode, VectorizedLoopNode, ParallelForNode)):
+            raise NotVectorizable("it contains a nested loop")
+        elif isinstance(node, FunctionCallNode):
+            raise NotVectorizable(f"it calls '{node.name}'")
+        elif isinstance(node, ReturnNode):
+            raise NotVectorizable("it returns")
+        elif isinstance(node, ArrayDeclarationNode):
+            raise NotVectorizable(f"it declares the array '{node.identifier.name}'")
+        else:
+            raise NotVectorizable(f"it contains an unsupported statement ({type(node).__name__})")
+
+    def expression(self, node):
+        if isinstance(node, NumberNode):
+            return
+        if isinstance(node, IdentifierNode):
+            self.scalars.add(node.name)
+            return
+        if isinstance(node, IndexNode):
+            name = node.identifier.name
+            offset = self.offset(node.index)
+            if offset is None:
+                raise NotVectorizable(f"{name}[...] is not indexed by '{self.variable}' plus a constant")
+            self.reads.append((name, offset, self.position))
+            return
+        if isinstance(node, BinaryOperationNode) and node.operator in VECTOR_OPERATORS:
+            if node.operator == '/' and not (isinstance(node.right, NumberNode) and node.right.value != 0):
+                raise NotVectorizable("it divides by something other than a non-zero literal")
+            self.expression(node.left)
+            self.expression(node.right)
+            return
+        if isinstance(node, LogicalOperationNode):
+            # Both sides are computed for every element; neither side can fail, so skipping is unobservable
+            self.expression(node.left)
+            self.expression(node.right)
+            return
+        if isinstance(node, NotNode):
+            self.expression(node.operand)
+            return
+        if isinstance(node, StringNode):
+            raise NotVectorizable("it uses a string")
+        if isinstance(node, FunctionCallNode):
+            raise NotVectorizable(f"it calls '{node.name}'")
+        if isinstance(node, (IncrementNode, DecrementNode)):
+            raise NotVectorizable(f"it changes the scalar '{node.identifier.name}'")
+        raise NotVectorizable(f"it contains an unsupported expression ({type(node).__name__})")
+
+    def offset(self, index):
+        """The constant k of an index `i`, `i + k` or `i - k`, or None for any other index."""
+        if isinstance(index, IdentifierNode) and index.name == self.variable:
+            return 0
+        if (isinstance(index, BinaryOperationNode) and index.operator in ('+', '-')
+                and isinstance(index.left, IdentifierNode) and index.left.name == self.variable
+                and isinstance(index.right, NumberNode) and type(index.right.value) is int):
+            return index.right.value if index.operator == '+' else -index.right.value
+        return None
+
+    def check_dependences(self):
+        """Rejects reads whose value would change when statements run over the whole range in turn."""
+        for array, offset, read_position in self.reads:
+            for written, write_position in self.writes:
+                if written != array or offset == 0:
+                    continue
+                if offset < 0 and write_position >= read_position:
+                    raise NotVectorizable(
+                        f"{array}[{self.variable} - {-offset}] reads a value an earlier iteration writes")
+                if offset > 0 and write_position < read_position:
+                    raise NotVectorizable(
+                        f"{array}[{self.variable} + {offset}] is read after an earlier statement overwrote it")
+
+
+def run_vectorized(node, symbol_table):
+    """Runs a VectorizedLoopNode whose counter is already initialised.
+
+    Returns False, having changed nothing, when a guard fails; the caller
+    then runs the original loop, which reports any error at the right
+    iteration.
+    """
+    start = symbol_table.get(node.variable)
+    if type(start) is not int:
+        return False
+    for name in node.scalars:
+        if type(symbol_table.get(name)) not in SCALAR_TYPES:
+            return False
+    stop = bound_value(node.bound, symbol_table)
+    if type(stop) is not int:
+        return False
+    if node.inclusive:
+        stop += 1
+
+    if stop > start:
+        arrays = {}
+        for name, offset in node.accesses:
+            array = symbol_table.get(name)
+            if type(array) is not ndarray or array.ndim != 1:
+                return False
+            if start + offset < 0 or stop + offset > array.shape[0]:
+                return False
+            arrays[name] = array
+        VectorRun(node.variable, start, stop, arrays, symbol_table).statements(node.loop.body.statements, None)
+
+    symbol_table[node.variable] = max(start, stop)
+    return True
+
+
+def bound_value(node, symbol_table):
+    if isinstance(node, NumberNode):
+        return node.value
+    if isinstance(node, IdentifierNode):
+        return symbol_table.get(node.name)
+    return VECTOR_OPERATORS[node.operator](bound_value(node.left, symbol_table),
+                                           bound_value(node.right, symbol_table))
+
+
+class VectorRun:
+    """Executes a vectorised loop body once, each statement over the whole counter range."""
+
+    def __init__(self, variable, start, stop, arrays, symbol_table):
+        self.variable = variable
+        self.start = start
+        self.stop = stop
+        self.arrays = arrays
+        self.symbol_table = symbol_table
+
+    def statements(self, statements, mask):
+        for statement in statements:
+            if isinstance(statement, IndexAssignmentNode):
+                target = self.arrays[statement.identifier.name][self.start:self.stop]
+                value = self.value(statement.value)
+                if mask is None:
+                    target[...] = value
+                else:
+                    numpy.copyto(target, value, casting='unsafe', where=mask)
+            elif isinstance(statement, IfNode):
+                condition = numpy.asarray(self.value(statement.condition), dtype=bool)
+                taken = condition if mask is None else mask & condition
+                self.statements(statement.then_branch.statements, taken)
+                if statement.else_branch:
+                    skipped = ~condition if mask is None else mask & ~condition
+                    self.statements(statement.else_branch.statements, skipped)
+
+    def value(self, node):
+        if isinstance(node, NumberNode):
+            return node.value
+        if isinstance(node, IdentifierNode):
+            if node.name == self.variable:
+                return numpy.arange(self.start, self.stop)
+            return self.symbol_table[node.name]
+        if isinstance(node, IndexNode):
+            offset = 0
+            if isinstance(node.index, BinaryOperationNode):
+                offset = node.index.right.value if node.index.operator == '+' else -node.index.right.value
+            return self.arrays[node.identifier.name][self.start + offset:self.stop + offset]
+        if isinstance(node, LogicalOperationNode):
+            combine = numpy.logical_and if node.operator == '&&' else numpy.logical_or
+            return combine(self.value(node.left), self.value(node.right))
+        if isinstance(node, NotNode):
+            return numpy.logical_not(self.value(node.operand))
+        return VECTOR_OPERATORS[node.operator](self.value(node.left), self.value(node.right))
@@ -0,0 +1,203 @@
+from .bytecode import BINARY_FUNCTIONS
+from .builtins import default_builtins
+from .frames import Frame, FramePool
+from .switch import switch_value
+
+# Linked calls do not use Python's stack, so the VM bounds how deep they may nest
+MAX_CALL_DEPTH = 10000
+
+
+class VirtualMachine:
+    """Executes assembled bytecode produced by `BytecodeCompiler`."""
+
+    def __init__(self, functions, output, ui=None, pair_counts=None, builtins=None):
+        self.functions = functions  # Function name -> CodeObject
+        self.builtins = default_builtins() if builtins is None else builtins
+        self.output = output
+        self.ui = ui
+        self.pair_counts = pair_counts  # Optional Counter of dispatched (opcode, next_opcode) pairs
+        self.dispatch_count = 0
+        self.frames = FramePool()
+
+    def run(self, code):
+        """Runs a parameterless CodeObject; returns (return_value, exported_variables_by_name)."""
+        frame = [None] * len(code.local_names)
+        result = self.execute(code, frame)
+        return result, {name: frame[slot] for name, slot in code.exports.items()}
+
+    def call(self, name, arguments):
+        native = self.builtins.get(name)
+        if native is not None:
+            return native.call(arguments)
+        code = self.functions.get(name)
+        if code is None:
+            raise ValueError(f"Undefined function: {name}")
+        if len(arguments) != code.parameter_count:
+            raise ValueError(
+                f"Incorrect number of arguments for function {name}. Expected {code.parameter_count}, got {len(arguments)}"
+            )
+        frame = arguments + [None] * (len(code.local_names) - code.parameter_count)
+        return self.execute(code, frame)
+
+    def execute(self, code, frame):
+        """Runs `code` with `frame` as its list of locals; returns what the code returns.
+
+        Linked calls (`CALL_CODE`) do not recurse into `execute`: the caller's
+        position is saved in its Frame and the loop carries on in a pooled
+        frame of the callee, and `RETURN` switches back. The operand stack is
+        shared, so arguments and return values stay where they are.
+        """
+        current = Frame(code, frame)
+        instructions = code.instructions
+        binary_functions = BINARY_FUNCTIONS
+        pair_counts = self.pair_counts
+        free_lists = self.frames.free
+        blanks = self.frames.blanks
+        pool_limit = self.frames.limit
+        depth = 0  # Linked calls active in this loop
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        previous = None
+        dispatches = 0
+        pc = 0
+
+        try:
+            while True:
+                op, arg = instructions[pc]
+                pc += 1
+                dispatches += 1
+                if pair_counts is not None:
+                    pair_counts[(previous, op)] += 1
+                    previous = op
+
+                if op == 'LOAD_LOCAL':
+                    push(frame[arg])
+
+                elif op == 'LOAD_CONST':
+                    push(arg)
+
+                elif op == 'STORE_LOCAL':
+                    frame[arg] = pop()
+
+                elif op == 'BINARY_OP_CONST':
+                    stack[-1] = binary_functions[arg[0]](stack[-1], arg[1])
+
+                elif op == 'BINARY_OP':
+                    right = pop()
+                    stack[-1] = binary_functions[arg](stack[-1], right)
+
+                elif op == 'COMPARE_CONST_JUMP':
+                    if not binary_functions[arg[0]](pop(), arg[1]):
+                        pc = arg[2]
+
+                elif op == 'COMPARE_JUMP':
+                    right = pop()
+                    if not binary_functions[arg[0]](pop(), right):
+                        pc = arg[1]
+
+                elif op == 'INC_LOCAL':
+                    frame[arg[0]] = binary_functions['+'](frame[arg[0]], arg[1])
+
+                elif op == 'LOAD_LOCAL_PAIR':
+                    push(frame[arg[0]])
+                    push(frame[arg[1]])
+
+                elif op == 'CALL_CODE':
+                    # Linked call: the argument count was checked at link time
+                    callee, argument_count = arg
+                    depth += 1
+                    if depth > MAX_CALL_DEPTH:
+                        raise RecursionError("maximum recursion depth exceeded")
+                    free = free_lists.get(callee)
+                    callee_frame = free.pop() if free else Frame(callee)
+                    if argument_count:
+                        callee_frame.locals[:argument_count] = stack[-argument_count:]
+                        del stack[-argument_count:]
+                    current.pc = pc
+                    callee_frame.caller = current
+                    current = callee_frame
+                    instructions = callee.instructions
+                    frame = callee_frame.locals
+                    pc = 0
+
+                elif op == 'RETURN':
+                    caller = current.caller
+                    if caller is None:
+                        return pop()
+                    depth -= 1
+                    # The return value stays on the stack for the caller
+                    free = free_lists.get(current.code)
+                    if free is None:
+                        free = self.frames.free_list(current.code)
+                    if len(free) < pool_limit:
+                        frame[:] = blanks[current.code]
+                        current.caller = None
+                        free.append(current)
+                    current = caller
+                    instructions = caller.code.instructions
+                    frame = caller.locals
+                    pc = caller.pc
+
+                elif op == 'POP_JUMP_IF_FALSE':
+                    if not pop():
+                        pc = arg
+
+                elif op == 'JUMP':
+                    pc = arg
+
+                elif op == 'SWITCH_TABLE':
+                    value = pop()
+                    if type(value) is not int:
+                        switch_value(value)  # Raises the TypeError
+                    low, targets, default = arg
+                    index = value - low
+                    pc = targets[index] if 0 <= index < len(targets) else default
+
+                elif op == 'SWITCH_MAP':
+                    value = pop()
+                    if type(value) is not int:
+                        switch_value(value)
+                    pc = arg[0].get(value, arg[1])
+
+                elif op == 'LOAD_LOCAL_CLEAR':
+                    # Last read of the variable: let the value go
+                    push(frame[arg])
+                    frame[arg] = None
+
+                elif op == 'DUP':
+                    push(stack[-1])
+
+                elif op == 'POP':
+                    pop()
+
+                elif op == 'PRINT':
+                    value = pop()
+                    if value is not None:
+                        self.output.append(str(value) + "\n")
+
+                elif op == 'CALL':
+                    name, argument_count = arg
+                    if argument_count:
+                        arguments = stack[-argument_count:]
+                        del stack[-argument_count:]
+                    else:
+                        arguments = []
+                    push(self.call(name, arguments))
+
+                elif op == 'CALL_NATIVE':
+                    function, argument_count = arg
+                    arguments = stack[len(stack) - argument_count:]
+                    del stack[len(stack) - argument_count:]
+                    push(function(arguments))
+
+                elif op == 'INPUT':
+                    slot, name = arg
+                    if self.ui is None:
+                        raise ValueError("UI reference is missing. Cannot prompt for input.")
+                    frame[slot] = self.ui.get_user_input(name)
+
+                else:
+                    raise ValueError(f"Unknown opcode: {op}")
+        finally:
+            self.dispatch_count += dispatches
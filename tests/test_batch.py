@@ -0,0 +1,13 @@
+import sys
+
+import pytest
+
+from mini_compiler.batch import run_many
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="RLIMIT_DATA is only enforced on Linux")
+def test_memory_limit_is_reported_by_name():
+    source = 'string s = "abcdefghij"; for (int i = 0; i < 40; i++) { s = s * 2; }'
+    result, = run_many([source], {}, workers=1, memory_limit=300 * 2**20)
+    assert result.status == 'memory_limit'
+    assert [error.message for error in result.errors] == ["Memory limit exceeded"]
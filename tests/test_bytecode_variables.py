@@ -0,0 +1,21 @@
+from mini_compiler.compiler import Compiler
+
+
+def variables(source, **options):
+    compiler = Compiler(**options)
+    compiler.evaluate(compiler.parse(compiler.tokenize(source)))
+    return compiler.symbol_table
+
+
+def test_variables_joined_by_a_copy_both_reach_the_symbol_table():
+    source = "int d = 1; int c = 0; while (c < 3) { c++; } d = c;"
+    assert variables(source, backend='bytecode') == variables(source) == {'d': 3, 'c': 3}
+
+
+def test_variables_that_are_only_read_are_not_listed():
+    source = "int a = 1; cout << z; int b = a;"
+    assert variables(source, backend='bytecode') == variables(source) == {'a': 1, 'b': 1}
+
+
+def test_release_variables_exports_nothing():
+    assert variables("int a = 1; int b = a + 1;", backend='bytecode', keep_variables=False) == {}
@@ -0,0 +1,11 @@
+from mini_compiler.cli import main
+
+
+def test_compile_errors_are_prefixed_once(tmp_path, capsys):
+    for source in ("func f(int a) int return a;", "int x = @;"):
+        path = tmp_path / "program.mc"
+        path.write_text(source)
+        main(["run", str(path)])
+        message = capsys.readouterr().err
+        assert message.startswith("Error: ")
+        assert "Error: Error:" not in message
@@ -0,0 +1,54 @@
+from mini_compiler.compiler import Compiler
+
+
+SOURCE = """
+int x;
+cin >> x;
+cout << x;
+int y;
+cin >> y;
+cout << x + y;
+"""
+
+
+class Inputs:
+    """Answers `cin` with the given values in order."""
+
+    def __init__(self, values):
+        self.values = iter(values)
+
+    def get_user_input(self, name):
+        return next(self.values)
+
+
+def run(source, inputs, **options):
+    compiler = Compiler(ui=Inputs(inputs), **options)
+    compiler.evaluate(compiler.parse(compiler.tokenize(source)))
+    return "".join(compiler.output), [error.message for error in compiler.errors]
+
+
+def test_declaration_without_value_then_cin():
+    for options in ({}, {'backend': 'bytecode'}):
+        assert run(SOURCE, [5, 6], **options) == ("5\n11\n", [])
+
+
+def test_declaration_without_value_keeps_going_after_an_error():
+    output, errors = run("int x;\ncin >> x;\ncout << 1 / 0;\nint y;\ncin >> y;\ncout << x + y;\n", [2, 3],
+                         continue_on_error=True)
+    assert output.endswith("5\n")
+    assert errors == ["Division by zero"]
+
+
+def test_declaration_without_value_in_a_hot_loop():
+    source = """
+    int s = 0;
+    for (int i = 0; i < 50; i++) {
+        int y;
+        y = i;
+        s = s + y;
+    }
+    cout << s;
+    """
+    for options in ({'hot_threshold': 5, 'background_compile': False},
+                    {'hot_threshold': 5, 'loop_jit': 'trace', 'background_compile': False}):
+        assert run(source, [], **options) == ("1225\n", [])
@@ -0,0 +1,175 @@
+"""Runs the same programs on every engine and checks they agree.
+
+The interpreter is the reference. Closures and traces are promoted after a
+couple of iterations so the compiled tiers run most of each program, and
+the bytecode backend runs with its default IR passes. Output and error
+reports must match exactly, and so must the symbol table of runs that
+finished without an error.
+"""
+import functools
+import os
+
+import pytest
+
+from mini_compiler.compiler import Compiler
+
+CORPUS = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "corpus")
+
+ENGINES = {
+    "closures": dict(hot_threshold=2, background_compile=False),
+    "trace": dict(hot_threshold=2, background_compile=False, loop_jit='trace'),
+    "bytecode": dict(backend='bytecode'),
+}
+
+PROGRAMS = {
+    "arithmetic": ("""
+int a = 7;
+int b = 2;
+float q = a / b;
+cout << a * b - 3;
+cout << q;
+cout << (a > b) && (b != 2);
+""", []),
+    "loops": ("""
+int total = 0;
+for (int i = 0; i < 200; i++) {
+    if (i < 50) { total = total + 1; } else { total = total + i; }
+}
+int j = 0;
+while (j < 30) { j++; }
+cout << total;
+cout << j;
+""", []),
+    "functions": ("""
+func fact(int n) int { if (n <= 1) { return 1; } return n * fact(n - 1); }
+func fib(int n) int { int a = 0; int b = 1; int i = 0; while (i < n) { int t = a + b; a = b; b = t; i++; } return a; }
+func sign(int v) int {
+    if (v > 0) { return 1; }
+    if (v < 0) { return 0 - 1; }
+    return 0;
+}
+int s = 0;
+for (int k = 0 - 5; k < 20; k++) { s = s + sign(k) + fib(k + 5); }
+cout << fact(10);
+cout << s;
+""", []),
+    "nested returns": ("""
+func find(int target) int {
+    for (int i = 0; i < 100; i++) {
+        for (int j = 0; j < 100; j++) {
+            if ((i * j) == target) { return (i * 100) + j; }
+        }
+    }
+    return 0 - 1;
+}
+cout << find(391);
+cout << find(10007);
+""", []),
+    "strings": ("""
+string s = "ab";
+for (int i = 0; i < 400; i++) { s = s + "xy"; }
+string t = s * 2;
+cout << t == s;
+cout << s < "b";
+string short = "c" + "d";
+cout << short;
+""", []),
+    "switch": ("""
+func name(int k) string {
+    switch (k) {
+        case 1: return "one";
+        case 2: return "two";
+        default: return "many";
+    }
+    return "unreachable";
+}
+int state = 0;
+int acc = 0;
+for (int i = 0; i < 100; i++) {
+    switch (state) {
+        case 0: acc = acc + 1; state = 1;
+        case 1: acc = acc + 10; state = 2;
+        default: state = 0;
+    }
+}
+cout << acc;
+cout << name(1);
+cout << name(7);
+""", []),
+    "logical": ("""
+int hits = 0;
+int zero = 0;
+for (int i = 0; i < 300; i++) {
+    if ((i > 10) && (i < 50) || (i == 200)) { hits = hits + 1; }
+    if ((zero != 0) && ((i / zero) > 1)) { hits = hits + 1000; }
+}
+cout << hits;
+cout << !0;
+cout << (1 || (1 / 0));
+""", []),
+    "input": ("""
+int x;
+cin >> x;
+int y = 0;
+cin >> y;
+cout << x * y;
+""", [6, 7]),
+    "copies": ("""
+int d = 1;
+int c = 0;
+while (c < 3) { c++; }
+d = c;
+int a = 1;
+int b = 2;
+for (int i = 0; i < 5; i++) { int t = a; a = b; b = t; }
+""", []),
+    "division by zero": ("""
+int s = 0;
+int i = 0;
+while (i < 200) {
+    s = s + 100 / (150 - i);
+    i = i + 1;
+}
+cout << s;
+""", []),
+    "error in a function": ("""
+func g(int n) int { return 10 / n; }
+int s = 0;
+for (int i = 20; i > 0 - 5; i--) { s = s + g(i); }
+""", []),
+    "type error": ("""
+string s = "a";
+for (int i = 0; i < 10; i++) { s = s + "b"; }
+cout << s;
+cout << s + 1;
+""", []),
+    "missing input": ("""
+int x = 0;
+cin >> x;
+cin >> x;
+""", [1]),
+}
+
+for file_name in sorted(os.listdir(CORPUS)):
+    with open(os.path.join(CORPUS, file_name)) as corpus_file:
+        PROGRAMS[file_name] = (corpus_file.read(), [])
+
+
+def run(source, inputs, options):
+    context = Compiler(**options).compile(source).run(inputs)
+    reports = [error.report() for error in context.errors]
+    variables = None if reports else context.symbol_table
+    return context.text(), reports, variables
+
+
+@functools.lru_cache(maxsize=None)
+def reference(program):
+    source, inputs = PROGRAMS[program]
+    return run(source, inputs, dict(hot_threshold=None))
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("program", PROGRAMS)
+def test_engines_agree_with_the_interpreter(program, engine):
+    source, inputs = PROGRAMS[program]
+    assert run(source, inputs, ENGINES[engine]) == reference(program)
@@ -0,0 +1,58 @@
+from mini_compiler.compiler import Compiler
+
+
+HOT_LOOP = """
+int s = 0;
+int i = 0;
+while (i < 2000) {
+    s = s + 100 / (1500 - i);
+    i = i + 1;
+}
+cout << s;
+"""
+
+HOT_FUNCTION = """
+func g(int n) int {
+    int r = 0;
+    r = 10 / n;
+    return r;
+}
+int s = 0;
+for (int i = 1500; i > 0 - 5; i--) {
+    s = s + g(i);
+}
+cout << s;
+"""
+
+ENGINES = [
+    dict(hot_threshold=None),
+    dict(),
+    dict(hot_threshold=5, background_compile=False),
+    dict(hot_threshold=5, loop_jit='trace', background_compile=False),
+    dict(backend='bytecode'),
+]
+
+
+def reports(source, **options):
+    compiler = Compiler(**options)
+    compiler.evaluate(compiler.parse(compiler.tokenize(source)))
+    return [error.report() for error in compiler.errors]
+
+
+def test_error_in_a_promoted_loop_has_the_failing_position():
+    for options in ENGINES:
+        assert reports(HOT_LOOP, **options) == ["Error: Division by zero (at line 5, column 9)\n"], options
+
+
+def test_error_in_a_promoted_function_has_the_callee_position():
+    for options in ENGINES:
+        assert reports(HOT_FUNCTION, **options) == ["Error: Division by zero (at line 4, column 9)\n  in g()\n"], options
+
+
+def test_deep_recursion_report_is_cut_short():
+    source = "func f(int n) int { return f(n + 1); }\ncout << f(0);"
+    for options in (dict(), dict(backend='bytecode')):
+        lines = reports(source, **options)[0].splitlines()
+        assert lines[0].startswith("Error: maximum recursion depth exceeded (at line 1")
+        assert lines[1:4] == ["  in f()"] * 3
+        assert lines[4].startswith("  [f() repeated ") and len(lines) == 5
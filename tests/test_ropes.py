@@ -0,0 +1,43 @@
+from mini_compiler.compiler import Compiler
+from mini_compiler.rope import Rope, concat
+
+
+LONG_STRING = """
+string s = "ab";
+for (int i = 0; i < 300; i++) { s = s + "x"; }
+string t = s * 2;
+cout << t == s;
+"""
+
+ENGINES = [
+    dict(hot_threshold=None),
+    dict(hot_threshold=5, background_compile=False),
+    dict(hot_threshold=5, loop_jit='trace', background_compile=False),
+    dict(backend='bytecode'),
+]
+
+
+def long_rope():
+    return concat("a" * 200, "b" * 100)
+
+
+def test_operators_other_than_plus_see_the_flat_string():
+    rope = long_rope()
+    assert type(rope) is Rope
+    assert rope * 2 == str(rope) * 2 and 2 * rope == str(rope) * 2
+    assert rope == str(rope) and rope < "b" and rope != 5
+    try:
+        rope - 1
+    except TypeError as error:
+        assert str(error) == "unsupported operand type(s) for -: 'str' and 'int'"
+    else:
+        raise AssertionError("rope - 1 did not fail")
+
+
+def test_hosts_get_plain_strings():
+    for options in ENGINES:
+        compiler = Compiler(**options)
+        compiler.evaluate(compiler.parse(compiler.tokenize(LONG_STRING)))
+        assert not any(line.startswith("Error") for line in compiler.output), options
+        assert type(compiler.symbol_table['s']) is str and type(compiler.symbol_table['t']) is str
+        assert compiler.symbol_table['t'] == ("ab" + "x" * 300) * 2
@@ -0,0 +1,24 @@
+from mini_compiler.compiler import Compiler
+
+
+SOURCE = """
+int n = 0;
+cin >> n;
+int s = 0;
+for (int i = 0; i < n; i++) { s = s + i; }
+cout << s;
+cout << 10 / (n - 3);
+"""
+
+
+def summary(context):
+    return context.text(), context.symbol_table, [error.report() for error in context.errors]
+
+
+def test_run_many_matches_run_on_every_backend():
+    input_sets = [[n] for n in range(12)]
+    for options in (dict(hot_threshold=5, background_compile=False), dict(backend='bytecode')):
+        program = Compiler(**options).compile(SOURCE)
+        program.run([50])  # Hot code is compiled in this process; the workers start cold
+        expected = [summary(program.run(inputs)) for inputs in input_sets]
+        assert [summary(context) for context in program.run_many(input_sets, workers=2, chunksize=5)] == expected